@@ -1,15 +1,101 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session
+from flask import Flask, render_template, request, redirect, url_for, flash, jsonify, session, Response, g
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from pypsrp.powershell import PowerShell, RunspacePool
-from pypsrp.wsman import WSMan
 import json
-from config.server_config import SERVER_CONFIGS
+import os
+import threading
+import time
+from config.server_config import get_server_config
 from config.ui_config import get_ui_config
-from config.domain_config import get_network_config, update_network_config
+from config.domain_config import (get_network_config, update_network_config, get_backend_config,
+                                  get_serving_config, get_session_warmup_config, get_audit_config,
+                                  get_admission_config, get_session_store_config)
+from modules.process_manager import ProcessManager
+from modules.process_table import ProcessTable
+from modules.fake_backend import FakeBackend
+from modules.admission import AdmissionController
+from modules.audit_log import AuditLog
+from modules.local_backend import LocalProcessBackend
+from modules.status_stream import StatusBroadcaster, StreamLimitError
+from modules.fleet_executor import FleetExecutor
+from modules.bulk_jobs import BulkItem, BulkJobScheduler
+from modules.command_jobs import CommandJobQueue
+from modules.result_store import ResultStore
+from modules.projection import Projection
+from modules.server_registry import ServerRegistry
+from modules.serving import ProductionServer
+from modules.session_warmer import SessionWarmer
+from modules.session_store import ServerSessionInterface, SessionStore
+from modules.metrics import REGISTRY, HTTP_REQUEST_SECONDS, HTTP_REQUESTS_IN_FLIGHT
 
 app = Flask(__name__)
 app.secret_key = 'your-secret-key-here'  # Required for session management
 
+# Session data stays on the server; the cookie only carries a session ID.
+# Pre-forked workers share sessions through the store's SQLite file.
+session_store_config = get_session_store_config()
+serving_config = get_serving_config()
+multiple_workers = serving_config['MODE'] == 'production' and serving_config['WORKERS'] > 1
+if multiple_workers and not session_store_config['PATH']:
+    raise RuntimeError('SESSION_STORE_CONFIG PATH (or DEVOPS_EAP_SESSION_DB) must be set when serving '
+                       'with more than one worker, otherwise each worker only knows its own sessions')
+session_store = SessionStore(session_store_config['PATH'],
+                             max_sessions=session_store_config['MAX_SESSIONS'],
+                             lifetime=session_store_config['LIFETIME'],
+                             sweep_interval=session_store_config['SWEEP_INTERVAL'],
+                             max_users=session_store_config['MAX_USERS'],
+                             shared=multiple_workers)
+app.session_interface = ServerSessionInterface(session_store)
+
+# Precompiled server definitions, reloaded when the registry file changes
+server_config = get_server_config()
+server_registry = ServerRegistry(server_config['FILE'], server_config['RELOAD_CHECK_INTERVAL'])
+
+# Shared process manager; every route borrows PowerShell sessions from its pool,
+# and every remote call is admitted through a per-host, priority-ordered gate.
+# The fake backend simulates remote hosts locally for load testing, and
+# localhost servers are served natively unless the fast path is disabled.
+backend_config = get_backend_config()
+admission = AdmissionController.from_config(get_admission_config())
+if backend_config['TYPE'] == 'fake':
+    process_manager = FakeBackend.from_config(backend_config).create_process_manager(admission=admission)
+else:
+    process_manager = ProcessManager(
+        local_backend=LocalProcessBackend() if backend_config['LOCAL_FAST_PATH'] else None,
+        admission=admission)
+
+# One background status poller per server and credential set, shared by the dashboard clients using them
+status_broadcaster = StatusBroadcaster(process_manager, max_subscribers=serving_config['MAX_STREAMS'])
+
+# Fans fleet-wide status checks out to every server in parallel
+fleet_executor = FleetExecutor(process_manager)
+
+# Runs bulk start/stop jobs in the background with global and per-host limits
+bulk_scheduler = BulkJobScheduler(process_manager)
+
+# Holds command output within memory/disk budgets and serves it back in pages
+result_store = ResultStore()
+
+# Runs /execute commands submitted in async mode on a dedicated worker pool
+command_jobs = CommandJobQueue(process_manager, result_store)
+
+# Opens sessions ahead of operator clicks and keeps them alive
+warmup_config = get_session_warmup_config()
+session_warmer = SessionWarmer(process_manager,
+                               interval=warmup_config['KEEPALIVE_INTERVAL'],
+                               idle_after=warmup_config['IDLE_AFTER'],
+                               sessions_per_host=warmup_config['SESSIONS_PER_HOST'])
+
+# Records who started, stopped or executed what; writes happen on a background thread
+audit_config = get_audit_config()
+audit_log = AuditLog(audit_config['PATH'],
+                     max_queue=audit_config['MAX_QUEUE'],
+                     batch_size=audit_config['BATCH_SIZE'],
+                     flush_interval=audit_config['FLUSH_INTERVAL'],
+                     overflow=audit_config['OVERFLOW']) if audit_config['ENABLED'] else None
+
+# Connection used by /execute for ad-hoc commands against the local machine
+LOCAL_CONNECTION = {'computer_name': 'localhost', 'username': None, 'ssl': False}
+
 login_manager = LoginManager()
 login_manager.init_app(app)
 login_manager.login_view = 'login'
@@ -20,7 +106,38 @@ class User(UserMixin):
 
 @login_manager.user_loader
 def load_user(username):
-    return User(username)
+    return session_store.get_user(username, User)
+
+def get_connection_config(server):
+    """Get the connection details for a configured server with {user} resolved."""
+    return server.connection_for(current_user.id)
+
+def record_audit(user, action, server_name, host, target, started, success, message=None):
+    """Queue an audit event for an action that began at perf_counter() time started"""
+    if audit_log is not None:
+        audit_log.record(user, action, server_name, host, target,
+                         round(time.perf_counter() - started, 3), success, message)
+
+@app.before_request
+def start_request_timer():
+    """Record the request start time and count the request as in flight"""
+    g.request_started = time.perf_counter()
+    HTTP_REQUESTS_IN_FLIGHT.inc()
+
+@app.after_request
+def record_request_metrics(response):
+    """Record the request latency by endpoint, method and status"""
+    HTTP_REQUEST_SECONDS.observe(time.perf_counter() - g.request_started,
+                                 endpoint=request.endpoint or 'unknown',
+                                 method=request.method,
+                                 status=response.status_code)
+    return response
+
+@app.teardown_request
+def finish_request(exception=None):
+    """Remove the request from the in-flight count"""
+    if 'request_started' in g:
+        HTTP_REQUESTS_IN_FLIGHT.dec()
 
 @app.route('/')
 def index():
@@ -34,7 +151,13 @@ def login():
         
         # For demo purposes, accept any credentials
         user = User(username)
+        # Start from a fresh session ID so one issued before login cannot be reused
+        session.regenerate()
         login_user(user)
+        if warmup_config['ENABLED']:
+            # Open this operator's sessions while the dashboard loads
+            session_warmer.warm(server.connection_for(username)
+                                for server in server_registry.snapshot.servers.values())
         return redirect(url_for('dashboard'))
     return render_template('login.html')
 
@@ -49,12 +172,14 @@ def dashboard():
                          username=current_user.id, 
                          connection_mode=session['connection_mode'],
                          ui_config=ui_config,
-                         servers=list(SERVER_CONFIGS.keys()))
+                         servers=list(server_registry.names()))
 
 @app.route('/logout')
 @login_required
 def logout():
     logout_user()
+    # Drop connection mode and server selection too; the emptied session is deleted with its cookie
+    session.clear()
     return redirect(url_for('login'))
 
 @app.route('/test_connection', methods=['POST'])
@@ -63,14 +188,15 @@ def test_connection():
     data = request.get_json()
     try:
         if data.get('computer_name') and data.get('username') and data.get('password'):
-            # Attempt remote connection
-            wsman = WSMan(data['computer_name'], username=data['username'], password=data['password'])
-            with RunspacePool(wsman) as pool:
-                ps = PowerShell(pool)
-                ps.add_script("$env:COMPUTERNAME")
-                output = ps.invoke()
-                session['connection_mode'] = 'Remote'
-                return jsonify({'success': True, 'message': f'Successfully connected to {output[0]}'})
+            # Attempt remote connection on a pooled session for these credentials
+            output = process_manager.run_script({
+                'computer_name': data['computer_name'],
+                'username': data['username'],
+                'password': data['password'],
+                'ssl': True
+            }, "$env:COMPUTERNAME")
+            session['connection_mode'] = 'Remote'
+            return jsonify({'success': True, 'message': f'Successfully connected to {output[0]}'})
         else:
             session['connection_mode'] = 'Local'
             return jsonify({'success': False, 'message': 'Missing connection details'})
@@ -83,33 +209,194 @@ def test_connection():
 def execute_command():
     data = request.get_json()
     command = data.get('command', '')
+    started = time.perf_counter()
     
+    # Optional select/where/sort/limit, applied on the host so only the requested rows come back
     try:
-        # Create a WSMan connection and RunspacePool
-        wsman = WSMan("localhost", ssl=False)
-        with RunspacePool(wsman) as pool:
-            ps = PowerShell(pool)
-            output = ps.add_script(command).invoke()
-            return jsonify({
-                'success': True,
-                'output': [str(item) for item in output]
-            })
+        projection = Projection.from_request(data)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'output': f'Invalid output options: {str(e)}'
+        })
+    
+    if data.get('async'):
+        # Run in the background and let the client poll for the result
+        job = command_jobs.submit(current_user.id, command, LOCAL_CONNECTION, projection)
+        record_audit(current_user.id, 'execute_async', None, LOCAL_CONNECTION['computer_name'], command,
+                     started, True, f'Queued as job {job.job_id}')
+        return jsonify({
+            'success': True,
+            'job_id': job.job_id,
+            'state': job.state
+        })
+    
+    try:
+        # Write output into the result store as it arrives and return the first page
+        script = projection.wrap(command) if projection else command
+        with result_store.create(current_user.id, command) as writer:
+            for stream, record in process_manager.stream_script(LOCAL_CONNECTION, script):
+                if stream == 'output':
+                    writer.append(str(record))
+        record_audit(current_user.id, 'execute', None, LOCAL_CONNECTION['computer_name'], command, started, True)
+        lines, next_offset, total = result_store.read(writer.result_id)
+        response = {
+            'success': True,
+            'result_id': writer.result_id,
+            'total_lines': total,
+            'next_offset': next_offset
+        }
+        if projection:
+            # Stored pages hold one JSON row per line
+            response['rows'] = Projection.parse_rows(lines)
+        else:
+            response['output'] = lines
+        return jsonify(response)
     except Exception as e:
+        record_audit(current_user.id, 'execute', None, LOCAL_CONNECTION['computer_name'], command, started,
+                     False, str(e))
         return jsonify({
             'success': False,
             'output': f'Error executing command: {str(e)}'
         })
 
+@app.route('/execute_stream', methods=['POST'])
+@login_required
+def execute_stream():
+    """Execute a command and stream its output and errors as newline-delimited JSON"""
+    data = request.get_json()
+    command = data.get('command', '')
+    user = current_user.id  # The request context is gone while the response streams
+    started = time.perf_counter()
+    
+    def generate():
+        host = LOCAL_CONNECTION['computer_name']
+        try:
+            for stream, record in process_manager.stream_script(LOCAL_CONNECTION, command):
+                yield json.dumps({'stream': stream, 'data': str(record)}) + '\n'
+            record_audit(user, 'execute', None, host, command, started, True)
+            yield json.dumps({'stream': 'end', 'success': True}) + '\n'
+        except Exception as e:
+            record_audit(user, 'execute', None, host, command, started, False, str(e))
+            yield json.dumps({'stream': 'end', 'success': False,
+                              'message': f'Error executing command: {str(e)}'}) + '\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/execute_status', methods=['POST'])
+@login_required
+def execute_status():
+    """Get the state of a command submitted in async mode"""
+    data = request.get_json()
+    job = command_jobs.get_job(data.get('job_id'))
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': f'Job {data.get("job_id")} not found'
+        })
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    })
+
+@app.route('/execute_result', methods=['POST'])
+@login_required
+def execute_result():
+    """Get the output of a finished command submitted in async mode"""
+    data = request.get_json()
+    job = command_jobs.get_job(data.get('job_id'))
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': f'Job {data.get("job_id")} not found'
+        })
+    if not job.done:
+        return jsonify({
+            'success': False,
+            'state': job.state,
+            'message': f'Job {job.job_id} is still {job.state}'
+        })
+    if job.state == 'failed':
+        return jsonify({
+            'success': False,
+            'state': job.state,
+            'output': f'Error executing command: {job.error}'
+        })
+    
+    lines, next_offset, total = result_store.read(job.result_id) if job.result_id else ([], None, 0)
+    response = {
+        'success': True,
+        'state': job.state,
+        'errors': job.errors,
+        'result_id': job.result_id,
+        'total_lines': total,
+        'next_offset': next_offset
+    }
+    if job.projection:
+        response['rows'] = Projection.parse_rows(lines)
+    else:
+        response['output'] = lines
+    return jsonify(response)
+
+@app.route('/execute_result_page', methods=['POST'])
+@login_required
+def execute_result_page():
+    """Get a page of stored command output, optionally filtered by a regular expression;
+    with rows set, lines of a structured result are returned as decoded JSON rows"""
+    data = request.get_json()
+    result_id = data.get('result_id')
+    
+    try:
+        lines, next_offset, total = result_store.read(
+            result_id,
+            offset=int(data.get('offset', 0)),
+            limit=int(data.get('limit', ResultStore.DEFAULT_PAGE_SIZE)),
+            pattern=data.get('grep'))
+    except KeyError:
+        return jsonify({
+            'success': False,
+            'message': f'Result {result_id} not found'
+        })
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'message': f'Error reading result {result_id}: {str(e)}'
+        })
+    
+    return jsonify({
+        'success': True,
+        'result_id': result_id,
+        ('rows' if data.get('rows') else 'output'): Projection.parse_rows(lines) if data.get('rows') else lines,
+        'offset': int(data.get('offset', 0)),
+        'next_offset': next_offset,
+        'total_lines': total
+    })
+
+@app.route('/execute_cancel', methods=['POST'])
+@login_required
+def execute_cancel():
+    """Cancel a queued or running command submitted in async mode"""
+    data = request.get_json()
+    if not command_jobs.cancel(data.get('job_id')):
+        return jsonify({
+            'success': False,
+            'message': f'Job {data.get("job_id")} not found or already finished'
+        })
+    
+    return jsonify({
+        'success': True,
+        'message': f'Cancellation requested for job {data.get("job_id")}'
+    })
+
 @app.route('/update_server', methods=['POST'])
 @login_required
 def update_server():
     server = request.json.get('server')
-    if server in SERVER_CONFIGS:
-        config = SERVER_CONFIGS[server]
-        # Replace {user} placeholder with actual username
-        config['username'] = config['username'].format(user=current_user.id)
+    if server in server_registry:
+        # Only the name goes into the cookie; connection details come from the registry
         session['current_server'] = server
-        session['server_config'] = config
         return jsonify({'success': True, 'message': f'Connected to {server}'})
     return jsonify({'success': False, 'message': 'Invalid server selection'}), 400
 
@@ -126,12 +413,13 @@ def get_process_commands():
             'message': 'Server name and process name are required'
         })
     
-    if server_name in SERVER_CONFIGS and process_name in SERVER_CONFIGS[server_name]['processes']:
-        process_config = SERVER_CONFIGS[server_name]['processes'][process_name]
+    server = server_registry.get(server_name)
+    if server and process_name in server.processes:
+        process_config = server.processes[process_name]
         return jsonify({
             'success': True,
-            'start_command': process_config['start_command'],
-            'stop_command': process_config['stop_command']
+            'start_command': process_config.start_command,
+            'stop_command': process_config.stop_command
         })
     return jsonify({
         'success': False,
@@ -154,54 +442,161 @@ def execute_process():
             'message': 'Invalid request parameters'
         })
     
-    if server_name not in SERVER_CONFIGS:
+    server = server_registry.get(server_name)
+    if server is None:
         return jsonify({
             'success': False,
             'message': f'Server {server_name} not found'
         })
         
-    server_config = SERVER_CONFIGS[server_name]
-    if process_name not in server_config['processes']:
+    if process_name not in server.processes:
         return jsonify({
             'success': False,
             'message': f'Process {process_name} not found for server {server_name}'
         })
     
+    started = time.perf_counter()
     try:
-        # Create WSMan connection
-        wsman = WSMan(server_config['computer_name'], 
-                     username=server_config.get('username'),
-                     ssl=server_config.get('ssl', False))
+        process_config = server.processes[process_name]
         
-        # Create process configuration
-        process_config = {
-            'name': process_name,
-            'start_command': server_config['processes'][process_name]['start_command'],
-            'stop_command': server_config['processes'][process_name]['stop_command']
-        }
-        
-        # Execute the action
-        with RunspacePool(wsman) as pool:
-            ps = PowerShell(pool)
-            if action == 'start':
-                ps.add_script(process_config['start_command']).invoke()
-                return jsonify({
-                    'success': True,
-                    'message': f'Process {process_name} started successfully'
-                })
-            else:
-                ps.add_script(process_config['stop_command']).invoke()
-                return jsonify({
-                    'success': True,
-                    'message': f'Process {process_name} stopped successfully'
-                })
+        # Execute the action and wait for the process to reach the new state
+        connection_config = get_connection_config(server)
+        if action == 'start':
+            success, message = process_manager.start_process(connection_config, process_config)
+        else:
+            success, message = process_manager.stop_process(connection_config, process_config)
+        record_audit(current_user.id, action, server_name, server.computer_name, process_name,
+                     started, success, message)
+        return jsonify({
+            'success': success,
+            'message': message
+        })
             
     except Exception as e:
+        record_audit(current_user.id, action, server_name, server.computer_name, process_name,
+                     started, False, str(e))
         return jsonify({
             'success': False,
             'message': f'Error executing {action} for {process_name}: {str(e)}'
         })
 
+@app.route('/bulk_process', methods=['POST'])
+@login_required
+def bulk_process():
+    """Submit a list of start/stop actions as a background job"""
+    data = request.get_json()
+    requested = data.get('items') or []
+    
+    if not requested:
+        return jsonify({
+            'success': False,
+            'message': 'At least one item is required'
+        })
+    
+    items = []
+    for entry in requested:
+        server_name = entry.get('server')
+        process_name = entry.get('process')
+        action = entry.get('action')
+        if action not in ['start', 'stop']:
+            return jsonify({
+                'success': False,
+                'message': f'Invalid action {action} for {process_name}'
+            })
+        server = server_registry.get(server_name)
+        if server is None:
+            return jsonify({
+                'success': False,
+                'message': f'Server {server_name} not found'
+            })
+        if process_name not in server.processes:
+            return jsonify({
+                'success': False,
+                'message': f'Process {process_name} not found for server {server_name}'
+            })
+        items.append(BulkItem(server_name,
+                              server.processes[process_name],
+                              action,
+                              get_connection_config(server),
+                              server.max_parallel_operations))
+    
+    job = bulk_scheduler.submit(current_user.id, items)
+    return jsonify({
+        'success': True,
+        'job_id': job.job_id
+    })
+
+@app.route('/orchestrate_process', methods=['POST'])
+@login_required
+def orchestrate_process():
+    """Start or stop processes in dependency order as a background job"""
+    data = request.get_json(silent=True) or {}
+    action = data.get('action')
+    if action not in ['start', 'stop']:
+        return jsonify({
+            'success': False,
+            'message': f'Invalid action {action}'
+        })
+
+    # Targets are explicit processes, or every process of the listed servers
+    registry = server_registry.snapshot
+    targets = [(entry.get('server'), entry.get('process')) for entry in data.get('items') or []]
+    for server_name in data.get('servers') or []:
+        if server_name not in registry.servers:
+            return jsonify({
+                'success': False,
+                'message': f'Server {server_name} not found'
+            })
+        targets.extend((server_name, process_name) for process_name in registry.servers[server_name].process_names)
+    if not targets:
+        return jsonify({
+            'success': False,
+            'message': 'At least one server or item is required'
+        })
+    for server_name, process_name in targets:
+        server = registry.servers.get(server_name)
+        if server is None or process_name not in server.processes:
+            return jsonify({
+                'success': False,
+                'message': f'Process {process_name} not found for server {server_name}'
+            })
+
+    plan = registry.dependencies.plan(action, targets)
+    items = {}
+    for server_name, process_name in plan.steps:
+        server = registry.servers[server_name]
+        items[(server_name, process_name)] = BulkItem(
+            server_name,
+            server.processes[process_name],
+            action,
+            get_connection_config(server),
+            server.max_parallel_operations,
+            requires=[items[step] for step in plan.prerequisites[(server_name, process_name)]])
+
+    job = bulk_scheduler.submit(current_user.id, list(items.values()))
+    return jsonify({
+        'success': True,
+        'job_id': job.job_id,
+        'plan': plan.to_dict()
+    })
+
+@app.route('/bulk_process_status', methods=['POST'])
+@login_required
+def bulk_process_status():
+    """Get the progress of a bulk start/stop job"""
+    data = request.get_json()
+    job = bulk_scheduler.get_job(data.get('job_id'))
+    if job is None:
+        return jsonify({
+            'success': False,
+            'message': f'Job {data.get("job_id")} not found'
+        })
+    
+    return jsonify({
+        'success': True,
+        'job': job.to_dict()
+    })
+
 @app.route('/process_status', methods=['POST'])
 @login_required
 def process_status():
@@ -217,38 +612,38 @@ def process_status():
             'message': 'Server name and process name are required'
         })
     
-    if server_name not in SERVER_CONFIGS:
+    server = server_registry.get(server_name)
+    if server is None:
         return jsonify({
             'success': False,
             'message': f'Server {server_name} not found'
         })
         
-    server_config = SERVER_CONFIGS[server_name]
-    if process_name not in server_config['processes']:
+    if process_name not in server.processes:
         return jsonify({
             'success': False,
             'message': f'Process {process_name} not found for server {server_name}'
         })
     
     try:
-        # Create WSMan connection
-        wsman = WSMan(server_config['computer_name'], 
-                     username=server_config.get('username'),
-                     ssl=server_config.get('ssl', False))
-        
-        # Check process status
-        with RunspacePool(wsman) as pool:
-            ps = PowerShell(pool)
-            ps.add_script(f"Get-Process -Name {process_name} -ErrorAction SilentlyContinue")
-            output = ps.invoke()
-            is_running = len(output) > 0
-            
+        # Check process status; concurrent lookups share one cached remote call
+        connection_config = get_connection_config(server)
+        success, status = process_manager.get_process_status(connection_config, process_name,
+                                                             server.processes[process_name].status_script)
+        if not success:
             return jsonify({
-                'success': True,
-                'status': 'running' if is_running else 'stopped',
-                'process': process_name,
-                'server': server_name
+                'success': False,
+                'message': f'Error checking status for {process_name}: {status.get("error", "no status returned")}',
+                'circuit': process_manager.circuit_state(connection_config)
             })
+        
+        return jsonify({
+            'success': True,
+            'status': 'running' if status.get('running') else 'stopped',
+            'process': process_name,
+            'server': server_name,
+            'circuit': process_manager.circuit_state(connection_config)
+        })
             
     except Exception as e:
         return jsonify({
@@ -256,6 +651,241 @@ def process_status():
             'message': f'Error checking status for {process_name}: {str(e)}'
         })
 
+@app.route('/server_status', methods=['POST'])
+@login_required
+def server_status():
+    """Get the status of every configured process on a server in one remote call"""
+    data = request.get_json()
+    server_name = data.get('server', 'Local PC')
+    
+    server = server_registry.get(server_name)
+    if server is None:
+        return jsonify({
+            'success': False,
+            'message': f'Server {server_name} not found'
+        })
+    
+    connection_config = get_connection_config(server)
+    success, result = process_manager.get_server_status(connection_config, server.process_names,
+                                                        server.batch_status_script)
+    if not success:
+        return jsonify({
+            'success': False,
+            'message': f'Error checking status for {server_name}: {result["error"]}',
+            'circuit': process_manager.circuit_state(connection_config)
+        })
+    
+    return jsonify({
+        'success': True,
+        'server': server_name,
+        'processes': result,
+        'circuit': process_manager.circuit_state(connection_config)
+    })
+
+@app.route('/fleet_status', methods=['POST'])
+@login_required
+def fleet_status():
+    """Get the status of every configured process on every server in parallel"""
+    data = request.get_json(silent=True) or {}
+    registry = server_registry.snapshot
+    server_names = data.get('servers') or registry.names
+    try:
+        timeout = FleetExecutor.check_timeout(data.get('timeout'))
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        })
+    
+    unknown = [server_name for server_name in server_names if server_name not in registry.servers]
+    if unknown:
+        return jsonify({
+            'success': False,
+            'message': f'Server {unknown[0]} not found'
+        })
+    
+    servers = [registry.servers[server_name] for server_name in server_names]
+    targets = {server.name: (get_connection_config(server), server.process_names, server.batch_status_script)
+               for server in servers}
+    results = fleet_executor.get_fleet_status(targets, timeout)
+    for server_name, (connection_config, _, _) in targets.items():
+        results[server_name]['circuit'] = process_manager.circuit_state(connection_config)
+        results[server_name]['admission'] = process_manager.admission_state(connection_config)
+    return jsonify({
+        'success': True,
+        'servers': results
+    })
+
+@app.route('/status_stream')
+@login_required
+def status_stream():
+    """Stream process status changes for a server as Server-Sent Events"""
+    server_name = request.args.get('server', 'Local PC')
+    
+    server = server_registry.get(server_name)
+    if server is None:
+        return jsonify({
+            'success': False,
+            'message': f'Server {server_name} not found'
+        }), 404
+    
+    try:
+        subscription = status_broadcaster.subscribe(
+            server_name,
+            get_connection_config(server),
+            list(server.process_names),
+            server.batch_status_script)
+    except StreamLimitError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 503
+    return Response(status_broadcaster.stream(subscription),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@app.route('/process_history', methods=['POST'])
+@login_required
+def process_history():
+    """Get the CPU and memory history of a process for charting"""
+    data = request.get_json(silent=True) or {}
+    server_name = data.get('server', 'Local PC')
+    process_name = data.get('process')
+
+    server = server_registry.get(server_name)
+    if server is None:
+        return jsonify({
+            'success': False,
+            'message': f'Server {server_name} not found'
+        })
+
+    if process_name not in server.processes:
+        return jsonify({
+            'success': False,
+            'message': f'Process {process_name} not found for server {server_name}'
+        })
+
+    try:
+        end = float(data.get('end') or time.time())
+        start = float(data.get('start') or end - 3600)
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'message': 'start and end must be Unix timestamps'
+        })
+
+    history = process_manager.history.query(server.computer_name, process_name, start, end)
+    return jsonify({
+        'success': True,
+        'server': server_name,
+        'process': process_name,
+        'history': history or {'resolution': None, 't': [], 'cpu_percent': [], 'memory': []}
+    })
+
+@app.route('/process_table', methods=['POST'])
+@login_required
+def process_table():
+    """Search every process on a server, or list the top processes by CPU or memory"""
+    data = request.get_json(silent=True) or {}
+    server_name = data.get('server', 'Local PC')
+
+    server = server_registry.get(server_name)
+    if server is None:
+        return jsonify({
+            'success': False,
+            'message': f'Server {server_name} not found'
+        })
+
+    try:
+        max_age = float(data['max_age']) if data.get('max_age') is not None else None
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'message': 'max_age must be a number'
+        }), 400
+    try:
+        top = ProcessTable.check_limit(data.get('top'), 'top')
+        limit = ProcessTable.check_limit(data['limit']) if data.get('limit') is not None else top
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+
+    connection_config = get_connection_config(server)
+    success, table = process_manager.get_process_table(connection_config, 0 if data.get('refresh') else max_age)
+    if not success:
+        return jsonify({
+            'success': False,
+            'message': f'Error reading processes of {server_name}: {table}',
+            'circuit': process_manager.circuit_state(connection_config)
+        })
+
+    sort = data.get('by') or ('cpu' if top is not None else None)
+    try:
+        processes = table.select(data.get('search'), bool(data.get('regex')), sort, limit)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        })
+
+    return jsonify({
+        'success': True,
+        'server': server_name,
+        'snapshot': table.to_dict(),
+        'processes': processes
+    })
+
+@app.route('/audit_log', methods=['POST'])
+@login_required
+def audit_log_query():
+    """Get recorded start/stop and execute actions, newest first"""
+    if audit_log is None:
+        return jsonify({
+            'success': False,
+            'message': 'Audit log is disabled'
+        })
+    data = request.get_json(silent=True) or {}
+
+    host = None
+    if data.get('server'):
+        server = server_registry.get(data['server'])
+        if server is None:
+            return jsonify({
+                'success': False,
+                'message': f'Server {data["server"]} not found'
+            })
+        host = server.computer_name
+
+    try:
+        start = float(data['start']) if data.get('start') is not None else None
+        end = float(data['end']) if data.get('end') is not None else None
+        limit = int(data['limit']) if data.get('limit') is not None else AuditLog.DEFAULT_QUERY_LIMIT
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'message': 'start and end must be Unix timestamps and limit a number'
+        })
+
+    try:
+        events = audit_log.query(start, end, data.get('user'), host, limit)
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        })
+    return jsonify({
+        'success': True,
+        'events': events,
+        'writer': audit_log.stats()
+    })
+
+@app.route('/metrics')
+def metrics():
+    """Expose request, remote call, session pool and retry metrics in Prometheus text format"""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
 @app.route('/update_ui_config', methods=['POST'])
 def update_ui_config():
     """Update UI configuration settings."""
@@ -271,10 +901,47 @@ def update_ui_config():
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+def start_services():
+    """Start background session warm-up and keepalive if enabled"""
+    if not warmup_config['ENABLED']:
+        return
+    connections = []
+    for server in server_registry.snapshot.servers.values():
+        users = warmup_config['USERS'] if server.per_user else ['']
+        connections.extend(server.connection_for(user) for user in users)
+    session_warmer.warm(connections)
+    session_warmer.start()
+
+def shutdown_services(timeout):
+    """Stop background work, waiting up to timeout seconds for running jobs, then close all sessions"""
+    def stop_jobs():
+        bulk_scheduler.shutdown(wait_for_items=True)
+        command_jobs.shutdown(wait_for_jobs=True)
+
+    session_warmer.stop()
+    status_broadcaster.shutdown()
+    waiter = threading.Thread(target=stop_jobs, daemon=True)
+    waiter.start()
+    waiter.join(timeout)
+    fleet_executor.shutdown()
+    process_manager.cleanup_all_sessions()
+    if audit_log is not None:
+        audit_log.close(timeout)
+    session_store.close()
+
 if __name__ == '__main__':
     network_config = get_network_config()
-    app.run(
-        host=network_config['HOST'],
-        port=network_config['PORT'],
-        debug=network_config['DEBUG']
-    )
+    if serving_config['MODE'] == 'production':
+        ProductionServer.from_config(app, network_config, serving_config,
+                                     on_start=start_services,
+                                     before_drain=status_broadcaster.shutdown,
+                                     on_shutdown=shutdown_services).serve_forever()
+    else:
+        # With the debug reloader, only start background work in the serving child process
+        if not network_config['DEBUG'] or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            start_services()
+        app.run(
+            host=network_config['HOST'],
+            port=network_config['PORT'],
+            debug=network_config['DEBUG']
+        )
@@ -0,0 +1,226 @@
+"""
+Load Test Benchmark
+Drives /process_status, /execute_process and /execute at fixed concurrency
+levels and reports throughput and latency percentiles.
+
+By default the application is loaded in-process with the fake PowerShell
+backend (modules/fake_backend.py), so the numbers form a repeatable baseline
+on any Linux box. Pass --url to run the same scenarios against a live server
+over HTTP instead.
+
+Usage:
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --concurrency 1,16,64 --duration 20
+    python benchmarks/load_test.py --invoke-latency 0.2 --failure-rate 0.05 --json results.json
+    python benchmarks/load_test.py --url http://localhost:5000 --scenarios process_status
+"""
+import argparse
+import http.cookiejar
+import json
+import os
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Callable, List, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SERVER = 'Local PC'
+PROCESS = 'notepad'
+
+
+def scenario_requests(name: str, worker: int, iteration: int) -> Tuple[str, dict]:
+    """
+    Get the path and JSON body of the next request of a scenario.
+
+    Args:
+        name: Scenario name
+        worker: Index of the worker thread
+        iteration: Number of requests the worker has sent so far
+
+    Returns:
+        Tuple[str, dict]: Request path and JSON body
+    """
+    if name == 'process_status':
+        return '/process_status', {'server': SERVER, 'process': PROCESS}
+    if name == 'execute_process':
+        # Workers alternate start/stop, so concurrent runs also contend on the same process
+        action = 'start' if iteration % 2 == 0 else 'stop'
+        return '/execute_process', {'server': SERVER, 'process': PROCESS, 'action': action}
+    if name == 'execute':
+        return '/execute', {'command': 'Get-ChildItem C:\\Windows'}
+    raise ValueError(f'Unknown scenario: {name}')
+
+
+SCENARIOS = ('process_status', 'execute_process', 'execute')
+
+
+class InProcessClient:
+    """Sends requests through the Flask test client of an in-process app."""
+    def __init__(self, app):
+        self.client = app.test_client()
+        self.client.post('/login', data={'username': 'loadtest', 'password': 'loadtest'})
+
+    def post(self, path: str, body: dict) -> bool:
+        response = self.client.post(path, json=body)
+        return response.status_code == 200 and bool((response.get_json(silent=True) or {}).get('success'))
+
+
+class HttpClient:
+    """Sends requests to a live server over HTTP with its own login session."""
+    def __init__(self, base_url: str):
+        self.base_url = base_url.rstrip('/')
+        self.opener = urllib.request.build_opener(
+            urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+        form = urllib.parse.urlencode({'username': 'loadtest', 'password': 'loadtest'}).encode()
+        self.opener.open(self.base_url + '/login', data=form).read()
+
+    def post(self, path: str, body: dict) -> bool:
+        request = urllib.request.Request(self.base_url + path, data=json.dumps(body).encode(),
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            with self.opener.open(request) as response:
+                return response.status == 200 and bool(json.loads(response.read()).get('success'))
+        except (urllib.error.URLError, ValueError):
+            return False
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Get a nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = min(int(round(fraction * len(sorted_values) + 0.5)) - 1, len(sorted_values) - 1)
+    return sorted_values[max(index, 0)]
+
+
+def run_level(make_client: Callable[[], object], scenario: str, concurrency: int, duration: float) -> dict:
+    """
+    Run one scenario at one concurrency level.
+
+    Args:
+        make_client: Callable creating a logged-in client per worker
+        scenario: Scenario name
+        concurrency: Number of workers sending requests back to back
+        duration: Seconds to keep sending requests
+
+    Returns:
+        dict: Request and error counts, throughput and latency percentiles in milliseconds
+    """
+    clients = [make_client() for _ in range(concurrency)]
+    latencies: List[float] = []
+    errors = [0]
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(concurrency + 1)
+    deadline = [0.0]
+
+    def worker(index: int):
+        client = clients[index]
+        local_latencies, local_errors, iteration = [], 0, 0
+        start_barrier.wait()
+        while time.perf_counter() < deadline[0]:
+            path, body = scenario_requests(scenario, index, iteration)
+            started = time.perf_counter()
+            try:
+                ok = client.post(path, body)
+            except Exception:
+                ok = False
+            local_latencies.append(time.perf_counter() - started)
+            local_errors += not ok
+            iteration += 1
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=worker, args=(index,), daemon=True) for index in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    started = time.perf_counter()
+    deadline[0] = started + duration
+    start_barrier.wait()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': len(latencies),
+        'errors': errors[0],
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000
+    }
+
+
+def load_in_process_app(args):
+    """Import the application with the fake backend configured from the command line."""
+    os.environ['DEVOPS_EAP_BACKEND'] = 'fake'
+    sys.path.insert(0, ROOT)
+    from config.domain_config import get_backend_config
+    backend_config = get_backend_config()
+    backend_config.update({
+        'TYPE': 'fake',
+        'FAKE_CONNECT_LATENCY': args.connect_latency,
+        'FAKE_INVOKE_LATENCY': args.invoke_latency,
+        'FAKE_FAILURE_RATE': args.failure_rate,
+        'FAKE_OUTPUT_LINES': args.output_lines,
+        'FAKE_START_DELAY': args.start_delay,
+        'FAKE_SEED': args.seed
+    })
+    import app as application
+    return application.app
+
+
+def print_table(results: List[dict]):
+    """Print benchmark results as a fixed-width table."""
+    header = f"{'scenario':<16}{'conc':>6}{'requests':>10}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print('-' * len(header))
+    for result in results:
+        print(f"{result['scenario']:<16}{result['concurrency']:>6}{result['requests']:>10}{result['errors']:>8}"
+              f"{result['throughput']:>10.1f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test the DevOps EAP service')
+    parser.add_argument('--url', help='Base URL of a live server (default: in-process app with the fake backend)')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS), help='Comma separated scenarios to run')
+    parser.add_argument('--concurrency', default='1,8,32', help='Comma separated concurrency levels')
+    parser.add_argument('--duration', type=float, default=10.0, help='Seconds per scenario and level')
+    parser.add_argument('--connect-latency', type=float, default=0.2, help='Fake backend: seconds to open a session')
+    parser.add_argument('--invoke-latency', type=float, default=0.05, help='Fake backend: seconds per invocation')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Fake backend: probability a call fails')
+    parser.add_argument('--output-lines', type=int, default=20, help='Fake backend: lines returned by /execute')
+    parser.add_argument('--start-delay', type=float, default=0.5, help='Fake backend: seconds until a started process runs')
+    parser.add_argument('--seed', type=int, default=None, help='Fake backend: random seed')
+    parser.add_argument('--json', dest='json_path', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    if args.url:
+        make_client = lambda: HttpClient(args.url)
+    else:
+        flask_app = load_in_process_app(args)
+        make_client = lambda: InProcessClient(flask_app)
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    levels = [int(level) for level in args.concurrency.split(',') if level.strip()]
+    results = []
+    for scenario in scenarios:
+        for concurrency in levels:
+            results.append(run_level(make_client, scenario, concurrency, args.duration))
+            print(f"{scenario} x{concurrency}: {results[-1]['throughput']:.1f} req/s", file=sys.stderr)
+    print()
+    print_table(results)
+
+    if args.json_path:
+        with open(args.json_path, 'w') as f:
+            json.dump({'args': vars(args), 'results': results}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
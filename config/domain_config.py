@@ -1,3 +1,5 @@
+import os
+
 # Network Configuration Settings
 
 NETWORK_CONFIG = {
@@ -6,13 +8,120 @@ NETWORK_CONFIG = {
     'DEBUG': True       # Debug mode for development
 }
 
+# Serving Settings
+# 'development' runs the Flask dev server; 'production' runs modules/serving.py
+# with a fixed worker model and graceful drain on SIGTERM/SIGINT.
+# The DEVOPS_EAP_MODE environment variable overrides the mode.
+SERVING_CONFIG = {
+    'MODE': os.environ.get('DEVOPS_EAP_MODE', 'development'),
+    'WORKERS': 1,            # Worker processes; each has its own sessions, jobs and results
+    'THREADS': 16,           # Request threads per worker, including those held by open status streams
+    'MAX_STREAMS': 8,        # Dashboard status streams (one per open tab) per worker; each holds a
+                             # request thread while open, so keep THREADS above it plus the expected
+                             # concurrent requests. Tabs beyond it poll /server_status instead.
+    'MAX_QUEUE': 64,         # Accepted connections waiting for a thread before answering 503
+    'KEEPALIVE_TIMEOUT': 5,  # Seconds an idle keep-alive connection is kept open
+    'DRAIN_TIMEOUT': 30      # Seconds in-flight requests and jobs get to finish on shutdown
+}
+
+# Session Warm-up Settings
+# When enabled, sessions to every configured server are opened in the background
+# at startup and for each operator on login, and idle warm sessions are pinged
+# so they never expire. Servers whose username contains {user} are warmed at
+# startup for the users listed in USERS.
+SESSION_WARMUP_CONFIG = {
+    'ENABLED': False,
+    'USERS': [],               # Users to warm {user} servers for at startup
+    'SESSIONS_PER_HOST': 1,    # Sessions opened and kept alive per server and user
+    'KEEPALIVE_INTERVAL': 60,  # Seconds between keepalive passes
+    'IDLE_AFTER': 120          # Seconds a warm session may sit idle before being pinged
+}
+
+# Audit Log Settings
+# Start/stop actions and executed commands are queued in memory and written in
+# batches by a background thread to a SQLite database (WAL mode). When the queue
+# is full, OVERFLOW decides whether the oldest queued event or the new one is dropped.
+AUDIT_CONFIG = {
+    'ENABLED': True,
+    'PATH': os.environ.get('DEVOPS_EAP_AUDIT_DB'),  # None: devops_eap_audit.db in the system temp dir
+    'MAX_QUEUE': 10000,     # Events waiting to be written before the overflow policy applies
+    'BATCH_SIZE': 500,      # Maximum events inserted per transaction
+    'FLUSH_INTERVAL': 1.0,  # Seconds the writer waits for more events before writing
+    'OVERFLOW': 'drop_oldest'  # 'drop_oldest' or 'drop_newest'
+}
+
+# Admission Control Settings
+# Every remote call passes a gate per host that limits concurrent calls and the
+# call rate (token bucket). Calls that must wait are queued by priority class:
+# 'interactive' start/stop, then 'status' polling, then 'adhoc' commands. A call
+# is rejected at once when its class's queue is full, or after its MAX_WAIT.
+ADMISSION_CONFIG = {
+    'MAX_CONCURRENT': 8,  # Remote calls running at once per host; keep below WinRM's per-user limit
+    'RATE': 20.0,         # Calls admitted per second per host on average (None for unlimited)
+    'BURST': 40,          # Calls admitted back to back after a quiet period
+    'MAX_QUEUE': {'interactive': 64, 'status': 128, 'adhoc': 32},  # Waiting calls per host and class
+    'MAX_WAIT': {'interactive': 30, 'status': 10, 'adhoc': 15}     # Seconds a call may wait per class
+}
+
+# Session Store Settings
+# Session data is kept on the server and the cookie only carries a session ID.
+# Sessions live in memory; set PATH to also keep them in a SQLite file so logins
+# survive restarts. PATH is required when serving with more than one worker,
+# since worker processes only share sessions through that file.
+SESSION_STORE_CONFIG = {
+    'PATH': os.environ.get('DEVOPS_EAP_SESSION_DB'),  # None: memory only
+    'MAX_SESSIONS': 10000,   # Sessions held in memory
+    'LIFETIME': 12 * 3600,   # Seconds a session lives without requests
+    'SWEEP_INTERVAL': 300,   # Seconds between sweeps of expired sessions
+    'MAX_USERS': 1024        # Cached user objects
+}
+
 def get_network_config():
     """Get the current network configuration."""
     return NETWORK_CONFIG
 
+def get_serving_config():
+    """Get the production serving configuration."""
+    return SERVING_CONFIG
+
+def get_audit_config():
+    """Get the audit log configuration."""
+    return AUDIT_CONFIG
+
+def get_admission_config():
+    """Get the per-host admission control configuration."""
+    return ADMISSION_CONFIG
+
+def get_session_store_config():
+    """Get the server-side session store configuration."""
+    return SESSION_STORE_CONFIG
+
+def get_session_warmup_config():
+    """Get the session warm-up and keepalive configuration."""
+    return SESSION_WARMUP_CONFIG
+
 def update_network_config(key, value):
     """Update a specific network configuration setting."""
     if key in NETWORK_CONFIG:
         NETWORK_CONFIG[key] = value
         return True
     return False
+
+# PowerShell Backend Settings
+# 'pypsrp' talks to real hosts over WinRM; 'fake' simulates them locally
+# (see modules/fake_backend.py) for load testing without Windows servers.
+# The DEVOPS_EAP_BACKEND environment variable overrides the type.
+BACKEND_CONFIG = {
+    'TYPE': os.environ.get('DEVOPS_EAP_BACKEND', 'pypsrp'),
+    'LOCAL_FAST_PATH': True,      # serve localhost servers with psutil instead of WinRM
+    'FAKE_CONNECT_LATENCY': 0.2,  # seconds to open a runspace pool
+    'FAKE_INVOKE_LATENCY': 0.05,  # seconds per pipeline invocation
+    'FAKE_FAILURE_RATE': 0.0,     # probability (0-1) that a connect or invoke fails
+    'FAKE_OUTPUT_LINES': 20,      # lines returned by ad-hoc commands
+    'FAKE_START_DELAY': 0.5,      # seconds before a started process shows as running
+    'FAKE_SEED': None             # seed for reproducible latencies and failures
+}
+
+def get_backend_config():
+    """Get the PowerShell backend configuration."""
+    return BACKEND_CONFIG
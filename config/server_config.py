@@ -1,61 +1,45 @@
 """
 Server configuration module.
-Contains server definitions and their associated process lists.
+Points the application at the server registry file holding server definitions
+and their associated process lists.
 """
+import os
 
 # Server Configuration
-# Add your server configurations here in the following format:
-# 'DISPLAY_NAME': {
-#     'computer_name': 'actual.server.name',
-#     'username': 'domain\\{user}',  # {user} will be replaced with logged in username
-#     'ssl': True/False,
-#     'auth': 'type of authentication',
-#     'processes': {
-#         'process_name': {
-#             'start_command': 'command to start process',
-#             'stop_command': 'command to stop process'
+# Servers are defined in config/servers.json (or the file named by the
+# DEVOPS_EAP_SERVER_CONFIG environment variable). The file is reloaded while
+# the app is running whenever its modification time changes, so servers and
+# processes can be added without a restart. Each entry has this format:
+# "DISPLAY_NAME": {
+#     "computer_name": "actual.server.name",
+#     "username": "domain\\{user}",  # {user} will be replaced with logged in username
+#     "ssl": true/false,
+#     "auth": "type of authentication",
+#     "local_fast_path": false,  # Optional: for localhost entries without a username, set false
+#                                # to use WinRM instead of native process APIs
+#     "pool_min_size": 0,  # Optional: idle sessions kept open to this server
+#     "pool_max_size": 4,  # Optional: maximum concurrent sessions to this server
+#     "max_runspaces": 4,  # Optional: pipelines run at once on each session (1 when WinRM
+#                          # message encryption is used, i.e. HTTP without ssl)
+#     "max_parallel_operations": 2,  # Optional: bulk start/stop actions run at once on this server
+#     "processes": {
+#         "process_name": {
+#             "start_command": "command to start process",
+#             "stop_command": "command to stop process",
+#             "start_timeout": 30,  # Optional: seconds to wait for the process to be running
+#             "stop_timeout": 30,   # Optional: seconds to wait for the process to be gone
+#             "depends_on": ["other_process", "OTHER-SERVER/process"]  # Optional: processes
+#                 # started before this one and stopped after it by /orchestrate_process
 #         }
 #     }
 # }
 
-SERVER_CONFIGS = {
-    'Local PC': {
-        'computer_name': 'localhost',
-        'username': None,
-        'ssl': False,
-        'auth': None,
-        'processes': {
-            "notepad": {
-                "start_command": "Start-Process notepad",
-                "stop_command": "Stop-Process -Name notepad -Force"
-            },
-            "SnippingTool": {
-                "start_command": "Start-Process SnippingTool",
-                "stop_command": "Stop-Process -Name SnippingTool -Force"
-            },
-            "calc": {
-                "start_command": "Start-Process calc",
-                "stop_command": "Stop-Process -Name CalculatorApp -Force"
-            },
-            "mspaint": {
-                "start_command": "Start-Process mspaint",
-                "stop_command": "Stop-Process -Name mspaint -Force"
-            }
-        }
-    },
-    'PROD-1': {
-        'computer_name': 'prod1.example.com',  # Replace with actual server name
-        'username': 'DOMAIN\\{user}',  # Will use logged in username
-        'ssl': True,
-        'auth': 'default',
-        'processes': {}  # Add specific processes with their commands
-    },
-    'DEV-1': {
-        'computer_name': 'dev1.example.com',  # Replace with actual server name
-        'username': 'DOMAIN\\{user}',  # Will use logged in username
-        'ssl': True,
-        'auth': 'default',
-        'processes': {}  # Add specific processes with their commands
-    }
-    # Add more server configurations as needed
+SERVER_CONFIG = {
+    'FILE': os.environ.get('DEVOPS_EAP_SERVER_CONFIG',
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), 'servers.json')),
+    'RELOAD_CHECK_INTERVAL': 1.0  # seconds between checks of the file's modification time
 }
+
+def get_server_config():
+    """Get the server registry file settings."""
+    return SERVER_CONFIG
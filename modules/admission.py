@@ -0,0 +1,282 @@
+"""
+Admission Module
+Limits how hard the app drives each remote host, favouring interactive work.
+
+WinRM on a Windows host only accepts a limited number of concurrent
+operations per user; a burst of clicks, bulk jobs or scripts beyond that
+makes every call to the host fail. Every remote call therefore passes a gate
+per host first. The gate admits at most max_concurrent calls at once and, with
+a token bucket, at most rate calls per second (bursts up to burst). Calls that
+cannot go ahead wait in a queue ordered by priority class: interactive
+start/stop first, then status polling, then ad-hoc commands. Each class has a
+bounded queue and a maximum wait; calls beyond either are rejected at once
+instead of piling up, and queue times and rejections are exported as metrics.
+
+Classes:
+    AdmissionRejectedError: Raised when a call is not admitted to a host
+    HostGate: Concurrency limit, token bucket and priority queue for one host
+    AdmissionController: Host gates keyed by host
+"""
+import heapq
+import itertools
+import time
+from threading import Condition, Lock
+from typing import Dict, List, Optional, Tuple
+from modules.metrics import ADMISSION_QUEUED, ADMISSION_REJECTIONS, ADMISSION_WAIT_SECONDS
+
+INTERACTIVE = 'interactive'
+STATUS = 'status'
+ADHOC = 'adhoc'
+
+# Priority classes, highest first
+PRIORITIES = (INTERACTIVE, STATUS, ADHOC)
+_RANKS = {priority: rank for rank, priority in enumerate(PRIORITIES)}
+
+
+class AdmissionRejectedError(Exception):
+    """
+    Raised when a call to a host is rejected by its gate.
+
+    Attributes:
+        host (str): Host the call was meant for
+        priority (str): Priority class of the call
+        reason (str): 'queue_full' or 'timeout'
+    """
+    def __init__(self, host: str, priority: str, reason: str):
+        detail = 'queue full' if reason == 'queue_full' else 'timed out waiting'
+        super().__init__(f"Host {host} is busy ({priority} {detail}), try again shortly")
+        self.host = host
+        self.priority = priority
+        self.reason = reason
+
+
+class HostGate:
+    """
+    Admission gate for the remote calls to one host.
+
+    A call is admitted right away when nothing is queued, fewer than
+    max_concurrent calls are running and a token is available. Otherwise it
+    queues behind calls of the same or a higher priority class and is admitted
+    once it is at the head of the queue and both limits allow it.
+
+    Attributes:
+        host (str): Host the gate guards
+        max_concurrent (int): Calls allowed to run at once
+        rate (Optional[float]): Calls admitted per second on average; unlimited if None
+        burst (int): Calls that may be admitted back to back when tokens have accumulated
+        max_queue (Dict[str, int]): Calls allowed to wait per priority class
+        max_wait (Dict[str, float]): Seconds a call may wait per priority class
+        in_flight (int): Calls currently admitted and running
+        admitted (int): Calls admitted so far
+        rejected (int): Calls rejected so far
+    """
+    def __init__(self, host: str, max_concurrent: int, rate: Optional[float], burst: int,
+                 max_queue: Dict[str, int], max_wait: Dict[str, float]):
+        self.host = host
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self._tokens = float(burst)
+        self._refilled = time.monotonic()
+        self._waiting: List[Tuple[int, int]] = []  # heap of (rank, sequence)
+        self._queued = {priority: 0 for priority in PRIORITIES}
+        self._sequence = itertools.count()
+        self._condition = Condition(Lock())
+
+    def _token_delay(self, now: float) -> float:
+        """Refill the bucket and get the seconds until a token is available. Lock must be held."""
+        if self.rate is None:
+            return 0.0
+        self._tokens = min(float(self.burst), self._tokens + (now - self._refilled) * self.rate)
+        self._refilled = now
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def _admit(self):
+        """Count a call as admitted. Lock must be held."""
+        self.in_flight += 1
+        self.admitted += 1
+        if self.rate is not None:
+            self._tokens -= 1
+
+    def _reject(self, priority: str, reason: str) -> AdmissionRejectedError:
+        """Count a rejected call and build its error. Lock must be held."""
+        self.rejected += 1
+        ADMISSION_REJECTIONS.inc(priority=priority, host=self.host, reason=reason)
+        return AdmissionRejectedError(self.host, priority, reason)
+
+    def acquire(self, priority: str) -> float:
+        """
+        Wait until a call may go ahead.
+
+        Every successful acquire must be paired with a release.
+
+        Args:
+            priority: 'interactive', 'status' or 'adhoc'
+
+        Returns:
+            float: Seconds the call waited in the queue
+
+        Raises:
+            ValueError: If the priority class is unknown
+            AdmissionRejectedError: If the class's queue is full or the call waited too long
+        """
+        if priority not in _RANKS:
+            raise ValueError(f'Unknown priority {priority}, expected one of {", ".join(PRIORITIES)}')
+        with self._condition:
+            started = time.monotonic()
+            if not self._waiting and self.in_flight < self.max_concurrent and not self._token_delay(started):
+                self._admit()
+                return 0.0
+            if self._queued[priority] >= self.max_queue[priority]:
+                raise self._reject(priority, 'queue_full')
+
+            entry = (_RANKS[priority], next(self._sequence))
+            heapq.heappush(self._waiting, entry)
+            self._queued[priority] += 1
+            ADMISSION_QUEUED.inc(priority=priority, host=self.host)
+            deadline = started + self.max_wait[priority]
+            admitted = False
+            try:
+                while True:
+                    now = time.monotonic()
+                    timeout = deadline - now
+                    if self._waiting[0] == entry and self.in_flight < self.max_concurrent:
+                        delay = self._token_delay(now)
+                        if not delay:
+                            heapq.heappop(self._waiting)
+                            self._admit()
+                            admitted = True
+                            self._condition.notify_all()  # The next in line may fit as well
+                            return now - started
+                        timeout = min(timeout, delay)
+                    if deadline <= now:
+                        raise self._reject(priority, 'timeout')
+                    self._condition.wait(timeout)
+            finally:
+                self._queued[priority] -= 1
+                ADMISSION_QUEUED.dec(priority=priority, host=self.host)
+                if not admitted:
+                    self._waiting.remove(entry)
+                    heapq.heapify(self._waiting)
+                    self._condition.notify_all()  # Someone else may be at the head now
+
+    def release(self):
+        """Mark an admitted call as finished, letting the next queued call in."""
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def to_dict(self) -> dict:
+        """
+        Convert the gate state to dictionary format.
+
+        Returns:
+            dict: Running and queued calls, available tokens and admitted/rejected counts
+        """
+        with self._condition:
+            self._token_delay(time.monotonic())
+            return {
+                'in_flight': self.in_flight,
+                'max_concurrent': self.max_concurrent,
+                'tokens': round(self._tokens, 2) if self.rate is not None else None,
+                'queued': dict(self._queued),
+                'admitted': self.admitted,
+                'rejected': self.rejected
+            }
+
+
+class AdmissionController:
+    """
+    Host gates keyed by host, created on first use.
+
+    Attributes:
+        MAX_CONCURRENT (int): Default calls running at once per host
+        RATE (float): Default calls admitted per second per host
+        BURST (int): Default calls admitted back to back per host
+        MAX_QUEUE (Dict[str, int]): Default calls allowed to wait per host and priority class
+        MAX_WAIT (Dict[str, float]): Default seconds a call may wait per priority class
+    """
+    MAX_CONCURRENT = 8
+    RATE = 20.0  # calls per second
+    BURST = 40
+    MAX_QUEUE = {INTERACTIVE: 64, STATUS: 128, ADHOC: 32}
+    MAX_WAIT = {INTERACTIVE: 30.0, STATUS: 10.0, ADHOC: 15.0}  # seconds
+
+    def __init__(self, max_concurrent: int = MAX_CONCURRENT, rate: Optional[float] = RATE, burst: int = BURST,
+                 max_queue: Optional[Dict[str, int]] = None, max_wait: Optional[Dict[str, float]] = None):
+        """
+        Initialize a new AdmissionController instance.
+
+        Args:
+            max_concurrent: Calls running at once per host
+            rate: Calls admitted per second per host; unlimited if None
+            burst: Calls admitted back to back per host
+            max_queue: Calls allowed to wait per host and priority class; missing classes use MAX_QUEUE
+            max_wait: Seconds a call may wait per priority class; missing classes use MAX_WAIT
+        """
+        self.max_concurrent = max_concurrent
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = {**self.MAX_QUEUE, **(max_queue or {})}
+        self.max_wait = {**self.MAX_WAIT, **(max_wait or {})}
+        self._gates: Dict[str, HostGate] = {}
+        self._lock = Lock()
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'AdmissionController':
+        """
+        Create a controller from the admission configuration.
+
+        Args:
+            config: Admission configuration dictionary
+
+        Returns:
+            AdmissionController: New controller instance
+        """
+        return cls(max_concurrent=config.get('MAX_CONCURRENT', cls.MAX_CONCURRENT),
+                   rate=config.get('RATE', cls.RATE),
+                   burst=config.get('BURST', cls.BURST),
+                   max_queue=config.get('MAX_QUEUE'),
+                   max_wait=config.get('MAX_WAIT'))
+
+    def get(self, host: str) -> HostGate:
+        """
+        Get the gate for a host, creating it if needed.
+
+        Args:
+            host: Computer name of the host
+
+        Returns:
+            HostGate: The host's gate
+        """
+        key = host.lower()
+        gate = self._gates.get(key)
+        if gate is None:
+            with self._lock:
+                gate = self._gates.setdefault(key, HostGate(
+                    host, self.max_concurrent, self.rate, self.burst, self.max_queue, self.max_wait))
+        return gate
+
+    def acquire(self, host: str, priority: str) -> HostGate:
+        """
+        Wait for admission to a host.
+
+        Args:
+            host: Computer name of the host
+            priority: 'interactive', 'status' or 'adhoc'
+
+        Returns:
+            HostGate: The host's gate, to be released when the call is done
+
+        Raises:
+            AdmissionRejectedError: If the call is not admitted
+        """
+        gate = self.get(host)
+        waited = gate.acquire(priority)
+        ADMISSION_WAIT_SECONDS.observe(waited, priority=priority, host=gate.host)
+        return gate
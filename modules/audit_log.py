@@ -0,0 +1,276 @@
+"""
+Audit Log Module
+Append-only record of the remote actions operators carry out.
+
+Routes that start or stop processes or run commands hand an event (user,
+server, action, process or command, duration and outcome) to the AuditLog,
+which only puts it on a bounded in-memory queue. A background writer thread
+drains the queue and inserts the events in batched transactions into a local
+SQLite database in WAL mode, so requests never wait for the disk and readers
+of the log never block the writer. When the queue is full, the configured
+overflow policy either drops the oldest queued event or the new one; dropped
+events are counted in the metrics. The writer thread is started by the first
+event recorded in a process, so pre-forked server workers each get their own.
+
+Classes:
+    AuditLog: Queued, batched SQLite writer and reader of audit events
+"""
+import os
+import queue
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import List, Optional
+from modules.metrics import AUDIT_EVENTS, AUDIT_QUEUE_DEPTH
+
+OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest')
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS audit_events (
+        id INTEGER PRIMARY KEY,
+        ts REAL NOT NULL,
+        user TEXT,
+        action TEXT NOT NULL,
+        server TEXT,
+        host TEXT,
+        target TEXT,
+        duration REAL,
+        success INTEGER NOT NULL,
+        message TEXT
+    );
+    CREATE INDEX IF NOT EXISTS audit_events_ts ON audit_events (ts);
+    CREATE INDEX IF NOT EXISTS audit_events_user_ts ON audit_events (user, ts);
+    CREATE INDEX IF NOT EXISTS audit_events_host_ts ON audit_events (host, ts);
+"""
+_INSERT = ("INSERT INTO audit_events (ts, user, action, server, host, target, duration, success, message) "
+           "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)")
+_COLUMNS = ('id', 'ts', 'user', 'action', 'server', 'host', 'target', 'duration', 'success', 'message')
+
+
+class AuditLog:
+    """
+    Records audit events through a bounded queue and a single background writer.
+
+    Attributes:
+        MAX_QUEUE (int): Default number of events waiting to be written before overflow
+        BATCH_SIZE (int): Default maximum number of events inserted per transaction
+        FLUSH_INTERVAL (float): Default seconds the writer waits for more events
+        DEFAULT_QUERY_LIMIT (int): Events returned by a query when no limit is given
+        MAX_QUERY_LIMIT (int): Largest number of events a query may ask for
+        path (str): SQLite database file
+        overflow (str): 'drop_oldest' or 'drop_newest' when the queue is full
+        written (int): Events written so far
+        dropped (int): Events discarded because the queue was full
+        last_error (Optional[str]): Most recent error of the writer
+    """
+    MAX_QUEUE = 10000
+    BATCH_SIZE = 500
+    FLUSH_INTERVAL = 1.0  # seconds
+    DEFAULT_QUERY_LIMIT = 100
+    MAX_QUERY_LIMIT = 10000
+
+    def __init__(self, path: Optional[str] = None, max_queue: int = MAX_QUEUE, batch_size: int = BATCH_SIZE,
+                 flush_interval: float = FLUSH_INTERVAL, overflow: str = 'drop_oldest'):
+        """
+        Initialize a new AuditLog instance and create its database.
+
+        The writer thread starts with the first recorded event.
+
+        Args:
+            path: SQLite database file (defaults to a file in the system temp dir)
+            max_queue: Number of events waiting to be written before overflow
+            batch_size: Maximum number of events inserted per transaction
+            flush_interval: Seconds the writer waits for more events before writing a partial batch
+            overflow: 'drop_oldest' to make room for new events, 'drop_newest' to discard them
+
+        Raises:
+            ValueError: If the overflow policy is unknown
+        """
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f'Unknown overflow policy {overflow}, expected one of {", ".join(OVERFLOW_POLICIES)}')
+        self.path = path or os.path.join(tempfile.gettempdir(), 'devops_eap_audit.db')
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        self.written = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+        self.max_queue = max_queue
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None  # Process the writer thread runs in
+        self._start_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connect()
+        try:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(_SCHEMA)
+        finally:
+            connection.close()
+
+    def _ensure_writer(self):
+        """Start the writer thread if this process has none, e.g. in a forked worker."""
+        if self._pid == os.getpid():
+            return
+        with self._start_lock:
+            if self._pid == os.getpid() or self._stop_event.is_set():
+                return
+            if self._pid is not None:
+                # Forked from a process with a writer; its queued events are written there
+                self._queue = queue.Queue(maxsize=self.max_queue)
+            self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection to the database."""
+        connection = sqlite3.connect(self.path, timeout=10)
+        # In WAL mode the database stays consistent; only the latest commits can be lost on power failure
+        connection.execute('PRAGMA synchronous=NORMAL')
+        return connection
+
+    def record(self, user: Optional[str], action: str, server: Optional[str] = None, host: Optional[str] = None,
+               target: Optional[str] = None, duration: Optional[float] = None, success: bool = True,
+               message: Optional[str] = None) -> bool:
+        """
+        Queue an event for writing without waiting for the disk, starting the writer if needed.
+
+        Args:
+            user: User that carried out the action
+            action: What was done, e.g. 'start', 'stop' or 'execute'
+            server: Configured server name
+            host: Computer name the action ran against
+            target: Process name or command
+            duration: Seconds the action took
+            success: Whether the action succeeded
+            message: Result or error message
+
+        Returns:
+            bool: True if the event was queued, False if it was dropped
+        """
+        self._ensure_writer()
+        event = (time.time(), user, action, server, host, target, duration, int(bool(success)), message)
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            pass
+        if self.overflow == 'drop_oldest':
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._queue.put_nowait(event)
+                self._count_dropped()
+                return True
+            except queue.Full:
+                pass  # Refilled by other requests in between
+        self._count_dropped()
+        return False
+
+    def _count_dropped(self):
+        """Count an event discarded on overflow."""
+        self.dropped += 1
+        AUDIT_EVENTS.inc(outcome='dropped')
+
+    def _run(self):
+        """Write queued events in batches until stopped and the queue is drained."""
+        connection = self._connect()
+        try:
+            while not (self._stop_event.is_set() and self._queue.empty()):
+                try:
+                    batch = [self._queue.get(timeout=self.flush_interval)]
+                except queue.Empty:
+                    continue
+                while len(batch) < self.batch_size:
+                    try:
+                        batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                self._write(connection, batch)
+                AUDIT_QUEUE_DEPTH.set(self._queue.qsize())
+        finally:
+            connection.close()
+
+    def _write(self, connection: sqlite3.Connection, batch: List[tuple]):
+        """Insert a batch of events in one transaction."""
+        try:
+            with connection:
+                connection.executemany(_INSERT, batch)
+            self.written += len(batch)
+            AUDIT_EVENTS.inc(len(batch), outcome='written')
+        except sqlite3.Error as e:
+            self.last_error = str(e)
+            AUDIT_EVENTS.inc(len(batch), outcome='failed')
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None, user: Optional[str] = None,
+              host: Optional[str] = None, limit: int = DEFAULT_QUERY_LIMIT) -> List[dict]:
+        """
+        Read written events, newest first.
+
+        Events still waiting in the queue are not included.
+
+        Args:
+            start: Earliest timestamp
+            end: Latest timestamp
+            user: Only events of this user
+            host: Only events against this computer name
+            limit: Maximum number of events returned, between 1 and MAX_QUERY_LIMIT
+
+        Returns:
+            List[dict]: Matching events
+
+        Raises:
+            ValueError: If the limit is out of range
+        """
+        if isinstance(limit, bool) or not isinstance(limit, int) or not 0 < limit <= self.MAX_QUERY_LIMIT:
+            raise ValueError(f'limit must be a whole number between 1 and {self.MAX_QUERY_LIMIT}')
+        clauses, params = [], []
+        for clause, value in (('ts >= ?', start), ('ts <= ?', end), ('user = ?', user), ('host = ?', host)):
+            if value is not None:
+                clauses.append(clause)
+                params.append(value)
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM audit_events"
+        if clauses:
+            sql += ' WHERE ' + ' AND '.join(clauses)
+        sql += ' ORDER BY ts DESC LIMIT ?'
+        params.append(limit)
+
+        connection = self._connect()
+        try:
+            rows = connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+        return [dict(zip(_COLUMNS, row), success=bool(row[8])) for row in rows]
+
+    def stats(self) -> dict:
+        """
+        Get writer counters.
+
+        Returns:
+            dict: Queued, written and dropped event counts and the last writer error
+        """
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'last_error': self.last_error
+        }
+
+    def close(self, timeout: Optional[float] = None):
+        """
+        Stop the writer after it has written the queued events.
+
+        Args:
+            timeout: Seconds to wait for the queue to drain; wait indefinitely if not given
+        """
+        with self._start_lock:
+            self._stop_event.set()
+            thread = self._thread if self._pid == os.getpid() else None
+        if thread is not None:
+            thread.join(timeout)
@@ -0,0 +1,272 @@
+"""
+Bulk Jobs Module
+Runs many start/stop actions across servers as a background job.
+
+A bulk job is a list of (server, process, action) items. Submitting a job
+returns its ID immediately; the items are then executed by a shared worker
+pool that caps the number of actions running at once, both globally and per
+server, so a large deploy window cannot overload a single host. Items may
+require other items of the same job to succeed first; they are queued as soon
+as their last prerequisite succeeds and skipped if one fails. Progress and
+per-item timings can be read at any time while the job runs.
+
+Classes:
+    BulkItem: A single start/stop action within a bulk job
+    BulkJob: A submitted list of items and its progress
+    BulkJobScheduler: Executes bulk job items with global and per-host limits
+"""
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Deque, Dict, List, Optional
+from modules.process_manager import ProcessConfig
+
+
+class BulkItem:
+    """
+    A single start/stop action within a bulk job.
+
+    Attributes:
+        server (str): Name of the server the action runs on
+        process_config (ProcessConfig): Process being started or stopped
+        action (str): 'start' or 'stop'
+        server_config (dict): Connection details for the server
+        max_concurrency (Optional[int]): Per-host limit overriding the scheduler default
+        requires (List[BulkItem]): Items of the same job that must succeed before this one runs
+        state (str): 'pending', 'running', 'succeeded', 'failed' or 'skipped'
+        message (Optional[str]): Result message from the ProcessManager
+        started (Optional[float]): Timestamp when the action started
+        finished (Optional[float]): Timestamp when the action finished
+    """
+    def __init__(self, server: str, process_config: ProcessConfig, action: str, server_config: dict,
+                 max_concurrency: Optional[int] = None, requires: Optional[List['BulkItem']] = None):
+        self.server = server
+        self.process_config = process_config
+        self.action = action
+        self.server_config = server_config
+        self.max_concurrency = max_concurrency
+        self.requires: List[BulkItem] = list(requires or [])
+        self.dependents: List[BulkItem] = []
+        self.waiting = 0
+        self.state = 'pending'
+        self.message: Optional[str] = None
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        """
+        Convert the item to dictionary format.
+
+        Returns:
+            dict: Item state, message and timings
+        """
+        return {
+            'server': self.server,
+            'process': self.process_config.name,
+            'action': self.action,
+            'state': self.state,
+            'message': self.message,
+            'started': self.started,
+            'finished': self.finished,
+            'elapsed': (self.finished or time.time()) - self.started if self.started else None
+        }
+
+
+class BulkJob:
+    """
+    A submitted list of bulk items.
+
+    Attributes:
+        job_id (str): Unique job identifier
+        user (str): User that submitted the job
+        items (List[BulkItem]): Actions making up the job
+        created (float): Timestamp when the job was submitted
+        finished (Optional[float]): Timestamp when the last item finished
+    """
+    def __init__(self, user: str, items: List[BulkItem]):
+        self.job_id = uuid.uuid4().hex
+        self.user = user
+        self.items = items
+        self.created = time.time()
+        self.finished: Optional[float] = None
+        self.remaining = len(items)
+
+    def to_dict(self) -> dict:
+        """
+        Convert the job progress to dictionary format.
+
+        Returns:
+            dict: Job state, per-state item counts and per-item details
+        """
+        counts: Dict[str, int] = {}
+        for item in self.items:
+            counts[item.state] = counts.get(item.state, 0) + 1
+        return {
+            'job_id': self.job_id,
+            'user': self.user,
+            'state': 'completed' if self.finished else 'running',
+            'created': self.created,
+            'finished': self.finished,
+            'counts': counts,
+            'items': [item.to_dict() for item in self.items]
+        }
+
+
+class BulkJobScheduler:
+    """
+    Executes bulk job items with a global and a per-host concurrency cap.
+
+    Items wait in a queue per server and are handed to the shared worker pool
+    only while their server is below its limit, so a busy host never occupies
+    workers that other hosts could use.
+
+    Attributes:
+        MAX_WORKERS (int): Default global number of actions running at once
+        MAX_PER_HOST (int): Default number of actions running at once per server
+        MAX_FINISHED_JOBS (int): Number of finished jobs kept for progress queries
+    """
+    MAX_WORKERS = 8
+    MAX_PER_HOST = 2
+    MAX_FINISHED_JOBS = 100
+
+    def __init__(self, process_manager, max_workers: int = MAX_WORKERS, max_per_host: int = MAX_PER_HOST):
+        """
+        Initialize a new BulkJobScheduler instance.
+
+        Args:
+            process_manager: ProcessManager used to start and stop processes
+            max_workers: Global number of actions running at once
+            max_per_host: Default number of actions running at once per server
+        """
+        self.process_manager = process_manager
+        self.max_per_host = max_per_host
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='bulk')
+        self._jobs: 'OrderedDict[str, BulkJob]' = OrderedDict()
+        self._host_queues: Dict[str, Deque] = {}
+        self._host_running: Dict[str, int] = {}
+        self._lock = Lock()
+        self._closed = False
+
+    def submit(self, user: str, items: List[BulkItem]) -> BulkJob:
+        """
+        Submit a bulk job for background execution.
+
+        Args:
+            user: User submitting the job
+            items: Actions to execute
+
+        Returns:
+            BulkJob: The submitted job
+        """
+        job = BulkJob(user, items)
+        for item in items:
+            item.waiting = len(item.requires)
+            for required in item.requires:
+                required.dependents.append(item)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            self._trim_finished_jobs()
+            if not items:
+                job.finished = time.time()
+            ready = [item for item in items if not item.waiting]
+            for item in ready:
+                self._host_queues.setdefault(item.server, deque()).append((job, item))
+            for server in {item.server for item in ready}:
+                self._dispatch(server)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[BulkJob]:
+        """
+        Get a job by ID.
+
+        Args:
+            job_id: Job identifier returned by submit()
+
+        Returns:
+            Optional[BulkJob]: The job, or None if unknown or expired
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _trim_finished_jobs(self):
+        """Forget the oldest finished jobs beyond MAX_FINISHED_JOBS. Lock must be held."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.MAX_FINISHED_JOBS, 0)]:
+            del self._jobs[job_id]
+
+    def _dispatch(self, server: str):
+        """Hand queued items for a server to the worker pool while below its limit. Lock must be held."""
+        queue = self._host_queues.get(server)
+        while queue and not self._closed:
+            _, item = queue[0]
+            limit = item.max_concurrency or self.max_per_host
+            if self._host_running.get(server, 0) >= limit:
+                return
+            job, item = queue.popleft()
+            self._host_running[server] = self._host_running.get(server, 0) + 1
+            self._executor.submit(self._run_item, job, item)
+        self._host_queues.pop(server, None)
+
+    def _run_item(self, job: BulkJob, item: BulkItem):
+        """Execute a single item and dispatch the next one for its server."""
+        item.state = 'running'
+        item.started = time.time()
+        try:
+            if item.action == 'start':
+                success, message = self.process_manager.start_process(item.server_config, item.process_config)
+            else:
+                success, message = self.process_manager.stop_process(item.server_config, item.process_config)
+        except Exception as e:
+            success, message = False, str(e)
+        item.finished = time.time()
+        item.message = message
+        item.state = 'succeeded' if success else 'failed'
+
+        with self._lock:
+            self._host_running[item.server] -= 1
+            servers = {item.server} | self._release_dependents(job, item, success)
+            self._finish_item(job)
+            for server in servers:
+                self._dispatch(server)
+
+    def _release_dependents(self, job: BulkJob, item: BulkItem, success: bool) -> set:
+        """
+        Queue dependents whose last prerequisite succeeded, or skip them if it failed. Lock must be held.
+
+        Returns:
+            set: Servers that received newly queued items
+        """
+        servers = set()
+        for dependent in item.dependents:
+            if dependent.state != 'pending':
+                continue
+            if not success:
+                dependent.state = 'skipped'
+                dependent.message = f'Skipped because {item.process_config.name} on {item.server} did not {item.action}'
+                servers |= self._release_dependents(job, dependent, False)
+                self._finish_item(job)
+                continue
+            dependent.waiting -= 1
+            if dependent.waiting == 0:
+                self._host_queues.setdefault(dependent.server, deque()).append((job, dependent))
+                servers.add(dependent.server)
+        return servers
+
+    def _finish_item(self, job: BulkJob):
+        """Count an item as done, finishing the job after its last item. Lock must be held."""
+        job.remaining -= 1
+        if job.remaining == 0:
+            job.finished = time.time()
+
+    def shutdown(self, wait_for_items: bool = True):
+        """
+        Stop the worker pool.
+
+        Args:
+            wait_for_items: Wait for running items to finish
+        """
+        with self._lock:
+            self._closed = True  # Items still queued per host are not started
+        self._executor.shutdown(wait=wait_for_items)
@@ -0,0 +1,204 @@
+"""
+Circuit Breaker Module
+Fails fast on hosts that keep failing instead of waiting on them every request.
+
+When a server is down, every call to it waits for connection timeouts and
+retry sleeps, and enough of those tie up every worker thread. A circuit
+breaker per host watches the outcome of recent calls. Once the failure rate
+crosses a threshold the circuit opens and calls fail immediately; after a
+cool-down a single probe call is let through, and its outcome either closes
+the circuit again or restarts the cool-down.
+
+Classes:
+    CircuitOpenError: Raised when a call is refused because the circuit is open
+    CircuitBreaker: Closed/open/half-open state machine for one host
+    CircuitBreakerRegistry: Circuit breakers keyed by host
+"""
+import time
+from collections import deque
+from threading import Lock
+from typing import Deque, Dict, Optional
+from modules.metrics import CIRCUIT_STATE
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised when a call to a host is refused because its circuit is open.
+
+    Attributes:
+        host (str): Host whose circuit is open
+        retry_after (float): Seconds until the next probe is allowed
+    """
+    def __init__(self, host: str, retry_after: float):
+        super().__init__(f"Host {host} unavailable (circuit open, retrying in {retry_after:.0f}s)")
+        self.host = host
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker guarding calls to one host.
+
+    Attributes:
+        host (str): Host the breaker guards
+        failure_threshold (float): Failure rate (0-1) over the window that opens the circuit
+        min_calls (int): Calls needed in the window before the rate is evaluated
+        window_size (int): Number of most recent call outcomes considered
+        cool_down (float): Seconds the circuit stays open before a probe is allowed
+        state (str): 'closed', 'open' or 'half_open'
+        opened_at (Optional[float]): Timestamp when the circuit last opened
+    """
+    def __init__(self, host: str, failure_threshold: float, min_calls: int, window_size: int, cool_down: float):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.window_size = window_size
+        self.cool_down = cool_down
+        self.state = CLOSED
+        self.opened_at: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._outcomes: Deque[bool] = deque(maxlen=window_size)  # True for failures
+        self._probe_in_flight = False
+        self._lock = Lock()
+
+    def before_call(self):
+        """
+        Check whether a call may go ahead, reserving the probe when half-open.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or a probe is already running
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return
+            retry_after = self.opened_at + self.cool_down - time.time()
+            if self.state == OPEN and retry_after <= 0:
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            raise CircuitOpenError(self.host, max(retry_after, 0))
+
+    def record_success(self):
+        """Record a successful call, closing the circuit after a successful probe."""
+        with self._lock:
+            self._probe_in_flight = False
+            if self.state != CLOSED:
+                self._outcomes.clear()
+                self.last_error = None
+                self._set_state(CLOSED)
+            self._outcomes.append(False)
+
+    def record_failure(self, error: Optional[str] = None):
+        """
+        Record a failed call, opening the circuit if the failure rate is too high.
+
+        Args:
+            error: Description of the failure
+        """
+        with self._lock:
+            self._probe_in_flight = False
+            self.last_error = error
+            if self.state == HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(True)
+            if len(self._outcomes) >= self.min_calls and self.failure_rate >= self.failure_threshold:
+                self._open()
+
+    def abandon(self):
+        """Release the probe of a call that ended without a success or failure."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    @property
+    def failure_rate(self) -> float:
+        """Fraction of failed calls in the window."""
+        return sum(self._outcomes) / len(self._outcomes) if self._outcomes else 0.0
+
+    def _open(self):
+        """Open the circuit and start the cool-down. Lock must be held."""
+        self.opened_at = time.time()
+        self._outcomes.clear()
+        self._set_state(OPEN)
+
+    def _set_state(self, state: str):
+        """Change state and export it as a metric. Lock must be held."""
+        self.state = state
+        CIRCUIT_STATE.set(_STATE_VALUES[state], host=self.host)
+
+    def to_dict(self) -> dict:
+        """
+        Convert the breaker state to dictionary format.
+
+        Returns:
+            dict: State, failure rate, last error and seconds until the next probe
+        """
+        with self._lock:
+            retry_after = None
+            if self.state == OPEN:
+                retry_after = max(self.opened_at + self.cool_down - time.time(), 0)
+            return {
+                'state': self.state,
+                'failure_rate': round(self.failure_rate, 3),
+                'last_error': self.last_error,
+                'retry_after': retry_after
+            }
+
+
+class CircuitBreakerRegistry:
+    """
+    Circuit breakers keyed by host, created on first use.
+
+    Attributes:
+        FAILURE_THRESHOLD (float): Default failure rate that opens a circuit
+        MIN_CALLS (int): Default number of calls needed before the rate is evaluated
+        WINDOW_SIZE (int): Default number of recent calls considered
+        COOL_DOWN (float): Default seconds a circuit stays open before probing
+    """
+    FAILURE_THRESHOLD = 0.5
+    MIN_CALLS = 4
+    WINDOW_SIZE = 20
+    COOL_DOWN = 30  # seconds
+
+    def __init__(self, failure_threshold: float = FAILURE_THRESHOLD, min_calls: int = MIN_CALLS,
+                 window_size: int = WINDOW_SIZE, cool_down: float = COOL_DOWN):
+        """
+        Initialize a new CircuitBreakerRegistry instance.
+
+        Args:
+            failure_threshold: Failure rate (0-1) that opens a circuit
+            min_calls: Calls needed in the window before the rate is evaluated
+            window_size: Number of recent calls considered
+            cool_down: Seconds a circuit stays open before a probe is allowed
+        """
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.window_size = window_size
+        self.cool_down = cool_down
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = Lock()
+
+    def get(self, host: str) -> CircuitBreaker:
+        """
+        Get the circuit breaker for a host, creating it if needed.
+
+        Args:
+            host: Computer name of the host
+
+        Returns:
+            CircuitBreaker: The host's circuit breaker
+        """
+        key = host.lower()
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(key, CircuitBreaker(
+                    host, self.failure_threshold, self.min_calls, self.window_size, self.cool_down))
+        return breaker
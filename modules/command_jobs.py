@@ -0,0 +1,226 @@
+"""
+Command Jobs Module
+Runs ad-hoc PowerShell commands in the background instead of inside a request.
+
+A long-running script executed synchronously ties up a web worker for its
+whole duration and often outlives proxy timeouts. Commands submitted here run
+on a small dedicated worker pool; the caller gets a job ID back at once and
+can poll for status, fetch the result or cancel the command. Output is written
+into the ResultStore as it arrives, and only a bounded number of finished jobs
+are kept.
+
+Classes:
+    CommandJob: A submitted command and its state
+    CommandJobQueue: Worker pool executing command jobs
+"""
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from threading import Event, Lock
+from typing import List, Optional
+from modules.projection import Projection
+
+
+class CommandJob:
+    """
+    A command submitted for background execution.
+
+    Attributes:
+        job_id (str): Unique job identifier
+        user (str): User that submitted the command
+        command (str): PowerShell command to run
+        server_config (dict): Connection details of the target server
+        projection (Optional[Projection]): Output options applied on the host, producing JSON rows
+        state (str): 'queued', 'running', 'completed', 'failed' or 'cancelled'
+        result_id (Optional[str]): ResultStore ID holding the command's output
+        line_count (int): Number of output lines written so far
+        errors (List[str]): Error records written by the command, up to MAX_ERRORS
+        error (Optional[str]): Failure message if the command could not run
+        created (float): Timestamp when the job was submitted
+        started (Optional[float]): Timestamp when the command started
+        finished (Optional[float]): Timestamp when the command finished
+        cancel_event (Event): Set when cancellation was requested; stops the running pipeline
+    """
+    def __init__(self, user: str, command: str, server_config: dict, projection: Optional[Projection] = None):
+        self.job_id = uuid.uuid4().hex
+        self.user = user
+        self.command = command
+        self.server_config = server_config
+        self.projection = projection
+        self.state = 'queued'
+        self.result_id: Optional[str] = None
+        self.line_count = 0
+        self.errors: List[str] = []
+        self.error: Optional[str] = None
+        self.created = time.time()
+        self.started: Optional[float] = None
+        self.finished: Optional[float] = None
+        self.cancel_event = Event()
+        self.future: Optional[Future] = None
+
+    @property
+    def done(self) -> bool:
+        """True once the job completed, failed or was cancelled."""
+        return self.state in ('completed', 'failed', 'cancelled')
+
+    def to_dict(self) -> dict:
+        """
+        Convert the job status to dictionary format, without its output.
+
+        Returns:
+            dict: Job state and timings
+        """
+        return {
+            'job_id': self.job_id,
+            'user': self.user,
+            'command': self.command,
+            'projection': self.projection.to_dict() if self.projection else None,
+            'state': self.state,
+            'error': self.error,
+            'created': self.created,
+            'started': self.started,
+            'finished': self.finished,
+            'result_id': self.result_id,
+            'output_lines': self.line_count
+        }
+
+
+class CommandJobQueue:
+    """
+    Executes commands on a dedicated worker pool.
+
+    The pool is kept smaller than a host's session pool so background
+    commands can never take every session needed by status checks.
+
+    Attributes:
+        MAX_WORKERS (int): Default number of commands running at once
+        MAX_ERRORS (int): Maximum number of error records kept per job
+        MAX_FINISHED_JOBS (int): Number of finished jobs kept for status/result queries
+        FINISHED_JOB_TTL (int): Seconds a finished job is kept
+    """
+    MAX_WORKERS = 2
+    MAX_ERRORS = 100
+    MAX_FINISHED_JOBS = 50
+    FINISHED_JOB_TTL = 3600  # 1 hour
+
+    def __init__(self, process_manager, result_store, max_workers: int = MAX_WORKERS):
+        """
+        Initialize a new CommandJobQueue instance.
+
+        Args:
+            process_manager: ProcessManager used to run commands
+            result_store: ResultStore receiving the output of every job
+            max_workers: Number of commands running at once
+        """
+        self.process_manager = process_manager
+        self.result_store = result_store
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='command')
+        self._jobs: 'OrderedDict[str, CommandJob]' = OrderedDict()
+        self._lock = Lock()
+
+    def submit(self, user: str, command: str, server_config: dict,
+               projection: Optional[Projection] = None) -> CommandJob:
+        """
+        Queue a command for background execution.
+
+        Args:
+            user: User submitting the command
+            command: PowerShell command to run
+            server_config: Connection details of the target server
+            projection: Optional output options applied on the host
+
+        Returns:
+            CommandJob: The queued job
+        """
+        job = CommandJob(user, command, server_config, projection)
+        with self._lock:
+            self._trim_finished_jobs()
+            self._jobs[job.job_id] = job
+        job.future = self._executor.submit(self._run, job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[CommandJob]:
+        """
+        Get a job by ID.
+
+        Args:
+            job_id: Job identifier returned by submit()
+
+        Returns:
+            Optional[CommandJob]: The job, or None if unknown or expired
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancel a queued or running job.
+
+        Queued jobs are removed from the queue; running jobs have their
+        PowerShell pipeline stopped on the server within one output poll,
+        even if the command prints nothing.
+
+        Args:
+            job_id: Job identifier returned by submit()
+
+        Returns:
+            bool: True if the job was found and had not finished yet
+        """
+        job = self.get_job(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job.state = 'cancelled'
+            job.finished = time.time()
+        return True
+
+    def _trim_finished_jobs(self):
+        """Forget expired finished jobs and the oldest beyond MAX_FINISHED_JOBS. Lock must be held."""
+        now = time.time()
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        excess = max(len(finished) - self.MAX_FINISHED_JOBS, 0)
+        for index, job_id in enumerate(finished):
+            if index < excess or now - self._jobs[job_id].finished > self.FINISHED_JOB_TTL:
+                del self._jobs[job_id]
+
+    def _run(self, job: CommandJob):
+        """Execute a job's command, writing its output into the result store."""
+        if job.cancel_event.is_set():
+            job.state = 'cancelled'
+            job.finished = time.time()
+            return
+        job.state = 'running'
+        job.started = time.time()
+        writer = self.result_store.create(job.user, job.command)
+        job.result_id = writer.result_id
+        script = job.projection.wrap(job.command) if job.projection else job.command
+        records = self.process_manager.stream_script(job.server_config, script, job.cancel_event)
+        try:
+            with writer:
+                for stream, record in records:
+                    if job.cancel_event.is_set():
+                        break
+                    if stream == 'output':
+                        writer.append(str(record))
+                        job.line_count += 1
+                    elif len(job.errors) < self.MAX_ERRORS:
+                        job.errors.append(str(record))
+            job.state = 'cancelled' if job.cancel_event.is_set() else 'completed'
+        except Exception as e:
+            job.error = str(e)
+            job.state = 'cancelled' if job.cancel_event.is_set() else 'failed'
+        finally:
+            # Stops the remote pipeline if iteration ended early
+            records.close()
+            job.finished = time.time()
+
+    def shutdown(self, wait_for_jobs: bool = True):
+        """
+        Stop the worker pool.
+
+        Args:
+            wait_for_jobs: Wait for running commands to finish
+        """
+        self._executor.shutdown(wait=wait_for_jobs, cancel_futures=True)
@@ -0,0 +1,153 @@
+"""
+Dependency Graph Module
+Orders start/stop actions across processes that depend on each other.
+
+Processes can declare the processes they depend on with "depends_on", either
+on the same server ("listener") or on another server ("DB-1/listener"). The
+graph of these dependencies is built and checked for unknown references and
+cycles whenever the server registry is loaded. A plan for a set of target
+processes pulls in everything the action affects (the dependencies of
+processes being started, the dependents of processes being stopped) and
+gives each step the steps that must finish before it may run. Starts follow
+the dependency order and stops run in reverse, so each step waits only for
+its own prerequisites and a plan takes as long as its critical path.
+
+Classes:
+    DependencyPlan: Steps of a start/stop action in dependency order
+    DependencyGraph: Validated dependencies between the processes of all servers
+"""
+from typing import Dict, Iterable, List, Mapping, Tuple
+
+# A process is identified by (server display name, process name)
+Node = Tuple[str, str]
+
+
+class DependencyPlan:
+    """
+    Steps of a start/stop action in dependency order.
+
+    Attributes:
+        action (str): 'start' or 'stop'
+        steps (Tuple[Node, ...]): Processes to act on, every step after its prerequisites
+        prerequisites (Dict[Node, Tuple[Node, ...]]): Steps that must succeed before each step runs
+        levels (List[List[Node]]): Steps grouped by the length of their longest prerequisite chain
+    """
+    def __init__(self, action: str, steps: List[Node], prerequisites: Dict[Node, Tuple[Node, ...]]):
+        self.action = action
+        self.steps = tuple(steps)
+        self.prerequisites = prerequisites
+        depth: Dict[Node, int] = {}
+        for node in self.steps:
+            depth[node] = max((depth[before] + 1 for before in prerequisites[node]), default=0)
+        self.levels: List[List[Node]] = [[] for _ in range(max(depth.values(), default=-1) + 1)]
+        for node in self.steps:
+            self.levels[depth[node]].append(node)
+
+    def to_dict(self) -> dict:
+        """
+        Convert the plan to dictionary format.
+
+        Returns:
+            dict: Action and the steps of each level as {'server', 'process'} entries
+        """
+        return {
+            'action': self.action,
+            'levels': [[{'server': server, 'process': process} for server, process in level]
+                       for level in self.levels]
+        }
+
+
+class DependencyGraph:
+    """
+    Validated dependencies between the processes of all servers.
+
+    Attributes:
+        requires (Mapping[Node, Tuple[Node, ...]]): Processes each process depends on
+        required_by (Mapping[Node, Tuple[Node, ...]]): Processes depending on each process
+        order (Tuple[Node, ...]): Every process, each one after its dependencies
+    """
+    def __init__(self, servers: Mapping[str, object]):
+        """
+        Build the graph from the servers of a registry snapshot.
+
+        Args:
+            servers: ServerConfig objects keyed by display name
+
+        Raises:
+            ValueError: If a dependency names an unknown process or the dependencies form a cycle
+        """
+        requires: Dict[Node, Tuple[Node, ...]] = {}
+        for server_name, server in servers.items():
+            for process_name, process in server.processes.items():
+                nodes = []
+                for reference in process.depends_on:
+                    node = self._resolve(server_name, reference)
+                    if node[0] not in servers or node[1] not in servers[node[0]].processes:
+                        raise ValueError(f'{server_name}/{process_name} depends on unknown process {reference}')
+                    nodes.append(node)
+                requires[(server_name, process_name)] = tuple(nodes)
+
+        required_by: Dict[Node, List[Node]] = {node: [] for node in requires}
+        for node, dependencies in requires.items():
+            for dependency in dependencies:
+                required_by[dependency].append(node)
+
+        self.requires: Mapping[Node, Tuple[Node, ...]] = requires
+        self.required_by: Mapping[Node, Tuple[Node, ...]] = {
+            node: tuple(dependents) for node, dependents in required_by.items()}
+        self.order: Tuple[Node, ...] = self._topological_order()
+
+    @staticmethod
+    def _resolve(server_name: str, reference: str) -> Node:
+        """Turn 'process' or 'server/process' into a node."""
+        if '/' in reference:
+            other_server, process_name = reference.rsplit('/', 1)
+            return other_server, process_name
+        return server_name, reference
+
+    def _topological_order(self) -> Tuple[Node, ...]:
+        """Order every process after its dependencies, rejecting cycles."""
+        waiting = {node: len(dependencies) for node, dependencies in self.requires.items()}
+        ready = [node for node, count in waiting.items() if count == 0]
+        order: List[Node] = []
+        while ready:
+            node = ready.pop()
+            order.append(node)
+            for dependent in self.required_by[node]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    ready.append(dependent)
+        if len(order) != len(self.requires):
+            cycle = sorted(f'{server}/{process}' for server, process in self.requires if waiting[(server, process)])
+            raise ValueError(f'Process dependencies form a cycle involving {", ".join(cycle)}')
+        return tuple(order)
+
+    def plan(self, action: str, targets: Iterable[Node]) -> DependencyPlan:
+        """
+        Plan starting or stopping a set of processes.
+
+        Starting a process also starts what it depends on first; stopping a
+        process also stops what depends on it first.
+
+        Args:
+            action: 'start' or 'stop'
+            targets: Processes to act on
+
+        Returns:
+            DependencyPlan: Steps and their prerequisites
+
+        Raises:
+            KeyError: If a target is not a configured process
+        """
+        edges = self.requires if action == 'start' else self.required_by
+        included = set()
+        pending = list(targets)
+        while pending:
+            node = pending.pop()
+            if node not in included:
+                included.add(node)
+                pending.extend(edges[node])
+
+        order = self.order if action == 'start' else reversed(self.order)
+        steps = [node for node in order if node in included]
+        return DependencyPlan(action, steps, {node: edges[node] for node in steps})
@@ -0,0 +1,367 @@
+"""
+Fake Backend Module
+Local stand-in for pypsrp's WSMan/RunspacePool/PowerShell used for load testing.
+
+Performance work needs a repeatable baseline that does not depend on real
+Windows hosts. The FakeBackend plugs into the SessionPool (as its session
+factory) and the ProcessManager (as its PowerShell factory) and answers the
+scripts the application sends with simulated latency: status queries report
+from an in-memory process table, Start-Process/Stop-Process update that table,
+and any other script returns a configurable amount of output. Each simulated
+runspace pool runs at most max_runspaces pipelines at once. Connect latency,
+invoke latency, failure rate and output size are all configurable.
+
+Classes:
+    FakeRunspacePool: Simulated opened runspace pool for one server
+    FakePowerShell: Simulated PowerShell pipeline
+    FakeBackend: Factory and shared state for simulated servers
+"""
+import json
+import random
+import re
+import time
+from threading import Lock, Semaphore
+from typing import Dict, List, Optional
+from pypsrp.complex_objects import PSInvocationState, RunspacePoolState
+from pypsrp.exceptions import WinRMTransportError
+from modules.admission import AdmissionController
+from modules.process_manager import ProcessManager
+from modules.session_pool import DEFAULT_MAX_RUNSPACES, SessionPool
+
+_SINGLE_STATUS = re.compile(r'Get-Process\s+([^\s$]+)\s+-ErrorAction')
+_BATCH_NAMES = re.compile(r'\$names\s*=\s*@\((.*)\)')
+_QUOTED = re.compile(r"'((?:[^']|'')*)'")
+_PROCESS_TABLE = re.compile(r'foreach\s*\(\$process in Get-Process\)')
+_PROJECTED = re.compile(r'ConvertTo-Json -InputObject \$_ -Compress')
+_PROJECTED_FIRST = re.compile(r'Select-Object -First (\d+)')
+_PROJECTED_PROPERTIES = re.compile(r'-Property ((?:\w+, )*\w+) \|')
+_BACKGROUND_NAMES = ('svchost', 'chrome', 'java', 'w3wp', 'sqlservr', 'lsass', 'explorer', 'dotnet', 'node',
+                     'MsMpEng', 'conhost', 'RuntimeBroker')
+_START = re.compile(r'Start-Process\s+[\'"]?([\w.\-]+)', re.IGNORECASE)
+_STOP = re.compile(r'Stop-Process\s+.*?-Name\s+[\'"]?([\w.\-]+)', re.IGNORECASE)
+
+
+class FakeRunspacePool:
+    """
+    Simulated opened runspace pool.
+
+    Attributes:
+        backend (FakeBackend): Backend the pool belongs to
+        host (str): Computer name the pool is "connected" to
+        state (RunspacePoolState): OPENED until closed
+        max_runspaces (int): Pipelines the pool runs at once; further invocations wait
+    """
+    def __init__(self, backend: 'FakeBackend', server_config: dict):
+        self.backend = backend
+        self.host = server_config['computer_name']
+        self.state = RunspacePoolState.OPENED
+        self.max_runspaces = server_config.get('max_runspaces', DEFAULT_MAX_RUNSPACES)
+        self.runspaces = Semaphore(self.max_runspaces)
+
+    def close(self):
+        """Close the runspace pool."""
+        self.state = RunspacePoolState.CLOSED
+
+
+class _Streams:
+    """Non-output streams of a FakePowerShell pipeline."""
+    def __init__(self):
+        self.error: list = []
+
+
+class FakePowerShell:
+    """
+    Simulated PowerShell pipeline supporting the synchronous and the
+    begin_invoke/poll_invoke interfaces used by the ProcessManager.
+
+    Attributes:
+        runspace_pool (FakeRunspacePool): Pool the pipeline runs on
+        state (PSInvocationState): Invocation state of the pipeline
+        output (list): Objects written to the output stream
+        streams: Holder of the error stream
+        had_errors (bool): True if the pipeline wrote error records
+    """
+    def __init__(self, runspace_pool: FakeRunspacePool):
+        self.runspace_pool = runspace_pool
+        self.state = PSInvocationState.NOT_STARTED
+        self.output: list = []
+        self.streams = _Streams()
+        self.had_errors = False
+        self._scripts: List[str] = []
+        self._pending: List[str] = []
+
+    def add_script(self, script: str) -> 'FakePowerShell':
+        """Add a script to the pipeline."""
+        self._scripts.append(script)
+        return self
+
+    def invoke(self) -> list:
+        """Run the pipeline and return its output."""
+        self.begin_invoke()
+        while self.state == PSInvocationState.RUNNING:
+            self.poll_invoke()
+        return self.output
+
+    def begin_invoke(self):
+        """Start the pipeline without waiting for its output."""
+        backend = self.runspace_pool.backend
+        self.state = PSInvocationState.RUNNING
+        try:
+            with self.runspace_pool.runspaces:
+                backend.simulate_call(backend.invoke_latency)
+        except Exception:
+            self.state = PSInvocationState.FAILED
+            raise
+        self._pending = backend.execute(self.runspace_pool.host, '\n'.join(self._scripts))
+
+    def poll_invoke(self, timeout: Optional[int] = None):
+        """Receive the next chunk of output, completing the pipeline after the last one."""
+        backend = self.runspace_pool.backend
+        if self._pending:
+            backend.simulate_call(backend.receive_latency, fail=False)
+            chunk = self._pending[:backend.receive_chunk_lines]
+            del self._pending[:backend.receive_chunk_lines]
+            self.output.extend(chunk)
+        if not self._pending:
+            self.state = PSInvocationState.COMPLETED
+
+    def stop(self):
+        """Stop a running pipeline, discarding output not yet received."""
+        self._pending = []
+        self.state = PSInvocationState.STOPPED
+
+
+class FakeBackend:
+    """
+    Factory and shared state for simulated servers.
+
+    Every host has its own process table, so starting a process through one
+    session is visible to status queries on any other session to that host.
+
+    Attributes:
+        connect_latency (float): Seconds taken to open a runspace pool
+        invoke_latency (float): Seconds taken by every pipeline invocation
+        receive_latency (float): Seconds taken by every receive of streamed output
+        failure_rate (float): Probability (0-1) that a connect or invoke fails
+        output_lines (int): Lines returned by scripts that are not status queries or start/stop commands
+        line_size (int): Characters per output line
+        start_delay (float): Seconds before a started process shows up as running
+        jitter (float): Relative random variation applied to every latency
+        receive_chunk_lines (int): Output lines delivered per receive
+        background_processes (int): Unmanaged processes every host reports in its process table
+    """
+    DEFAULT_CONNECT_LATENCY = 0.2  # seconds
+    DEFAULT_INVOKE_LATENCY = 0.05  # seconds
+    DEFAULT_RECEIVE_LATENCY = 0.01  # seconds
+    DEFAULT_OUTPUT_LINES = 20
+    DEFAULT_LINE_SIZE = 80
+    DEFAULT_START_DELAY = 0.5  # seconds
+    DEFAULT_JITTER = 0.2
+    RECEIVE_CHUNK_LINES = 500
+    DEFAULT_BACKGROUND_PROCESSES = 150
+
+    def __init__(self, connect_latency: float = DEFAULT_CONNECT_LATENCY,
+                 invoke_latency: float = DEFAULT_INVOKE_LATENCY,
+                 receive_latency: float = DEFAULT_RECEIVE_LATENCY,
+                 failure_rate: float = 0.0,
+                 output_lines: int = DEFAULT_OUTPUT_LINES,
+                 line_size: int = DEFAULT_LINE_SIZE,
+                 start_delay: float = DEFAULT_START_DELAY,
+                 jitter: float = DEFAULT_JITTER,
+                 receive_chunk_lines: int = RECEIVE_CHUNK_LINES,
+                 background_processes: int = DEFAULT_BACKGROUND_PROCESSES,
+                 seed: Optional[int] = None):
+        """
+        Initialize a new FakeBackend instance.
+
+        Args:
+            connect_latency: Seconds taken to open a runspace pool
+            invoke_latency: Seconds taken by every pipeline invocation
+            receive_latency: Seconds taken by every receive of streamed output
+            failure_rate: Probability (0-1) that a connect or invoke fails
+            output_lines: Lines returned by generic scripts
+            line_size: Characters per output line
+            start_delay: Seconds before a started process shows up as running
+            jitter: Relative random variation applied to every latency
+            receive_chunk_lines: Output lines delivered per receive
+            background_processes: Unmanaged processes every host reports in its process table
+            seed: Optional seed making latencies and failures reproducible
+        """
+        self.connect_latency = connect_latency
+        self.invoke_latency = invoke_latency
+        self.receive_latency = receive_latency
+        self.failure_rate = failure_rate
+        self.output_lines = output_lines
+        self.line_size = line_size
+        self.start_delay = start_delay
+        self.jitter = jitter
+        self.receive_chunk_lines = receive_chunk_lines
+        self.background_processes = background_processes
+        self._created = time.time()
+        self._random = random.Random(seed)
+        self._processes: Dict[str, Dict[str, dict]] = {}
+        self._next_pid = 1000
+        self._lock = Lock()
+
+    @classmethod
+    def from_config(cls, config: dict) -> 'FakeBackend':
+        """
+        Create a backend from the FAKE_* settings of the backend configuration.
+
+        Args:
+            config: Backend configuration dictionary
+
+        Returns:
+            FakeBackend: New backend instance
+        """
+        return cls(connect_latency=config.get('FAKE_CONNECT_LATENCY', cls.DEFAULT_CONNECT_LATENCY),
+                   invoke_latency=config.get('FAKE_INVOKE_LATENCY', cls.DEFAULT_INVOKE_LATENCY),
+                   failure_rate=config.get('FAKE_FAILURE_RATE', 0.0),
+                   output_lines=config.get('FAKE_OUTPUT_LINES', cls.DEFAULT_OUTPUT_LINES),
+                   start_delay=config.get('FAKE_START_DELAY', cls.DEFAULT_START_DELAY),
+                   seed=config.get('FAKE_SEED'))
+
+    def create_process_manager(self, admission: Optional[AdmissionController] = None,
+                               **pool_options) -> ProcessManager:
+        """
+        Create a ProcessManager whose sessions and pipelines are simulated.
+
+        Args:
+            admission: Optional admission controller limiting calls per simulated host
+            **pool_options: Extra keyword arguments for the SessionPool
+
+        Returns:
+            ProcessManager: ProcessManager backed by this FakeBackend
+        """
+        pool = SessionPool(session_factory=self.open_runspace_pool, **pool_options)
+        return ProcessManager(pool=pool, powershell_factory=FakePowerShell, admission=admission)
+
+    def open_runspace_pool(self, server_config: dict) -> FakeRunspacePool:
+        """
+        Open a simulated runspace pool; usable as a SessionPool session factory.
+
+        Args:
+            server_config: Dictionary containing server connection details
+
+        Returns:
+            FakeRunspacePool: Opened runspace pool
+        """
+        self.simulate_call(self.connect_latency)
+        return FakeRunspacePool(self, server_config)
+
+    def simulate_call(self, latency: float, fail: bool = True):
+        """
+        Sleep for a jittered latency and randomly fail at the configured rate.
+
+        Args:
+            latency: Nominal seconds the call takes
+            fail: Whether the call may fail
+
+        Raises:
+            WinRMTransportError: When the call is chosen to fail
+        """
+        with self._lock:
+            delay = latency * self._random.uniform(1 - self.jitter, 1 + self.jitter)
+            failed = fail and self._random.random() < self.failure_rate
+        if delay > 0:
+            time.sleep(delay)
+        if failed:
+            raise WinRMTransportError('http', 500, 'Simulated failure')
+
+    def execute(self, host: str, script: str) -> list:
+        """
+        Work out the output of a script against a host's process table.
+
+        Args:
+            host: Computer name the script runs on
+            script: PowerShell script
+
+        Returns:
+            list: Objects the script writes to the output stream
+        """
+        if _PROCESS_TABLE.search(script):
+            return [json.dumps(self._process_table(host))]
+        batch = _BATCH_NAMES.search(script)
+        if batch:
+            names = [name.replace("''", "'") for name in _QUOTED.findall(batch.group(1))]
+            return [json.dumps({name: self._status(host, name) for name in names})]
+        single = _SINGLE_STATUS.search(script)
+        if single and 'ConvertTo-Json' in script:
+            return [json.dumps(self._status(host, single.group(1)))]
+        started = _START.search(script)
+        if started:
+            self._start(host, started.group(1))
+            return []
+        stopped = _STOP.search(script)
+        if stopped:
+            self._stop(host, stopped.group(1))
+            return []
+        if _PROJECTED.search(script):
+            return self._projected_rows(script)
+        return [f'{index:08d} ' + 'x' * max(self.line_size - 9, 0) for index in range(self.output_lines)]
+
+    def _projected_rows(self, script: str) -> List[str]:
+        """Build the JSON rows of a command wrapped in a projection, honouring its row limit and properties."""
+        first = _PROJECTED_FIRST.search(script)
+        count = min(self.output_lines, int(first.group(1))) if first else self.output_lines
+        properties = _PROJECTED_PROPERTIES.search(script)
+        rows = []
+        for index in range(count):
+            row = {'Index': index, 'Name': f'item{index:08d}', 'Data': 'x' * max(self.line_size - 9, 0)}
+            if properties:
+                row = {name: row.get(name) for name in properties.group(1).split(', ')}
+            rows.append(json.dumps(row, separators=(',', ':')))
+        return rows
+
+    def _process_table(self, host: str) -> dict:
+        """Build the process table columns of a host: its background processes plus started ones."""
+        columns = {'name': [], 'pid': [], 'cpu': [], 'memory': [], 'start': []}
+        # Background processes are the same on every call for a host; their CPU time grows steadily
+        generator = random.Random(host)
+        uptime = time.time() - self._created
+        for index in range(self.background_processes):
+            columns['name'].append(generator.choice(_BACKGROUND_NAMES))
+            columns['pid'].append(4 + index * 4)
+            columns['cpu'].append(round(generator.expovariate(20) * uptime, 3))
+            columns['memory'].append(generator.randint(2, 800) * 1024 * 1024)
+            columns['start'].append(self._created)
+        with self._lock:
+            processes = list(self._processes.get(host, {}).items())
+        for name, process in processes:
+            if process['running_from'] <= time.time():
+                columns['name'].append(name)
+                columns['pid'].append(process['pid'])
+                columns['cpu'].append(round(time.time() - process['running_from'], 2))
+                columns['memory'].append(50 * 1024 * 1024)
+                columns['start'].append(process['running_from'])
+        return columns
+
+    def _status(self, host: str, name: str) -> dict:
+        """Get the status of a process in a host's process table."""
+        with self._lock:
+            process = self._processes.get(host, {}).get(name.lower())
+        if process is None or process['running_from'] > time.time():
+            return {'running': False}
+        return {
+            'running': True,
+            'pid': process['pid'],
+            'cpu': round(time.time() - process['running_from'], 2),
+            'memory': 50 * 1024 * 1024,
+            'start_time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(process['running_from']))
+        }
+
+    def _start(self, host: str, name: str):
+        """Add a process to a host's process table, running after start_delay."""
+        name = name.lower()
+        if name.endswith('.exe'):
+            name = name[:-4]
+        with self._lock:
+            table = self._processes.setdefault(host, {})
+            if name not in table:
+                self._next_pid += 4
+                table[name] = {'pid': self._next_pid, 'running_from': time.time() + self.start_delay}
+
+    def _stop(self, host: str, name: str):
+        """Remove a process from a host's process table."""
+        with self._lock:
+            self._processes.get(host, {}).pop(name.lower(), None)
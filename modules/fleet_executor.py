@@ -0,0 +1,194 @@
+"""
+Fleet Executor Module
+Runs status checks across many servers in parallel.
+
+Looping over the configured servers one at a time makes every fleet-wide view
+take the sum of all host latencies. The FleetExecutor fans the work out over a
+bounded thread pool instead, waits at most a per-call deadline and returns
+partial results, so total wall time is roughly that of the slowest host that
+answered in time. A status check still running for a host, e.g. one that
+missed an earlier deadline, is shared by later fleet calls instead of taking
+another worker, so a slow host holds at most one worker at a time.
+
+Classes:
+    FleetExecutor: Bounded thread pool fanning operations out across servers
+"""
+import math
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from threading import RLock
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from modules.session_pool import make_session_key
+
+
+class FleetExecutor:
+    """
+    Executes operations against many servers concurrently.
+
+    Every result is reported per server as a dictionary with ``success``,
+    ``result`` and ``elapsed`` keys. Servers that miss the deadline are
+    reported with ``timed_out`` set; calls submitted by that fleet call which
+    have not started yet are cancelled unless another fleet call shares them,
+    calls already running finish in the background.
+
+    Attributes:
+        MAX_WORKERS (int): Default size of the worker thread pool
+        DEFAULT_TIMEOUT (float): Default deadline in seconds for a fleet-wide call
+        MAX_TIMEOUT (float): Longest deadline in seconds a caller may ask for
+    """
+    MAX_WORKERS = 8
+    DEFAULT_TIMEOUT = 15  # seconds
+    MAX_TIMEOUT = 120  # seconds
+
+    def __init__(self, process_manager, max_workers: int = MAX_WORKERS, timeout: float = DEFAULT_TIMEOUT):
+        """
+        Initialize a new FleetExecutor instance.
+
+        Args:
+            process_manager: ProcessManager used to talk to the servers
+            max_workers: Maximum number of servers contacted at once
+            timeout: Default deadline in seconds for a fleet-wide call
+        """
+        self.process_manager = process_manager
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='fleet')
+        # Status checks by (session key, process names); entries are removed once finished
+        self._status_calls: Dict[Tuple[str, Tuple[str, ...]], Future] = {}
+        # Status checks also waited on by a fleet call that did not submit them
+        self._shared_calls: Set[Future] = set()
+        # Reentrant, as cancelling a future runs its done-callback in the cancelling thread
+        self._lock = RLock()
+
+    @classmethod
+    def check_timeout(cls, timeout: Any) -> Optional[float]:
+        """
+        Validate a deadline given by a caller.
+
+        Args:
+            timeout: Deadline in seconds as a number or numeric string, or None
+
+        Returns:
+            Optional[float]: The deadline, or None to use the default
+
+        Raises:
+            ValueError: If the deadline is not a number greater than 0 and at most MAX_TIMEOUT
+        """
+        if timeout is None:
+            return None
+        try:
+            value = float(timeout)
+        except (TypeError, ValueError):
+            value = math.nan
+        if not 0 < value <= cls.MAX_TIMEOUT:
+            raise ValueError(f'timeout must be a number of seconds greater than 0 and at most {cls.MAX_TIMEOUT}')
+        return value
+
+    @staticmethod
+    def _timed(operation: Callable[[], Tuple[bool, Any]]) -> Tuple[bool, Any, float]:
+        """Run an operation and add its duration to the result."""
+        started = time.time()
+        success, result = operation()
+        return success, result, time.time() - started
+
+    def run(self, operations: Dict[str, Callable[[], Tuple[bool, Any]]],
+            timeout: Optional[float] = None) -> Dict[str, dict]:
+        """
+        Run one operation per server concurrently and collect the results.
+
+        Args:
+            operations: Callables returning a (success, result) tuple, keyed by server name
+            timeout: Deadline in seconds for the whole call (defaults to the executor timeout)
+
+        Returns:
+            Dict[str, dict]: Per-server result dictionaries keyed by server name
+        """
+        futures = {server_name: self._executor.submit(self._timed, operation)
+                   for server_name, operation in operations.items()}
+        return self._collect(futures, set(futures.values()), timeout)
+
+    def _collect(self, futures: Dict[str, Future], submitted: Set[Future],
+                 timeout: Optional[float]) -> Dict[str, dict]:
+        """
+        Wait for the calls until the deadline and build the per-server results.
+
+        Only futures in ``submitted`` are cancelled when they miss the deadline,
+        and only while no other fleet call waits on them.
+        """
+        timeout = self.timeout if timeout is None else timeout
+        started = time.time()
+        wait(futures.values(), timeout=timeout)
+
+        results = {}
+        for server_name, future in futures.items():
+            if not future.done() or future.cancelled():
+                if future in submitted:
+                    with self._lock:
+                        if future not in self._shared_calls:
+                            future.cancel()
+                results[server_name] = {
+                    'success': False,
+                    'timed_out': True,
+                    'result': f'Timed out after {timeout}s',
+                    'elapsed': time.time() - started
+                }
+                continue
+            try:
+                success, result, elapsed = future.result()
+                results[server_name] = {'success': success, 'result': result, 'elapsed': elapsed}
+            except Exception as e:
+                results[server_name] = {'success': False, 'result': str(e), 'elapsed': time.time() - started}
+        return results
+
+    def get_fleet_status(self, targets: Dict[str, Tuple[dict, List[str], Optional[str]]],
+                         timeout: Optional[float] = None) -> Dict[str, dict]:
+        """
+        Get the batched process status of every server concurrently.
+
+        A server whose previous status check is still running is given that
+        check's result instead of a new one.
+
+        Args:
+            targets: (server_config, process_names, batch status script) tuples
+                     keyed by server name; the script is rendered if None
+            timeout: Deadline in seconds for the whole call
+
+        Returns:
+            Dict[str, dict]: Per-server results; ``result`` holds the process
+                             statuses keyed by process name
+        """
+        def status_operation(server_config, process_names, script):
+            return lambda: self.process_manager.get_server_status(server_config, process_names, script)
+
+        futures = {}
+        submitted = {}
+        with self._lock:
+            for server_name, (server_config, process_names, script) in targets.items():
+                key = (make_session_key(server_config), tuple(process_names))
+                future = self._status_calls.get(key)
+                if future is None or future.done():
+                    future = self._executor.submit(self._timed,
+                                                   status_operation(server_config, process_names, script))
+                    self._status_calls[key] = future
+                    submitted[future] = key
+                elif future not in submitted:
+                    self._shared_calls.add(future)
+                futures[server_name] = future
+        for future, key in submitted.items():
+            future.add_done_callback(lambda done, key=key: self._forget_status_call(key, done))
+        return self._collect(futures, set(submitted), timeout)
+
+    def _forget_status_call(self, key: Tuple[str, Tuple[str, ...]], future: Future):
+        """Remove a finished status check unless a newer one replaced it."""
+        with self._lock:
+            if self._status_calls.get(key) is future:
+                del self._status_calls[key]
+            self._shared_calls.discard(future)
+
+    def shutdown(self, wait_for_calls: bool = False):
+        """
+        Stop the worker thread pool.
+
+        Args:
+            wait_for_calls: Wait for calls that are still running to finish
+        """
+        self._executor.shutdown(wait=wait_for_calls, cancel_futures=True)
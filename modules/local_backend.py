@@ -0,0 +1,299 @@
+"""
+Local Backend Module
+Native process operations for servers that point at the machine running the app.
+
+Status checks for the "Local PC" entry used to open a WinRM session to
+localhost and run Get-Process through PowerShell. The LocalProcessBackend
+answers them with psutil instead and returns the same result shape (running,
+pid, cpu, memory, start_time). The pid found for each process name is
+remembered, so repeated checks of a running process read one process instead
+of scanning the process table, and a scan of the table is reused for a
+moment so that checks of stopped processes do not rescan it every time. Default start/stop commands (Start-Process
+and Stop-Process -Name) are carried out with native process APIs; custom
+commands run through a local PowerShell without WinRM.
+
+Classes:
+    LocalProcessBackend: psutil-based process status, start and stop on this machine
+"""
+import random
+import re
+import shutil
+import socket
+import subprocess
+import time
+from datetime import datetime
+from typing import TYPE_CHECKING, Dict, Iterable, Optional, Tuple
+import psutil
+
+if TYPE_CHECKING:
+    from modules.process_manager import ProcessConfig
+
+LOCAL_HOSTS = frozenset({'localhost', '127.0.0.1', '::1', '.'})
+
+# Only a bare Start-Process <path>; parameters or further statements go to local PowerShell
+_START_PATTERN = re.compile(r"Start-Process\s+(?:-FilePath\s+)?(?:(['\"])(?P<quoted>[^'\"]+)\1|(?P<path>[^\s'\";]+))",
+                            re.IGNORECASE)
+_STOP_PATTERN = re.compile(r"Stop-Process\s+-Name\s+(['\"]?)(?P<name>[^'\"\s]+)\1(?P<force>\s+-Force)?",
+                           re.IGNORECASE)
+
+
+def is_local_target(server_config: dict) -> bool:
+    """
+    Check whether a server configuration points at this machine with the app's own account.
+
+    Entries with a username connect as another account, so they keep going
+    through WinRM.
+
+    Args:
+        server_config: Dictionary containing server connection details
+
+    Returns:
+        bool: True if the server is handled by the local backend
+    """
+    if server_config.get('username') or server_config.get('local_fast_path') is False:
+        return False
+    computer_name = (server_config.get('computer_name') or '').lower()
+    return computer_name in LOCAL_HOSTS or computer_name == socket.gethostname().lower()
+
+
+def _normalize(name: str) -> str:
+    """Turn an executable name into the process name Get-Process reports."""
+    name = name.lower()
+    return name[:-4] if name.endswith('.exe') else name
+
+
+class LocalProcessBackend:
+    """
+    Process status, start and stop on the local machine through psutil.
+
+    Attributes:
+        SCAN_MAX_AGE (float): Seconds a scan of the process table answers checks of stopped processes
+        INITIAL_POLL_INTERVAL (float): First delay in seconds when waiting for a process state
+        MAX_POLL_INTERVAL (float): Longest delay in seconds between state checks
+        COMMAND_TIMEOUT (float): Seconds a custom command may run in local PowerShell
+    """
+    SCAN_MAX_AGE = 1.0  # seconds
+    INITIAL_POLL_INTERVAL = 0.02  # seconds
+    MAX_POLL_INTERVAL = 0.5  # seconds
+    COMMAND_TIMEOUT = 60  # seconds
+
+    def __init__(self, scan_max_age: float = SCAN_MAX_AGE):
+        """
+        Initialize a new LocalProcessBackend instance.
+
+        Args:
+            scan_max_age: Seconds a scan of the process table answers checks of stopped processes
+        """
+        self.scan_max_age = scan_max_age
+        self._pids: Dict[str, int] = {}
+        self._scanned = 0.0
+
+    def _cached(self, key: str) -> Optional[psutil.Process]:
+        """Get the remembered process for a normalized name if it is still running under that name."""
+        pid = self._pids.get(key)
+        if pid is None:
+            return None
+        try:
+            process = psutil.Process(pid)
+            if _normalize(process.name()) == key:
+                return process
+        except psutil.Error:
+            pass
+        self._pids.pop(key, None)
+        return None
+
+    def _find(self, process_names: Iterable[str], fresh: bool = False) -> Dict[str, Optional[psutil.Process]]:
+        """
+        Find one running process per name, scanning the process table at most once.
+
+        Args:
+            process_names: Process names as configured (without .exe)
+            fresh: Rescan for missing names even if the last scan is recent
+
+        Returns:
+            Dict[str, Optional[psutil.Process]]: Process or None keyed by the given names
+        """
+        found = {name: self._cached(_normalize(name)) for name in process_names}
+        if all(found.values()) or not fresh and time.monotonic() - self._scanned < self.scan_max_age:
+            return found
+        pids = {}
+        for process in psutil.process_iter(['name']):
+            pids.setdefault(_normalize(process.info['name'] or ''), process.pid)
+        self._pids = pids
+        self._scanned = time.monotonic()
+        return {name: process or self._cached(_normalize(name)) for name, process in found.items()}
+
+    @staticmethod
+    def _describe(process: Optional[psutil.Process]) -> dict:
+        """Build the status dictionary returned by the PowerShell status script."""
+        if process is None:
+            return {'running': False}
+        try:
+            with process.oneshot():
+                if process.status() == psutil.STATUS_ZOMBIE:
+                    return {'running': False}  # Exited but not yet reaped by its parent
+                status = {'running': True, 'pid': process.pid, 'cpu': None, 'memory': None,
+                          'start_time': datetime.fromtimestamp(process.create_time()).astimezone().isoformat()}
+                try:
+                    cpu = process.cpu_times()
+                    status['cpu'] = cpu.user + cpu.system
+                    status['memory'] = process.memory_info().rss
+                except psutil.AccessDenied:
+                    pass  # Processes of other users only expose their identity
+                return status
+        except psutil.NoSuchProcess:
+            return {'running': False}
+
+    def get_process_status(self, process_name: str, fresh: bool = False) -> dict:
+        """
+        Get the status of a local process.
+
+        Args:
+            process_name: Name of the process to check
+            fresh: Rescan the process table if the process is not known to be running
+
+        Returns:
+            dict: Process information in the shape of the status script output
+        """
+        return self._describe(self._find([process_name], fresh)[process_name])
+
+    def get_server_status(self, process_names: Iterable[str]) -> Dict[str, dict]:
+        """
+        Get the status of several local processes.
+
+        Args:
+            process_names: Names of the processes to check
+
+        Returns:
+            Dict[str, dict]: Process information keyed by process name
+        """
+        return {name: self._describe(process) for name, process in self._find(process_names).items()}
+
+    @staticmethod
+    def process_table() -> Dict[str, list]:
+        """
+        Read every local process in the column format of the process table script.
+
+        Returns:
+            Dict[str, list]: Lists 'name', 'pid', 'cpu', 'memory' and 'start' of equal length
+        """
+        columns = {'name': [], 'pid': [], 'cpu': [], 'memory': [], 'start': []}
+        for process in psutil.process_iter(['name', 'cpu_times', 'memory_info', 'create_time']):
+            info = process.info
+            name = info['name'] or ''
+            columns['name'].append(name[:-4] if name.lower().endswith('.exe') else name)
+            columns['pid'].append(process.pid)
+            columns['cpu'].append(info['cpu_times'].user + info['cpu_times'].system if info['cpu_times'] else 0)
+            columns['memory'].append(info['memory_info'].rss if info['memory_info'] else 0)
+            columns['start'].append(info['create_time'] or 0)
+        return columns
+
+    def wait_for_state(self, process_name: str, running: bool, timeout: float) -> Tuple[bool, dict]:
+        """
+        Wait for a local process to reach a running/stopped state.
+
+        Args:
+            process_name: Name of the process to check
+            running: True to wait for the process to run, False to wait for it to stop
+            timeout: Seconds to wait before giving up
+
+        Returns:
+            Tuple[bool, dict]: Whether the state was reached and the last process information
+        """
+        deadline = time.time() + timeout
+        delay = self.INITIAL_POLL_INTERVAL
+        while True:
+            status = self.get_process_status(process_name, fresh=True)
+            if status['running'] == running:
+                return True, status
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False, status
+            time.sleep(min(remaining, random.uniform(delay / 2, delay)))
+            delay = min(delay * 2, self.MAX_POLL_INTERVAL)
+
+    def run_command(self, command: str):
+        """
+        Carry out a start/stop command locally.
+
+        Plain "Start-Process <path>" starts the executable detached from the
+        app, and "Stop-Process -Name <name> [-Force]" terminates (or kills)
+        every process of that name. Anything else runs in a local PowerShell.
+
+        Args:
+            command: PowerShell command from the process configuration
+
+        Raises:
+            OSError: If the executable cannot be started
+            RuntimeError: If a custom command fails or no local PowerShell is installed
+        """
+        command = command.strip()
+        match = _START_PATTERN.fullmatch(command)
+        if match:
+            subprocess.Popen([match.group('quoted') or match.group('path')],
+                             stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                             creationflags=getattr(subprocess, 'DETACHED_PROCESS', 0),
+                             start_new_session=True)
+            return
+
+        match = _STOP_PATTERN.fullmatch(command)
+        if match:
+            key = _normalize(match.group('name'))
+            for process in psutil.process_iter(['name']):
+                if _normalize(process.info['name'] or '') == key:
+                    try:
+                        process.kill() if match.group('force') else process.terminate()
+                    except psutil.NoSuchProcess:
+                        pass  # Already gone
+            self._pids.pop(key, None)
+            return
+
+        shell = shutil.which('pwsh') or shutil.which('powershell')
+        if shell is None:
+            raise RuntimeError(f'No local PowerShell available to run: {command}')
+        result = subprocess.run([shell, '-NoProfile', '-NonInteractive', '-Command', command],
+                                capture_output=True, text=True, timeout=self.COMMAND_TIMEOUT)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip() or f'Command exited with code {result.returncode}')
+
+    def start_process(self, process_config: 'ProcessConfig') -> Tuple[bool, str]:
+        """
+        Start a local process and wait for it to be running.
+
+        Args:
+            process_config: ProcessConfig instance with process details
+
+        Returns:
+            Tuple[bool, str]: Success status and result/error message
+        """
+        if self.get_process_status(process_config.name, fresh=True)['running']:
+            return True, f"Process {process_config.name} is already running"
+        try:
+            self.run_command(process_config.start_command)
+        except (OSError, RuntimeError, subprocess.SubprocessError, psutil.Error) as e:
+            return False, f"Failed to start {process_config.name}: {e}"
+        started, _ = self.wait_for_state(process_config.name, True, process_config.start_timeout)
+        if started:
+            return True, f"Successfully started {process_config.name}"
+        return False, f"{process_config.name} did not start within {process_config.start_timeout}s"
+
+    def stop_process(self, process_config: 'ProcessConfig') -> Tuple[bool, str]:
+        """
+        Stop a local process and wait for it to be gone.
+
+        Args:
+            process_config: ProcessConfig instance with process details
+
+        Returns:
+            Tuple[bool, str]: Success status and result/error message
+        """
+        if not self.get_process_status(process_config.name, fresh=True)['running']:
+            return True, f"Process {process_config.name} is not running"
+        try:
+            self.run_command(process_config.stop_command)
+        except (OSError, RuntimeError, subprocess.SubprocessError, psutil.Error) as e:
+            return False, f"Failed to stop {process_config.name}: {e}"
+        stopped, _ = self.wait_for_state(process_config.name, False, process_config.stop_timeout)
+        if stopped:
+            return True, f"Successfully stopped {process_config.name}"
+        return False, f"{process_config.name} did not stop within {process_config.stop_timeout}s"
@@ -0,0 +1,266 @@
+"""
+Metrics Module
+Lightweight in-process metrics exposed in the Prometheus text format.
+
+Counters, gauges and histograms are kept in plain dictionaries keyed by label
+values and guarded by a lock per metric, so recording a sample costs a dict
+lookup and an addition. The metrics used by the application are defined at
+the bottom of this module and rendered by the /metrics endpoint.
+
+Classes:
+    Metric: Base class holding the name, help text and label names
+    Counter: Monotonically increasing value
+    Gauge: Value that can go up and down
+    Histogram: Distribution of observed values over fixed buckets
+    MetricsRegistry: Collection of metrics rendered together
+"""
+import time
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict, Iterator, List, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    """Format label pairs as a Prometheus label set."""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the Prometheus text format."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class Metric:
+    """
+    Base class for metrics.
+
+    Attributes:
+        TYPE (str): Prometheus metric type
+        name (str): Metric name
+        help (str): Description shown in the HELP line
+        labelnames (Tuple[str, ...]): Names of the labels every sample carries
+    """
+    TYPE = 'untyped'
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = Lock()
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        """Get the label values in label name order."""
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        """
+        Get the sample lines of the metric.
+
+        Returns:
+            List[str]: Lines in the Prometheus text format
+        """
+        with self._lock:
+            values = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {value}' for key, value in values]
+
+
+class Counter(Metric):
+    """A value that only ever increases."""
+    TYPE = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        """
+        Increase the counter.
+
+        Args:
+            amount: Amount to add
+            **labels: Label values of the sample
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that can go up and down."""
+    TYPE = 'gauge'
+
+    def inc(self, amount: float = 1, **labels):
+        """Increase the gauge by an amount."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        """Decrease the gauge by an amount."""
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        """Set the gauge to a value."""
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, **labels) -> Iterator[None]:
+        """Increase the gauge for the duration of a ``with`` block."""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    """
+    Distribution of observed values over fixed upper bounds.
+
+    Attributes:
+        buckets (Tuple[float, ...]): Upper bounds of the buckets
+    """
+    TYPE = 'histogram'
+
+    def __init__(self, name: str, help: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], list] = {}  # [bucket counts..., sum, count]
+
+    def observe(self, value: float, **labels):
+        """
+        Record an observation.
+
+        Args:
+            value: Observed value
+            **labels: Label values of the sample
+        """
+        key = self._key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[index] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration in seconds of a ``with`` block."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        """Get the bucket, sum and count lines of every series."""
+        with self._lock:
+            series = [(key, list(values)) for key, values in self._series.items()]
+        lines = []
+        for key, values in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, values):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, 'le="%s"' % bound)
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f'{self.name}_bucket{labels} {values[-1]}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {values[-2]}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {values[-1]}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Collection of metrics rendered together.
+
+    Attributes:
+        metrics (List[Metric]): Registered metrics in registration order
+    """
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Add a metric to the registry.
+
+        Args:
+            metric: Metric to add
+
+        Returns:
+            Metric: The registered metric
+        """
+        self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.TYPE}')
+            lines.extend(metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# HTTP layer
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'devops_eap_http_request_seconds', 'Time spent handling HTTP requests', ('endpoint', 'method', 'status')))
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.register(Gauge(
+    'devops_eap_http_requests_in_flight', 'HTTP requests currently being handled'))
+
+# Remote calls, split by phase: wsman, runspace_open, invoke, parse
+REMOTE_CALL_SECONDS = REGISTRY.register(Histogram(
+    'devops_eap_remote_call_seconds', 'Time spent in each phase of a remote PowerShell call', ('phase', 'host')))
+REMOTE_CALLS_IN_FLIGHT = REGISTRY.register(Gauge(
+    'devops_eap_remote_calls_in_flight', 'Remote PowerShell invocations currently running', ('host',)))
+
+# Session pool
+POOL_EVENTS = REGISTRY.register(Counter(
+    'devops_eap_session_pool_events_total', 'Session pool checkouts and evictions', ('event', 'host')))
+POOL_SESSIONS = REGISTRY.register(Gauge(
+    'devops_eap_session_pool_sessions', 'Pooled sessions per host: sessions, idle and in_use leases',
+    ('state', 'host')))
+
+# Circuit breakers: 0 closed, 1 half-open, 2 open
+CIRCUIT_STATE = REGISTRY.register(Gauge(
+    'devops_eap_circuit_state', 'Circuit breaker state per host (0 closed, 1 half-open, 2 open)', ('host',)))
+
+# ProcessManager retries and failures
+OPERATION_RETRIES = REGISTRY.register(Counter(
+    'devops_eap_operation_retries_total', 'Operations retried after an error', ('host',)))
+OPERATION_FAILURES = REGISTRY.register(Counter(
+    'devops_eap_operation_failures_total', 'Operations that failed after all retries', ('host',)))
+
+# Per-host admission control, by priority class: interactive, status, adhoc
+ADMISSION_WAIT_SECONDS = REGISTRY.register(Histogram(
+    'devops_eap_admission_wait_seconds', 'Time remote calls waited for admission to their host',
+    ('priority', 'host')))
+ADMISSION_QUEUED = REGISTRY.register(Gauge(
+    'devops_eap_admission_queued', 'Remote calls waiting for admission to their host', ('priority', 'host')))
+ADMISSION_REJECTIONS = REGISTRY.register(Counter(
+    'devops_eap_admission_rejections_total', 'Remote calls rejected because the queue was full or the wait too long',
+    ('priority', 'host', 'reason')))
+
+# Audit log writer
+AUDIT_EVENTS = REGISTRY.register(Counter(
+    'devops_eap_audit_events_total', 'Audit events written, dropped on queue overflow or failed to write',
+    ('outcome',)))
+AUDIT_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    'devops_eap_audit_queue_depth', 'Audit events waiting to be written'))
@@ -0,0 +1,256 @@
+"""
+Process History Module
+Compact in-memory CPU and memory history per (host, process).
+
+Every status check returns the cumulative CPU time and working set of each
+process. The history store turns the CPU time used between two samples into
+CPU usage in percent of one core and keeps the samples in fixed-size ring
+buffers backed by typed arrays instead of lists of dicts. Samples are averaged into buckets at several
+resolutions (10 seconds for the last hour, 1 minute for the last day and 15
+minutes for the last week), so older data is downsampled automatically. Each
+series preallocates its buffers and the number of series is capped by a
+memory budget, so memory use stays fixed however many processes are sampled.
+
+Classes:
+    RingSeries: Fixed-capacity ring buffer of (timestamp, cpu, memory) points
+    ProcessHistory: Multi-resolution history of one process
+    HistoryStore: Budgeted store of process histories
+"""
+import bisect
+import time
+from array import array
+from collections import OrderedDict
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+# (bucket seconds, number of buckets kept) from finest to coarsest
+DEFAULT_RESOLUTIONS = ((10, 360), (60, 1440), (900, 672))
+
+# Bytes per stored point: uint32 timestamp, float32 cpu, float32 memory
+POINT_BYTES = 12
+
+
+class RingSeries:
+    """
+    Fixed-capacity ring buffer of (timestamp, cpu, memory) points in time order.
+
+    Attributes:
+        capacity (int): Maximum number of points kept
+        count (int): Number of points currently stored
+    """
+    __slots__ = ('capacity', 'count', '_start', '_times', '_cpu', '_memory')
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.count = 0
+        self._start = 0
+        self._times = array('I', bytes(4 * capacity))
+        self._cpu = array('f', bytes(4 * capacity))
+        self._memory = array('f', bytes(4 * capacity))
+
+    def append(self, timestamp: int, cpu: float, memory: float):
+        """Add a point, overwriting the oldest one when full."""
+        if self.count < self.capacity:
+            index = (self._start + self.count) % self.capacity
+            self.count += 1
+        else:
+            index = self._start
+            self._start = (self._start + 1) % self.capacity
+        self._times[index] = timestamp
+        self._cpu[index] = cpu
+        self._memory[index] = memory
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, position: int) -> int:
+        """Get the timestamp at a logical position (0 is the oldest point)."""
+        return self._times[(self._start + position) % self.capacity]
+
+    def range(self, start: float, end: float) -> Tuple[List[int], List[float], List[float]]:
+        """
+        Get the points with start <= timestamp <= end.
+
+        Args:
+            start: Earliest timestamp to include
+            end: Latest timestamp to include
+
+        Returns:
+            Tuple[List[int], List[float], List[float]]: Timestamps, cpu and memory values
+        """
+        first = bisect.bisect_left(self, start)
+        last = bisect.bisect_right(self, end)
+        indexes = [(self._start + position) % self.capacity for position in range(first, last)]
+        return ([self._times[i] for i in indexes],
+                [self._cpu[i] for i in indexes],
+                [self._memory[i] for i in indexes])
+
+
+class ProcessHistory:
+    """
+    History of one process at several resolutions.
+
+    Each resolution averages the samples falling into a bucket and writes the
+    bucket to its ring buffer once a sample for a later bucket arrives.
+
+    Attributes:
+        resolutions (Tuple[Tuple[int, int], ...]): (bucket seconds, capacity) per tier
+        last_sample (float): Timestamp of the most recent sample
+    """
+    __slots__ = ('resolutions', 'last_sample', '_series', '_pending', '_pid', '_cpu_time')
+
+    def __init__(self, resolutions: Tuple[Tuple[int, int], ...]):
+        self.resolutions = resolutions
+        self.last_sample = 0.0
+        self._series = [RingSeries(capacity) for _, capacity in resolutions]
+        # Open bucket per tier: [bucket start, cpu sum, memory sum, sample count]
+        self._pending = [[0, 0.0, 0.0, 0] for _ in resolutions]
+        # Process ID and cumulative CPU seconds at last_sample, the baseline of the next sample
+        self._pid: Optional[int] = None
+        self._cpu_time: Optional[float] = None
+
+    def record(self, timestamp: float, cpu_time: float, memory: float, pid: Optional[int] = None) -> bool:
+        """
+        Add a sample to every resolution.
+
+        The CPU usage of a sample is the CPU time used since the previous sample
+        divided by the time between them. The first sample, and the first after
+        the process restarted, only sets that baseline. Samples that are not
+        newer than the previous one are dropped.
+
+        Args:
+            timestamp: Sample time
+            cpu_time: Cumulative CPU seconds used by the process
+            memory: Working set in bytes
+            pid: Process ID, used to detect restarts
+
+        Returns:
+            bool: True if the sample was added to the buckets
+        """
+        if timestamp <= self.last_sample:
+            return False
+        elapsed = timestamp - self.last_sample
+        previous = self._cpu_time if pid == self._pid else None
+        self.last_sample = timestamp
+        self._pid = pid
+        self._cpu_time = cpu_time
+        if previous is None or cpu_time < previous:
+            return False
+
+        cpu = (cpu_time - previous) / elapsed * 100
+        for (seconds, _), series, pending in zip(self.resolutions, self._series, self._pending):
+            bucket = int(timestamp // seconds * seconds)
+            if bucket > pending[0]:
+                if pending[3]:
+                    series.append(pending[0], pending[1] / pending[3], pending[2] / pending[3])
+                pending[:] = [bucket, 0.0, 0.0, 0]
+            pending[1] += cpu
+            pending[2] += memory
+            pending[3] += 1
+        return True
+
+    def query(self, start: float, end: float) -> dict:
+        """
+        Get the points between two timestamps from the finest resolution covering the start.
+
+        Args:
+            start: Earliest timestamp to include
+            end: Latest timestamp to include
+
+        Returns:
+            dict: Bucket size in seconds and columnar 't', 'cpu_percent' (percent
+                  of one core) and 'memory' lists
+        """
+        tier = len(self._series) - 1
+        for index, (seconds, capacity) in enumerate(self.resolutions):
+            # A tier covers the start if it was inside its retention when last sampled
+            if self.last_sample - seconds * (capacity + 1) <= start:
+                tier = index
+                break
+        series = self._series[tier]
+        times, cpu, memory = series.range(start, end)
+        bucket, cpu_sum, memory_sum, count = self._pending[tier]
+        if count and start <= bucket <= end:
+            times.append(bucket)
+            cpu.append(cpu_sum / count)
+            memory.append(memory_sum / count)
+        return {'resolution': self.resolutions[tier][0], 't': times, 'cpu_percent': cpu, 'memory': memory}
+
+
+class HistoryStore:
+    """
+    Store of process histories within a fixed memory budget.
+
+    Series are keyed by (host, process). Once the budget's number of series is
+    reached, the series that was sampled least recently is dropped.
+
+    Attributes:
+        MEMORY_BUDGET (int): Default bytes of preallocated buffers across all series
+        max_series (int): Number of series the budget allows
+    """
+    MEMORY_BUDGET = 32 * 1024 * 1024  # 32 MB
+
+    def __init__(self, memory_budget: int = MEMORY_BUDGET,
+                 resolutions: Tuple[Tuple[int, int], ...] = DEFAULT_RESOLUTIONS):
+        """
+        Initialize a new HistoryStore instance.
+
+        Args:
+            memory_budget: Bytes of preallocated buffers across all series
+            resolutions: (bucket seconds, capacity) per tier, finest first
+        """
+        self.resolutions = tuple(resolutions)
+        series_bytes = sum(capacity for _, capacity in self.resolutions) * POINT_BYTES
+        self.max_series = max(memory_budget // series_bytes, 1)
+        self._series: 'OrderedDict[Tuple[str, str], ProcessHistory]' = OrderedDict()
+        self._lock = Lock()
+
+    def record(self, host: str, statuses: Dict[str, dict], timestamp: Optional[float] = None):
+        """
+        Record the CPU and memory of every running process in a status result.
+
+        Args:
+            host: Computer name the statuses were read from
+            statuses: Process information keyed by process name
+            timestamp: Sample time (defaults to now)
+        """
+        with self._lock:
+            # Taken under the lock so concurrent lookups record in time order
+            timestamp = timestamp or time.time()
+            for name, status in statuses.items():
+                if not status.get('running'):
+                    continue
+                key = (host.lower(), name)
+                history = self._series.get(key)
+                if history is None:
+                    if len(self._series) >= self.max_series:
+                        self._series.popitem(last=False)
+                    history = self._series[key] = ProcessHistory(self.resolutions)
+                else:
+                    self._series.move_to_end(key)
+                history.record(timestamp, float(status.get('cpu') or 0), float(status.get('memory') or 0),
+                               status.get('pid'))
+
+    def query(self, host: str, process_name: str, start: float, end: float) -> Optional[dict]:
+        """
+        Get the history of a process between two timestamps.
+
+        Args:
+            host: Computer name of the server
+            process_name: Name of the process
+            start: Earliest timestamp to include
+            end: Latest timestamp to include
+
+        Returns:
+            Optional[dict]: Bucket size and columnar points, or None if the process has no history
+        """
+        with self._lock:
+            history = self._series.get((host.lower(), process_name))
+            if history is None:
+                return None
+            return history.query(start, end)
+
+    def clear(self):
+        """Drop every series."""
+        with self._lock:
+            self._series.clear()
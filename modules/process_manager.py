@@ -3,17 +3,112 @@ Process Manager Module
 Handles process-related operations including start, stop, and status checking.
 
 This module provides classes for managing Windows processes across local and remote machines
-using PowerShell remoting. It includes connection pooling, retry logic, and proper resource cleanup.
+using PowerShell remoting. Sessions are borrowed from a shared SessionPool, every remote call
+is admitted through a per-host gate that favours interactive actions over status polling over
+ad-hoc commands, and operations include retry logic and proper resource cleanup. Servers pointing at the local machine can be
+handled natively by a LocalProcessBackend instead.
 
 Classes:
     ProcessConfig: Configuration container for process-specific commands
-    ProcessManager: Main class handling process operations and connection management
+    ProcessManager: Main class handling process operations on pooled sessions
 """
+import json
+import random
+import threading
 import time
-from typing import Dict, Tuple, Optional
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Optional
+import requests
+from pypsrp.complex_objects import PSInvocationState
+from pypsrp.exceptions import WinRMTransportError
 from pypsrp.powershell import PowerShell, RunspacePool
-from pypsrp.wsman import WSMan
-from threading import Lock
+from modules.metrics import (OPERATION_FAILURES, OPERATION_RETRIES, REMOTE_CALL_SECONDS,
+                             REMOTE_CALLS_IN_FLIGHT)
+from modules.circuit_breaker import CircuitBreakerRegistry, CircuitOpenError
+from modules.admission import ADHOC, INTERACTIVE, STATUS, AdmissionController, AdmissionRejectedError
+from modules.session_pool import SessionPool, make_session_key
+from modules.status_cache import StatusCache
+from modules.process_history import HistoryStore
+from modules.local_backend import LocalProcessBackend, is_local_target
+from modules.process_table import PROCESS_TABLE_SCRIPT, ProcessTable
+
+# Errors showing that a host could not be reached. Others, such as rejected
+# credentials, failing scripts or no free session in the local pool, say
+# nothing about the host's health and do not count against its circuit breaker.
+HOST_FAILURES = (WinRMTransportError, requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                 ConnectionError)
+
+
+@lru_cache(maxsize=1024)
+def build_status_script(process_name: str) -> str:
+    """
+    Build the PowerShell script reporting the status of one process as JSON.
+
+    Scripts are cached per process name, so repeated status checks reuse the
+    rendered text.
+
+    Args:
+        process_name: Name of the process to check
+
+    Returns:
+        str: Script that writes the process information as a JSON object
+    """
+    return f"""
+        $process = Get-Process {process_name} -ErrorAction SilentlyContinue
+        if ($process) {{
+            @{{
+                'running' = $true
+                'pid' = $process.Id
+                'cpu' = $process.CPU
+                'memory' = $process.WorkingSet64
+                'start_time' = $process.StartTime.ToString('o')
+            }} | ConvertTo-Json
+        }} else {{
+            @{{'running' = $false}} | ConvertTo-Json
+        }}
+    """
+
+
+@lru_cache(maxsize=1024)
+def build_batch_status_script(process_names: Tuple[str, ...]) -> str:
+    """
+    Build a single PowerShell script reporting the status of several processes.
+
+    Scripts are cached per tuple of names, so repeated batch checks reuse the
+    rendered text.
+
+    Args:
+        process_names: Names of the processes to check
+
+    Returns:
+        str: Script that writes a JSON object keyed by process name
+    """
+    names = ', '.join("'" + name.replace("'", "''") + "'" for name in process_names)
+    return f"""
+        $names = @({names})
+        $found = @{{}}
+        Get-Process -Name $names -ErrorAction SilentlyContinue | ForEach-Object {{
+            if (-not $found.ContainsKey($_.ProcessName)) {{ $found[$_.ProcessName] = $_ }}
+        }}
+        $result = @{{}}
+        foreach ($name in $names) {{
+            $process = $found[$name]
+            if ($process) {{
+                $result[$name] = @{{
+                    'running' = $true
+                    'pid' = $process.Id
+                    'cpu' = $process.CPU
+                    'memory' = $process.WorkingSet64
+                    'start_time' = if ($process.StartTime) {{ $process.StartTime.ToString('o') }} else {{ $null }}
+                }}
+            }} else {{
+                $result[$name] = @{{'running' = $false}}
+            }}
+        }}
+        $result | ConvertTo-Json -Depth 3 -Compress
+    """
+
 
 class ProcessConfig:
     """
@@ -24,11 +119,25 @@ class ProcessConfig:
     are provided, it generates default commands using the process name.
     
     Attributes:
+        DEFAULT_START_TIMEOUT (float): Default seconds to wait for the process to start
+        DEFAULT_STOP_TIMEOUT (float): Default seconds to wait for the process to stop
         name (str): Name of the process
         start_command (str): PowerShell command to start the process
         stop_command (str): PowerShell command to stop the process
+        start_timeout (float): Seconds to wait for the process to be running after starting it
+        stop_timeout (float): Seconds to wait for the process to be gone after stopping it
+        status_script (str): Pre-rendered PowerShell script reporting the process status
+        depends_on (Tuple[str, ...]): Processes that must run first, as 'process' or 'server/process'
     """
-    def __init__(self, name: str, start_command: Optional[str] = None, stop_command: Optional[str] = None):
+    __slots__ = ('name', 'start_command', 'stop_command', 'start_timeout', 'stop_timeout', 'status_script',
+                 'depends_on')
+
+    DEFAULT_START_TIMEOUT = 30  # seconds
+    DEFAULT_STOP_TIMEOUT = 30  # seconds
+
+    def __init__(self, name: str, start_command: Optional[str] = None, stop_command: Optional[str] = None,
+                 start_timeout: Optional[float] = None, stop_timeout: Optional[float] = None,
+                 depends_on: Optional[List[str]] = None):
         """
         Initialize a new ProcessConfig instance.
         
@@ -36,10 +145,36 @@ class ProcessConfig:
             name: Name of the process
             start_command: Optional custom command to start the process
             stop_command: Optional custom command to stop the process
+            start_timeout: Optional seconds to wait for the process to start
+            stop_timeout: Optional seconds to wait for the process to stop
+            depends_on: Optional processes that must run before this one starts
         """
         self.name = name
         self.start_command = start_command or f"Start-Process {name}"
         self.stop_command = stop_command or f"Stop-Process -Name {name} -Force"
+        self.start_timeout = start_timeout or self.DEFAULT_START_TIMEOUT
+        self.stop_timeout = stop_timeout or self.DEFAULT_STOP_TIMEOUT
+        self.status_script = build_status_script(name)
+        self.depends_on = tuple(depends_on or ())
+
+    @classmethod
+    def from_dict(cls, name: str, config: dict) -> 'ProcessConfig':
+        """
+        Create a ProcessConfig from a process entry of a server configuration.
+        
+        Args:
+            name: Name of the process
+            config: Process entry with start/stop commands, optional timeouts and dependencies
+        
+        Returns:
+            ProcessConfig: Process configuration for the entry
+        """
+        return cls(name,
+                   start_command=config.get('start_command'),
+                   stop_command=config.get('stop_command'),
+                   start_timeout=config.get('start_timeout'),
+                   stop_timeout=config.get('stop_timeout'),
+                   depends_on=config.get('depends_on'))
 
     def to_dict(self):
         """
@@ -51,7 +186,10 @@ class ProcessConfig:
         return {
             'name': self.name,
             'start_command': self.start_command,
-            'stop_command': self.stop_command
+            'stop_command': self.stop_command,
+            'start_timeout': self.start_timeout,
+            'stop_timeout': self.stop_timeout,
+            'depends_on': list(self.depends_on)
         }
 
 class ProcessManager:
@@ -59,88 +197,267 @@ class ProcessManager:
     Manages process operations using PowerShell remoting.
     
     This class handles all process-related operations including starting, stopping,
-    and monitoring processes across local and remote machines. It maintains a pool
-    of PowerShell sessions for better performance and implements retry logic for
-    reliability.
+    and monitoring processes across local and remote machines. PowerShell sessions
+    are borrowed from a shared SessionPool for better performance, and operations
+    use retry logic for reliability.
     
     Attributes:
         MAX_RETRIES (int): Maximum number of retry attempts for operations
-        RETRY_DELAY (int): Delay in seconds between retry attempts
+        RETRY_DELAY (int): Base delay in seconds between retry attempts, doubled per attempt
+        INITIAL_POLL_INTERVAL (float): First delay in seconds when waiting for a process state
+        MAX_POLL_INTERVAL (float): Longest delay in seconds between state checks
         SESSION_TIMEOUT (int): Session timeout in seconds
-        _sessions (Dict): Dictionary of active PowerShell sessions
-        _lock (Lock): Thread lock for session management
+        STATUS_CACHE_TTL (float): Seconds a cached process status stays fresh
+        STATUS_CACHE_SIZE (int): Maximum number of cached status lookups
+        STREAM_POLL_TIMEOUT (int): Longest wait in seconds for streamed output before checking for cancellation
+        _pool (SessionPool): Pool of PowerShell sessions shared by all callers
+        _status_cache (StatusCache): Cache coalescing concurrent status lookups
+        _powershell (Callable[[RunspacePool], PowerShell]): Factory creating pipelines on a session
+        _breakers (CircuitBreakerRegistry): Per-host circuit breakers around sessions and invocations
+        _admission (AdmissionController): Per-host concurrency, rate and priority limits on remote calls
+        _history (HistoryStore): CPU and memory history recorded from status lookups
+        _local (Optional[LocalProcessBackend]): Native backend for localhost servers, if enabled
+        _tables (Dict[str, ProcessTable]): Latest full process table per host
     """
     MAX_RETRIES = 3
     RETRY_DELAY = 2  # seconds
+    INITIAL_POLL_INTERVAL = 0.05  # seconds
+    MAX_POLL_INTERVAL = 2.0  # seconds
     SESSION_TIMEOUT = 300  # 5 minutes
+    STATUS_CACHE_TTL = 2.0  # seconds
+    STATUS_CACHE_SIZE = 1024
+    STREAM_POLL_TIMEOUT = 5  # seconds
     
-    def __init__(self):
+    def __init__(self, pool: Optional[SessionPool] = None, status_cache: Optional[StatusCache] = None,
+                 powershell_factory: Callable[[RunspacePool], PowerShell] = PowerShell,
+                 breakers: Optional[CircuitBreakerRegistry] = None,
+                 history: Optional[HistoryStore] = None,
+                 local_backend: Optional[LocalProcessBackend] = None,
+                 admission: Optional[AdmissionController] = None):
         """
         Initialize a new ProcessManager instance.
         
-        Sets up the session pool and thread lock for managing PowerShell connections.
+        Args:
+            pool: Optional session pool to borrow sessions from. A new pool using
+                  SESSION_TIMEOUT as its idle timeout is created if not provided.
+            status_cache: Optional status cache. A new cache using STATUS_CACHE_TTL
+                          and STATUS_CACHE_SIZE is created if not provided.
+            powershell_factory: Callable creating a PowerShell pipeline on a session
+                                (defaults to pypsrp's PowerShell)
+            breakers: Optional circuit breaker registry. A new registry with
+                      default thresholds is created if not provided.
+            history: Optional process history store. A new store with the
+                     default memory budget is created if not provided.
+            local_backend: Optional backend handling status, start and stop for
+                           localhost servers without WinRM. Localhost goes
+                           through PowerShell remoting like any host if not provided.
+            admission: Optional admission controller. A new controller with
+                       default limits is created if not provided.
         """
-        self._sessions: Dict[str, Tuple[RunspacePool, float]] = {}  # (session, last_used_timestamp)
-        self._lock = Lock()
-        
-    def _get_session(self, server_config: dict) -> RunspacePool:
+        self._pool = pool or SessionPool(idle_timeout=self.SESSION_TIMEOUT)
+        self._status_cache = status_cache or StatusCache(self.STATUS_CACHE_TTL, self.STATUS_CACHE_SIZE)
+        self._powershell = powershell_factory
+        self._breakers = breakers or CircuitBreakerRegistry()
+        self._admission = admission or AdmissionController()
+        self._history = history or HistoryStore()
+        self._local = local_backend
+        self._tables: Dict[str, ProcessTable] = {}
+
+    @property
+    def pool(self) -> SessionPool:
+        """The session pool used by this ProcessManager."""
+        return self._pool
+
+    @property
+    def breakers(self) -> CircuitBreakerRegistry:
+        """The per-host circuit breakers used by this ProcessManager."""
+        return self._breakers
+
+    @property
+    def admission(self) -> AdmissionController:
+        """The per-host admission gates used by this ProcessManager."""
+        return self._admission
+
+    def _is_local(self, server_config: dict) -> bool:
+        """Check whether a server is handled by the local backend."""
+        return self._local is not None and is_local_target(server_config)
+
+    @property
+    def history(self) -> HistoryStore:
+        """The CPU and memory history recorded from status lookups."""
+        return self._history
+
+    def admission_state(self, server_config: dict) -> dict:
         """
-        Get or create a PowerShell session for a server.
+        Get the admission gate state of a server's host.
         
-        This method manages the session pool, creating new sessions when needed
-        and reusing existing ones when available. It also handles session
-        expiration and cleanup.
+        Args:
+            server_config: Dictionary containing server connection details
+        
+        Returns:
+            dict: Running and queued calls, available tokens and admitted/rejected counts
+        """
+        return self._admission.get(server_config['computer_name']).to_dict()
+
+    def circuit_state(self, server_config: dict) -> dict:
+        """
+        Get the circuit breaker state of a server's host.
         
         Args:
             server_config: Dictionary containing server connection details
-                         (computer_name, username, ssl)
         
         Returns:
-            RunspacePool: Active PowerShell session for the server
+            dict: Breaker state, failure rate, last error and seconds until the next probe
+        """
+        return self._breakers.get(server_config['computer_name']).to_dict()
+
+    @contextmanager
+    def session(self, server_config: dict, priority: str = ADHOC) -> Iterator[RunspacePool]:
+        """
+        Borrow a pooled PowerShell session for a server.
+        
+        Intended for use as a context manager; the session is returned to the
+        pool when the block exits and discarded if the block raised. The call
+        holds an admission to the host for the whole block. Connection and
+        transport errors (HOST_FAILURES) count against the host's circuit breaker.
+        
+        Args:
+            server_config: Dictionary containing server connection details
+                         (computer_name, username, password, ssl)
+            priority: Admission priority class: 'interactive', 'status' or 'adhoc'
+        
+        Yields:
+            RunspacePool: Opened session
         
         Raises:
-            Exception: If unable to create or retrieve a valid session
-        """
-        server_key = f"{server_config['computer_name']}_{server_config.get('username', 'local')}"
-        
-        with self._lock:
-            # Check for existing valid session
-            if server_key in self._sessions:
-                session, last_used = self._sessions[server_key]
-                if time.time() - last_used < self.SESSION_TIMEOUT:
-                    self._sessions[server_key] = (session, time.time())  # Update timestamp
-                    return session
-                else:
-                    # Session expired, clean it up
-                    self._cleanup_session(server_key)
-            
-            # Create new session
-            wsman = WSMan(server_config['computer_name'],
-                         username=server_config.get('username'),
-                         ssl=server_config.get('ssl', False))
-            session = RunspacePool(wsman)
-            session.open()
-            self._sessions[server_key] = (session, time.time())
-            return session
+            CircuitOpenError: If the host's circuit is open
+            AdmissionRejectedError: If the host's gate rejects the call
+        """
+        host = server_config['computer_name']
+        breaker = self._breakers.get(host)
+        breaker.before_call()
+        try:
+            gate = self._admission.acquire(host, priority)
+        except BaseException:
+            breaker.abandon()  # Rejected before reaching the host
+            raise
+        try:
+            with self._pool.session(server_config) as session:
+                yield session
+        except HOST_FAILURES as e:
+            breaker.record_failure(str(e))
+            raise
+        except BaseException:
+            breaker.abandon()  # e.g. bad credentials, a script error or a streaming caller stopping early
+            raise
+        finally:
+            gate.release()
+        breaker.record_success()
+
+    def run_script(self, server_config: dict, script: str) -> list:
+        """
+        Run a PowerShell script on a pooled session and return its output.
+        
+        Args:
+            server_config: Dictionary containing server connection details
+            script: PowerShell script to run
+        
+        Returns:
+            list: Objects written to the output stream by the script
+        """
+        with self.session(server_config) as session:
+            ps = self._powershell(session)
+            return self._invoke(ps.add_script(script))
     
-    def _cleanup_session(self, server_key: str):
+    def stream_script(self, server_config: dict, script: str,
+                      cancel_event: Optional[threading.Event] = None) -> Iterator[Tuple[str, Any]]:
         """
-        Clean up a specific PowerShell session.
+        Run a PowerShell script and yield its records as the pipeline produces them.
         
-        Closes and removes a session from the session pool. Handles any
-        errors that occur during cleanup gracefully.
+        Records are handed out as soon as each receive from the server returns
+        and are not kept afterwards, so memory stays flat regardless of output
+        size. If the caller stops iterating early or sets the cancel event, the
+        remote pipeline is stopped and the session discarded. Every receive
+        waits at most STREAM_POLL_TIMEOUT, so a script that prints nothing is
+        still stopped shortly after the event is set.
         
         Args:
-            server_key: Unique identifier for the server session
+            server_config: Dictionary containing server connection details
+            script: PowerShell script to run
+            cancel_event: Optional event that stops the pipeline when set
+        
+        Yields:
+            Tuple[str, Any]: ('output', object) or ('error', error record) tuples
         """
-        if server_key in self._sessions:
-            session, _ = self._sessions[server_key]
+        host = server_config['computer_name']
+        started = time.perf_counter()
+        with self.session(server_config) as session, REMOTE_CALLS_IN_FLIGHT.track(host=host):
+            ps = self._powershell(session)
+            ps.add_script(script)
+            ps.begin_invoke()
             try:
-                session.close()
-            except:
-                pass  # Ignore cleanup errors
-            del self._sessions[server_key]
+                while True:
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    running = ps.state == PSInvocationState.RUNNING
+                    if running:
+                        ps.poll_invoke(timeout=self.STREAM_POLL_TIMEOUT)
+                    output, errors = ps.output[:], ps.streams.error[:]
+                    del ps.output[:]
+                    del ps.streams.error[:]
+                    for item in output:
+                        yield 'output', item
+                    for error in errors:
+                        yield 'error', error
+                    if not running:
+                        break
+            finally:
+                REMOTE_CALL_SECONDS.observe(time.perf_counter() - started, phase='stream', host=host)
+                if ps.state == PSInvocationState.RUNNING:
+                    try:
+                        ps.stop()
+                    except Exception:
+                        pass  # Ignore errors stopping an abandoned pipeline
+    
+    def _invoke(self, ps: PowerShell) -> list:
+        """
+        Invoke a pipeline, recording its latency and in-flight count for its host.
+        
+        Args:
+            ps: PowerShell pipeline with its commands added
+        
+        Returns:
+            list: Objects written to the output stream
+        """
+        host = self._pool.host_of(ps.runspace_pool)
+        with REMOTE_CALLS_IN_FLIGHT.track(host=host), REMOTE_CALL_SECONDS.time(phase='invoke', host=host):
+            return ps.invoke()
     
+    def warm_sessions(self, server_config: dict, count: int = 1):
+        """
+        Open sessions to a server ahead of use and keep them alive.
+        
+        Args:
+            server_config: Dictionary containing server connection details
+            count: Number of sessions to have ready
+        """
+        if self._is_local(server_config):
+            return  # Served without sessions
+        self._pool.warm(server_config, count)
+
+    def keepalive(self, idle_after: float) -> Dict[str, int]:
+        """
+        Ping warm sessions idle for idle_after seconds and reopen those that died.
+        
+        Args:
+            idle_after: Seconds a session must have been idle to be pinged
+        
+        Returns:
+            Dict[str, int]: Numbers of sessions pinged, failed and reopened
+        """
+        return self._pool.keepalive(lambda session: self._invoke(self._powershell(session).add_script('$true')),
+                                    idle_after)
+
     def cleanup_all_sessions(self):
         """
         Clean up all PowerShell sessions.
@@ -148,20 +465,21 @@ class ProcessManager:
         Closes and removes all sessions from the session pool. This should be
         called when the ProcessManager is no longer needed or during shutdown.
         """
-        with self._lock:
-            for server_key in list(self._sessions.keys()):
-                self._cleanup_session(server_key)
+        self._pool.close_all()
     
-    def _execute_with_retry(self, server_config: dict, operation: callable) -> Tuple[bool, str]:
+    def _execute_with_retry(self, server_config: dict, operation: callable,
+                            priority: str = STATUS) -> Tuple[bool, str]:
         """
         Execute an operation with retry logic.
         
-        Attempts to execute the given operation multiple times, with delays
-        between attempts. Handles session cleanup and recreation on failures.
+        Attempts to execute the given operation multiple times, with jittered
+        exponential backoff between attempts. A session that fails is discarded
+        so the next attempt runs on a freshly opened one.
         
         Args:
             server_config: Dictionary containing server connection details
             operation: Callable that performs the actual operation
+            priority: Admission priority class of the operation
         
         Returns:
             Tuple[bool, str]: Success status and result/error message
@@ -170,66 +488,266 @@ class ProcessManager:
         
         for attempt in range(self.MAX_RETRIES):
             try:
-                session = self._get_session(server_config)
-                ps = PowerShell(session)
-                return operation(ps)
+                with self.session(server_config, priority) as session:
+                    ps = self._powershell(session)
+                    return operation(ps)
+            except (CircuitOpenError, AdmissionRejectedError) as e:
+                # Fail fast instead of retrying a host known to be down or overloaded
+                return False, str(e)
             except Exception as e:
                 last_error = str(e)
                 if attempt < self.MAX_RETRIES - 1:
-                    time.sleep(self.RETRY_DELAY)
-                    # Force session cleanup on error
-                    server_key = f"{server_config['computer_name']}_{server_config.get('username', 'local')}"
-                    self._cleanup_session(server_key)
+                    OPERATION_RETRIES.inc(host=server_config['computer_name'])
+                    delay = self.RETRY_DELAY * (2 ** attempt)
+                    time.sleep(random.uniform(delay / 2, delay))
                     
+        OPERATION_FAILURES.inc(host=server_config['computer_name'])
         return False, f"Operation failed after {self.MAX_RETRIES} attempts. Last error: {last_error}"
     
-    def get_process_status(self, server_config: dict, process_name: str) -> Tuple[bool, dict]:
+    def _query_status(self, session: RunspacePool, process_name: str,
+                      script: Optional[str] = None) -> Tuple[bool, dict]:
+        """
+        Query the status of a process on an already borrowed session.
+        
+        Args:
+            session: Opened runspace pool to run the query on
+            process_name: Name of the process to check
+            script: Pre-rendered status script, e.g. ProcessConfig.status_script;
+                    rendered from the name if not given
+        
+        Returns:
+            Tuple[bool, dict]: Success status and process information
+        """
+        result = self._invoke(self._powershell(session).add_script(script or build_status_script(process_name)))
+        if result:
+            with REMOTE_CALL_SECONDS.time(phase='parse', host=self._pool.host_of(session)):
+                return True, json.loads(result[0])
+        return False, {'running': False}
+    
+    def _wait_for_state(self, session: RunspacePool, process_name: str, running: bool,
+                        timeout: float, script: Optional[str] = None) -> Tuple[bool, dict]:
+        """
+        Wait for a process to reach a running/stopped state on an already borrowed session.
+        
+        Checks immediately and then at increasing, jittered intervals until the
+        state is reached or the deadline passes, so fast processes return within
+        milliseconds and slow ones get their full timeout.
+        
+        Args:
+            session: Opened runspace pool to run the checks on
+            process_name: Name of the process to check
+            running: True to wait for the process to run, False to wait for it to stop
+            timeout: Seconds to wait before giving up
+            script: Pre-rendered status script; rendered from the name if not given
+        
+        Returns:
+            Tuple[bool, dict]: Whether the state was reached and the last process information
+        """
+        deadline = time.time() + timeout
+        delay = self.INITIAL_POLL_INTERVAL
+        while True:
+            status_success, status = self._query_status(session, process_name, script)
+            if status_success and status.get('running', False) == running:
+                return True, status
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                return False, status
+            time.sleep(min(remaining, random.uniform(delay / 2, delay)))
+            delay = min(delay * 2, self.MAX_POLL_INTERVAL)
+
+    def wait_for_state(self, server_config: dict, process_name: str, running: bool,
+                       timeout: float) -> Tuple[bool, dict]:
+        """
+        Wait for a process on a server to reach a running/stopped state.
+        
+        Args:
+            server_config: Dictionary containing server connection details
+            process_name: Name of the process to check
+            running: True to wait for the process to run, False to wait for it to stop
+            timeout: Seconds to wait before giving up
+        
+        Returns:
+            Tuple[bool, dict]: Whether the state was reached and the last process information
+        """
+        if self._is_local(server_config):
+            return self._local.wait_for_state(process_name, running, timeout)
+        with self.session(server_config, INTERACTIVE) as session:
+            return self._wait_for_state(session, process_name, running, timeout)
+
+    def get_process_status(self, server_config: dict, process_name: str,
+                           script: Optional[str] = None) -> Tuple[bool, dict]:
         """
         Check if a process is running with detailed status information.
         
         Retrieves detailed information about a process including its running state,
-        PID, CPU usage, memory usage, and start time.
+        PID, CPU usage, memory usage, and start time. Results are cached for
+        STATUS_CACHE_TTL seconds and concurrent lookups share one remote call.
+        Fresh results are also recorded in the process history.
         
         Args:
             server_config: Dictionary containing server connection details
             process_name: Name of the process to check
+            script: Pre-rendered status script, e.g. ProcessConfig.status_script;
+                    rendered from the name if not given
         
         Returns:
             Tuple[bool, dict]: Success status and process information/error message
         """
+        if self._is_local(server_config):
+            return self._local_status(server_config,
+                                      lambda: {process_name: self._local.get_process_status(process_name)},
+                                      process_name)
+
         def check_status(ps):
-            script = f"""
-                $process = Get-Process {process_name} -ErrorAction SilentlyContinue
-                if ($process) {{
-                    @{{
-                        'running' = $true
-                        'pid' = $process.Id
-                        'cpu' = $process.CPU
-                        'memory' = $process.WorkingSet64
-                        'start_time' = $process.StartTime.ToString('o')
-                    }} | ConvertTo-Json
-                }} else {{
-                    @{{'running' = $false}} | ConvertTo-Json
-                }}
-            """
-            result = ps.add_script(script).invoke()
-            if result:
-                import json
-                status = json.loads(result[0])
-                return True, status
-            return False, {'running': False}
+            success, status = self._query_status(ps.runspace_pool, process_name, script)
+            if success:
+                self._history.record(server_config['computer_name'], {process_name: status})
+            return success, status
             
-        success, result = self._execute_with_retry(server_config, check_status)
+        success, result = self._status_cache.get_or_load(
+            (make_session_key(server_config), process_name),
+            lambda: self._execute_with_retry(server_config, check_status))
         if success:
             return True, result
         return False, {'running': False, 'error': result}
 
+    def get_server_status(self, server_config: dict, process_names: List[str],
+                          script: Optional[str] = None) -> Tuple[bool, dict]:
+        """
+        Check the status of several processes on one server in a single round trip.
+        
+        Sends one script covering every requested process instead of one
+        Get-Process call per process. Results are cached like get_process_status.
+        
+        Args:
+            server_config: Dictionary containing server connection details
+            process_names: Names of the processes to check
+            script: Pre-rendered batch status script for exactly these processes,
+                    e.g. ServerConfig.batch_status_script; rendered from the
+                    names if not given
+        
+        Returns:
+            Tuple[bool, dict]: Success status and process information keyed by
+                               process name, or an error message
+        """
+        if not process_names:
+            return True, {}
+        if self._is_local(server_config):
+            return self._local_status(server_config, lambda: self._local.get_server_status(process_names))
+
+        script = script or build_batch_status_script(tuple(process_names))
+
+        def check_statuses(ps):
+            result = self._invoke(ps.add_script(script))
+            if not result:
+                return False, 'No status returned from server'
+            with REMOTE_CALL_SECONDS.time(phase='parse', host=server_config['computer_name']):
+                statuses = json.loads(result[0])
+            self._history.record(server_config['computer_name'], statuses)
+            return True, {name: statuses.get(name, {'running': False}) for name in process_names}
+
+        success, result = self._status_cache.get_or_load(
+            (make_session_key(server_config), tuple(process_names)),
+            lambda: self._execute_with_retry(server_config, check_statuses))
+        if success:
+            return True, dict(result)
+        return False, {'error': result}
+
+    def _local_status(self, server_config: dict, load: Callable[[], Dict[str, dict]],
+                      process_name: Optional[str] = None) -> Tuple[bool, dict]:
+        """
+        Read statuses through the local backend, recording them like remote lookups.
+        
+        Args:
+            server_config: Dictionary containing server connection details
+            load: Callable returning process information keyed by process name
+            process_name: Return only this process's information instead of the whole mapping
+        
+        Returns:
+            Tuple[bool, dict]: Success status and process information, or an error message
+        """
+        host = server_config['computer_name']
+        try:
+            with REMOTE_CALL_SECONDS.time(phase='local', host=host):
+                statuses = load()
+        except Exception as e:
+            OPERATION_FAILURES.inc(host=host)
+            return False, {'running': False, 'error': str(e)} if process_name else {'error': str(e)}
+        self._history.record(host, statuses)
+        return True, statuses[process_name] if process_name else statuses
+
+    def get_process_table(self, server_config: dict, max_age: Optional[float] = None) -> Tuple[bool, Any]:
+        """
+        Get the snapshot of every process on a server, refreshing it if needed.
+        
+        The existing snapshot is returned without contacting the server unless
+        none was taken yet or it is older than max_age. A refresh fetches the
+        whole process list in one call and merges it into the snapshot;
+        concurrent callers wait for and share a refresh in progress.
+        
+        Args:
+            server_config: Dictionary containing server connection details
+            max_age: Seconds the snapshot may be old; any age if not given
+        
+        Returns:
+            Tuple[bool, Any]: Success status and the ProcessTable, or an error message
+        """
+        host = server_config['computer_name']
+        table = self._tables.get(host.lower())
+        if table is None:
+            table = self._tables.setdefault(host.lower(), ProcessTable(host))
+        requested = time.time()
+        if table.taken is not None and (max_age is None or requested - table.taken <= max_age):
+            return True, table
+        
+        with table.refresh_lock:
+            if table.taken is not None and table.taken >= requested:
+                return True, table  # Refreshed by another caller while waiting
+            if self._is_local(server_config):
+                try:
+                    success, columns = True, self._local.process_table()
+                except Exception as e:
+                    success, columns = False, str(e)
+            else:
+                def read_table(ps):
+                    result = self._invoke(ps.add_script(PROCESS_TABLE_SCRIPT))
+                    if not result:
+                        return False, 'No process table returned from server'
+                    with REMOTE_CALL_SECONDS.time(phase='parse', host=host):
+                        return True, json.loads(result[0])
+                
+                success, columns = self._execute_with_retry(server_config, read_table)
+            if not success:
+                return False, columns
+            table.update(columns, time.time())
+        return True, table
+
+    def invalidate_status(self, server_config: dict, process_name: str):
+        """
+        Drop cached status lookups that include a process.
+        
+        Called after a process was started or stopped so the next status
+        lookup goes to the server.
+        
+        Args:
+            server_config: Dictionary containing server connection details
+            process_name: Name of the process whose status changed
+        """
+        host_key = make_session_key(server_config)
+        
+        def affected(key):
+            names = key[1] if isinstance(key[1], tuple) else (key[1],)
+            return key[0] == host_key and process_name in names
+        
+        self._status_cache.invalidate_matching(affected)
+
     def start_process(self, server_config: dict, process_config: ProcessConfig) -> Tuple[bool, str]:
         """
         Start a process using its configured start command.
         
-        Attempts to start the process and verifies that it has started successfully.
-        Includes checks to prevent starting already-running processes.
+        Attempts to start the process and waits up to the process's start_timeout
+        for it to be running. Includes checks to prevent starting already-running
+        processes.
         
         Args:
             server_config: Dictionary containing server connection details
@@ -238,30 +756,38 @@ class ProcessManager:
         Returns:
             Tuple[bool, str]: Success status and result/error message
         """
+        if self._is_local(server_config):
+            return self._local.start_process(process_config)
+
         def start_operation(ps):
             # First check if already running
-            status_success, status = self.get_process_status(server_config, process_config.name)
+            status_success, status = self._query_status(ps.runspace_pool, process_config.name,
+                                                        process_config.status_script)
             if status_success and status.get('running', False):
                 return True, f"Process {process_config.name} is already running"
             
             # Execute start command
-            ps.add_script(process_config.start_command).invoke()
+            self._invoke(ps.add_script(process_config.start_command))
             
-            # Verify process started
-            time.sleep(1)  # Give process time to start
-            status_success, status = self.get_process_status(server_config, process_config.name)
-            if status_success and status.get('running', False):
+            # Wait for the process to come up on the same session
+            started, _ = self._wait_for_state(ps.runspace_pool, process_config.name, True,
+                                              process_config.start_timeout, process_config.status_script)
+            if started:
                 return True, f"Successfully started {process_config.name}"
-            return False, f"Failed to start {process_config.name}"
+            return False, f"{process_config.name} did not start within {process_config.start_timeout}s"
             
-        return self._execute_with_retry(server_config, start_operation)
+        success, message = self._execute_with_retry(server_config, start_operation, INTERACTIVE)
+        if success:
+            self.invalidate_status(server_config, process_config.name)
+        return success, message
 
     def stop_process(self, server_config: dict, process_config: ProcessConfig) -> Tuple[bool, str]:
         """
         Stop a process using its configured stop command.
         
-        Attempts to stop the process and verifies that it has stopped successfully.
-        Includes checks to prevent stopping already-stopped processes.
+        Attempts to stop the process and waits up to the process's stop_timeout
+        for it to be gone. Includes checks to prevent stopping already-stopped
+        processes.
         
         Args:
             server_config: Dictionary containing server connection details
@@ -270,29 +796,27 @@ class ProcessManager:
         Returns:
             Tuple[bool, str]: Success status and result/error message
         """
+        if self._is_local(server_config):
+            return self._local.stop_process(process_config)
+
         def stop_operation(ps):
             # First check if actually running
-            status_success, status = self.get_process_status(server_config, process_config.name)
+            status_success, status = self._query_status(ps.runspace_pool, process_config.name,
+                                                        process_config.status_script)
             if not status_success or not status.get('running', False):
                 return True, f"Process {process_config.name} is not running"
             
             # Execute stop command
-            ps.add_script(process_config.stop_command).invoke()
+            self._invoke(ps.add_script(process_config.stop_command))
             
-            # Verify process stopped
-            time.sleep(1)  # Give process time to stop
-            status_success, status = self.get_process_status(server_config, process_config.name)
-            if status_success and not status.get('running', False):
+            # Wait for the process to go away on the same session
+            stopped, _ = self._wait_for_state(ps.runspace_pool, process_config.name, False,
+                                              process_config.stop_timeout, process_config.status_script)
+            if stopped:
                 return True, f"Successfully stopped {process_config.name}"
-            return False, f"Failed to stop {process_config.name}"
+            return False, f"{process_config.name} did not stop within {process_config.stop_timeout}s"
             
-        return self._execute_with_retry(server_config, stop_operation)
-
-    def __del__(self):
-        """
-        Cleanup method called when the ProcessManager is destroyed.
-        
-        Ensures all PowerShell sessions are properly closed and cleaned up
-        when the ProcessManager instance is garbage collected.
-        """
-        self.cleanup_all_sessions()
+        success, message = self._execute_with_retry(server_config, stop_operation, INTERACTIVE)
+        if success:
+            self.invalidate_status(server_config, process_config.name)
+        return success, message
@@ -0,0 +1,268 @@
+"""
+Process Table Module
+Indexed snapshots of every process running on a host.
+
+Looking for a process used to mean running Get-Process through /execute and
+parsing the printed objects in the browser. A ProcessTable instead holds the
+full process list of one host, fetched with a single structured remote call,
+as typed-array columns indexed by pid and by name. Refreshes are merged into
+the existing table: rows of processes that are still running are updated in
+place, new processes are appended and exited ones removed, and the CPU time
+used since the previous refresh gives each process its current CPU usage.
+Name searches (wildcards or regular expressions) and top-N queries by CPU or
+memory are answered from memory without contacting the host.
+
+Classes:
+    ProcessTable: Columnar, indexed snapshot of one host's processes
+"""
+import fnmatch
+import heapq
+import re
+from array import array
+from threading import Lock
+from typing import Any, Dict, List, Optional, Set
+
+# One remote call returning every process as JSON columns
+PROCESS_TABLE_SCRIPT = """
+    $names = [System.Collections.Generic.List[string]]::new()
+    $ids = [System.Collections.Generic.List[int]]::new()
+    $cpu = [System.Collections.Generic.List[double]]::new()
+    $memory = [System.Collections.Generic.List[long]]::new()
+    $started = [System.Collections.Generic.List[double]]::new()
+    foreach ($process in Get-Process) {
+        $names.Add($process.ProcessName)
+        $ids.Add($process.Id)
+        $cpu.Add([double]$process.CPU)
+        $memory.Add($process.WorkingSet64)
+        $start = 0
+        try {
+            if ($process.StartTime) { $start = [DateTimeOffset]::new($process.StartTime).ToUnixTimeMilliseconds() / 1000 }
+        } catch { }
+        $started.Add($start)
+    }
+    @{'name' = $names; 'pid' = $ids; 'cpu' = $cpu; 'memory' = $memory; 'start' = $started} | ConvertTo-Json -Compress
+"""
+
+SORT_KEYS = ('cpu', 'cpu_time', 'memory')
+
+
+class ProcessTable:
+    """
+    Columnar, indexed snapshot of one host's processes.
+
+    Attributes:
+        MAX_LIMIT (int): Largest number of processes a selection may ask for
+        host (str): Computer name the processes run on
+        taken (Optional[float]): Timestamp of the last refresh
+        version (int): Number of refreshes merged so far
+        refresh_lock (Lock): Held while the table is being refreshed, so concurrent
+                             callers share one remote call
+    """
+    MAX_LIMIT = 10000
+
+    def __init__(self, host: str):
+        self.host = host
+        self.taken: Optional[float] = None
+        self.version = 0
+        self.refresh_lock = Lock()
+        self._names: List[str] = []
+        self._pids = array('q')
+        self._cpu = array('d')  # CPU seconds since start
+        self._cpu_rate = array('d')  # CPU seconds per second since the previous refresh
+        self._memory = array('q')  # working set bytes
+        self._started = array('d')  # Unix timestamp, 0 if unknown
+        self._by_pid: Dict[int, int] = {}
+        self._by_name: Dict[str, Set[int]] = {}
+        self._lock = Lock()
+
+    def __len__(self) -> int:
+        return len(self._pids)
+
+    def update(self, columns: dict, taken: float) -> Dict[str, int]:
+        """
+        Merge a new process list into the table.
+
+        Args:
+            columns: Lists 'name', 'pid', 'cpu', 'memory' and 'start' of equal length
+            taken: Timestamp the process list was read at
+
+        Returns:
+            Dict[str, int]: Numbers of processes added, updated and removed
+        """
+        counts = {'added': 0, 'updated': 0, 'removed': 0}
+        elapsed = taken - self.taken if self.taken else None
+        seen = set()
+        with self._lock:
+            for name, pid, cpu, memory, started in zip(columns['name'], columns['pid'], columns['cpu'],
+                                                       columns['memory'], columns['start']):
+                cpu, memory, started = float(cpu or 0), int(memory or 0), float(started or 0)
+                seen.add(pid)
+                row = self._by_pid.get(pid)
+                if row is not None and self._started[row] == started and self._names[row] == name:
+                    if elapsed:
+                        self._cpu_rate[row] = max(cpu - self._cpu[row], 0.0) / elapsed
+                    self._cpu[row] = cpu
+                    self._memory[row] = memory
+                    counts['updated'] += 1
+                    continue
+                if row is not None:
+                    self._delete(row)  # The pid now belongs to another process
+                self._append(name, pid, cpu, memory, started)
+                counts['added'] += 1
+            for pid in [pid for pid in self._by_pid if pid not in seen]:
+                self._delete(self._by_pid[pid])
+                counts['removed'] += 1
+            self.taken = taken
+            self.version += 1
+        return counts
+
+    def _append(self, name: str, pid: int, cpu: float, memory: int, started: float):
+        """Add a row for a new process. Lock must be held."""
+        self._by_pid[pid] = len(self._pids)
+        self._by_name.setdefault(name.lower(), set()).add(pid)
+        self._names.append(name)
+        self._pids.append(pid)
+        self._cpu.append(cpu)
+        self._cpu_rate.append(0.0)
+        self._memory.append(memory)
+        self._started.append(started)
+
+    def _delete(self, row: int):
+        """Remove a row by moving the last row into its place. Lock must be held."""
+        pid, key = self._pids[row], self._names[row].lower()
+        del self._by_pid[pid]
+        pids = self._by_name[key]
+        pids.discard(pid)
+        if not pids:
+            del self._by_name[key]
+        last = len(self._pids) - 1
+        for column in (self._names, self._pids, self._cpu, self._cpu_rate, self._memory, self._started):
+            column[row] = column[last]
+            column.pop()
+        if row != last:
+            self._by_pid[self._pids[row]] = row
+
+    def _row(self, row: int) -> dict:
+        """Convert a row to dictionary format. Lock must be held."""
+        return {
+            'name': self._names[row],
+            'pid': self._pids[row],
+            'cpu_percent': round(self._cpu_rate[row] * 100, 1),
+            'cpu_time': self._cpu[row],
+            'memory': self._memory[row],
+            'start_time': self._started[row] or None
+        }
+
+    def get(self, pid: int) -> Optional[dict]:
+        """
+        Get a process by pid.
+
+        Args:
+            pid: Process ID
+
+        Returns:
+            Optional[dict]: Process details, or None if no such process
+        """
+        with self._lock:
+            row = self._by_pid.get(pid)
+            return self._row(row) if row is not None else None
+
+    def select(self, pattern: Optional[str] = None, regex: bool = False, sort: Optional[str] = None,
+               limit: Optional[int] = None) -> List[dict]:
+        """
+        Find processes by name and optionally rank them.
+
+        Args:
+            pattern: Wildcard pattern (e.g. 'sql*') or, with regex, a regular
+                     expression searched in the name; case-insensitive. All
+                     processes if not given.
+            regex: Treat pattern as a regular expression
+            sort: 'cpu' (current usage), 'cpu_time' (total CPU seconds) or 'memory'
+                  to return the largest first; by name and pid if not given
+            limit: Maximum number of processes returned, between 1 and MAX_LIMIT
+
+        Returns:
+            List[dict]: Matching processes
+
+        Raises:
+            ValueError: If the pattern is not a valid regular expression, the sort key
+                        is unknown or the limit is out of range
+        """
+        limit = self.check_limit(limit)
+        if sort is not None and sort not in SORT_KEYS:
+            raise ValueError(f'Unknown sort key {sort}, expected one of {", ".join(SORT_KEYS)}')
+        matcher = None
+        if pattern:
+            try:
+                matcher = (re.compile(pattern, re.IGNORECASE).search if regex
+                           else re.compile(fnmatch.translate(pattern.lower())).match)
+            except re.error as e:
+                raise ValueError(f'Invalid pattern {pattern}: {e}')
+
+        with self._lock:
+            if matcher is None:
+                rows = range(len(self._pids))
+            else:
+                rows = [self._by_pid[pid] for key, pids in self._by_name.items() if matcher(key) for pid in pids]
+            if sort is not None:
+                column = {'cpu': self._cpu_rate, 'cpu_time': self._cpu, 'memory': self._memory}[sort]
+                if limit is not None:
+                    rows = heapq.nlargest(limit, rows, key=column.__getitem__)
+                else:
+                    rows = sorted(rows, key=column.__getitem__, reverse=True)
+            else:
+                rows = sorted(rows, key=lambda row: (self._names[row].lower(), self._pids[row]))[:limit]
+            return [self._row(row) for row in rows]
+
+    @classmethod
+    def check_limit(cls, limit: Any, name: str = 'limit') -> Optional[int]:
+        """
+        Validate a process count given by a caller.
+
+        Args:
+            limit: Number of processes as an integer or numeric string, or None
+            name: Name of the parameter, used in the error message
+
+        Returns:
+            Optional[int]: The count, or None for no limit
+
+        Raises:
+            ValueError: If the count is not a whole number between 1 and MAX_LIMIT
+        """
+        if limit is None:
+            return None
+        try:
+            value = int(limit) if not isinstance(limit, (bool, float)) else 0
+        except (TypeError, ValueError):
+            value = 0
+        if not 0 < value <= cls.MAX_LIMIT:
+            raise ValueError(f'{name} must be a whole number between 1 and {cls.MAX_LIMIT}')
+        return value
+
+    def top(self, n: int, by: str = 'cpu') -> List[dict]:
+        """
+        Get the processes using the most CPU or memory.
+
+        Args:
+            n: Number of processes
+            by: 'cpu', 'cpu_time' or 'memory'
+
+        Returns:
+            List[dict]: Processes, largest first
+        """
+        return self.select(sort=by, limit=n)
+
+    def to_dict(self) -> dict:
+        """
+        Describe the snapshot.
+
+        Returns:
+            dict: Host, refresh time, refresh count and number of processes
+        """
+        return {
+            'host': self.host,
+            'taken': self.taken,
+            'version': self.version,
+            'processes': len(self._pids),
+            'cpu_rates': self.version > 1
+        }
@@ -0,0 +1,191 @@
+"""
+Projection Module
+Pushes property selection, filtering, sorting and row limits into remote commands.
+
+Ad-hoc commands such as Get-Service or Get-Process return wide objects; the
+whole object graph is serialized to CLIXML on the host, sent over WinRM,
+deserialized on the app host and finally flattened with str(). A Projection
+wraps the operator's command in a pipeline that filters, sorts, keeps only the
+requested properties and row count, and converts every row to compact JSON on
+the host. Only the selected data crosses the wire, each output record is a
+short string that is cheap to deserialize, and the rows reach the browser as
+typed JSON objects.
+
+Filters are given as simple comparisons ("Status -eq 'Running'",
+"CPU -gt 10") and are rendered into the script from validated parts, so a
+projection never adds code of its own to the command it wraps.
+
+Classes:
+    Projection: Validated select/where/sort/limit options and the script wrapping them
+"""
+import json
+import re
+from typing import Iterable, List, Optional, Tuple, Union
+
+_PROPERTY = re.compile(r'[A-Za-z_][A-Za-z0-9_]*(?:\.[A-Za-z_][A-Za-z0-9_]*)*')
+_CONDITION = re.compile(r'\s*(?P<property>[\w.]+)\s+-(?P<operator>[a-z]+)\s+(?P<value>.+?)\s*', re.IGNORECASE)
+_NUMBER = re.compile(r'-?\d+(?:\.\d+)?')
+OPERATORS = ('eq', 'ne', 'gt', 'ge', 'lt', 'le', 'like', 'notlike', 'match', 'notmatch')
+
+
+def _check_property(name: str, nested: bool = True) -> str:
+    """Validate a property name, allowing dotted paths into nested objects if nested."""
+    if not isinstance(name, str) or not _PROPERTY.fullmatch(name) or (not nested and '.' in name):
+        raise ValueError(f'Invalid property name {name!r}')
+    return name
+
+
+def _literal(value: str) -> str:
+    """Render a filter value as a PowerShell literal: numbers, booleans and $null as is, anything else quoted."""
+    if _NUMBER.fullmatch(value) or value.lower() in ('$true', '$false', '$null'):
+        return value
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in '\'"':
+        value = value[1:-1]
+    return "'" + value.replace("'", "''") + "'"
+
+
+class Projection:
+    """
+    Output options applied on the remote host.
+
+    Attributes:
+        MAX_LIMIT (int): Largest row limit accepted
+        DEPTH_SELECTED (int): JSON depth of rows with selected properties
+        DEPTH_ALL (int): JSON depth of whole objects, so wide objects stay shallow
+        select (Tuple[str, ...]): Properties kept in each row; all if empty
+        where (Tuple[Tuple[str, str, str], ...]): (property, operator, literal) conditions rows must all meet
+        sort (Tuple[Tuple[str, bool], ...]): (property, descending) sort keys
+        limit (Optional[int]): Maximum number of rows
+    """
+    __slots__ = ('select', 'where', 'sort', 'limit')
+
+    MAX_LIMIT = 100000
+    DEPTH_SELECTED = 2
+    DEPTH_ALL = 1
+
+    def __init__(self, select: Iterable[str] = (), where: Iterable[str] = (),
+                 sort: Iterable[str] = (), limit: Optional[int] = None):
+        """
+        Initialize a new Projection instance.
+
+        Args:
+            select: Top-level properties to keep
+            where: Conditions of the form "Property -operator value"; operators
+                   are eq, ne, gt, ge, lt, le, like, notlike, match and notmatch
+            sort: Properties to sort by, prefixed with '-' for descending order
+            limit: Maximum number of rows
+
+        Raises:
+            ValueError: If a property, condition or the limit is invalid
+        """
+        self.select = tuple(_check_property(name, nested=False) for name in select)
+        conditions = []
+        for condition in where:
+            match = _CONDITION.fullmatch(condition) if isinstance(condition, str) else None
+            if match is None:
+                raise ValueError(f'Invalid filter {condition!r}, expected "Property -operator value"')
+            operator = match.group('operator').lower()
+            if operator not in OPERATORS:
+                raise ValueError(f'Unknown filter operator -{operator}, expected one of '
+                                 f'{", ".join("-" + name for name in OPERATORS)}')
+            conditions.append((_check_property(match.group('property')), operator, _literal(match.group('value'))))
+        self.where = tuple(conditions)
+        keys = []
+        for key in sort:
+            descending = isinstance(key, str) and key.startswith('-')
+            keys.append((_check_property(key[1:] if descending else key), descending))
+        self.sort = tuple(keys)
+        if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int)
+                                  or not 0 < limit <= self.MAX_LIMIT):
+            raise ValueError(f'limit must be a whole number between 1 and {self.MAX_LIMIT}')
+        self.limit = limit
+
+    @classmethod
+    def from_request(cls, data: dict) -> Optional['Projection']:
+        """
+        Build a projection from the select, where, sort and limit fields of a request.
+
+        Each of select, where and sort may be a single string or a list of strings.
+
+        Args:
+            data: Request body
+
+        Returns:
+            Optional[Projection]: The projection, or None if the request asks for none
+
+        Raises:
+            ValueError: If an option is invalid
+        """
+        def as_list(value: Union[None, str, list]) -> List[str]:
+            if value is None:
+                return []
+            return [value] if isinstance(value, str) else list(value)
+
+        if not any(data.get(field) is not None for field in ('select', 'where', 'sort', 'limit')):
+            return None
+        limit = data.get('limit')
+        if isinstance(limit, str) and limit.isdigit():
+            limit = int(limit)
+        return cls(as_list(data.get('select')), as_list(data.get('where')), as_list(data.get('sort')), limit)
+
+    def wrap(self, command: str) -> str:
+        """
+        Wrap a command in the projection pipeline.
+
+        Args:
+            command: PowerShell command producing the objects
+
+        Returns:
+            str: Script writing one compact JSON string per row
+        """
+        stages = []
+        if self.where:
+            tests = ' -and '.join(f'($_.{name} -{operator} {value})' for name, operator, value in self.where)
+            stages.append(f'Where-Object {{ {tests} }}')
+        if self.sort:
+            keys = ', '.join(f'@{{Expression={{$_.{name}}}; Descending=${str(descending).lower()}}}'
+                             for name, descending in self.sort)
+            stages.append(f'Sort-Object -Property {keys}')
+        select = []
+        if self.limit is not None:
+            select.append(f'-First {self.limit}')
+        if self.select:
+            select.append('-Property ' + ', '.join(self.select))
+        if select:
+            stages.append('Select-Object ' + ' '.join(select))
+        depth = self.DEPTH_SELECTED if self.select else self.DEPTH_ALL
+        stages.append(f'ForEach-Object {{ ConvertTo-Json -InputObject $_ -Compress -Depth {depth} }}')
+        return '& {\n' + command + '\n} | ' + ' | '.join(stages)
+
+    @staticmethod
+    def parse_rows(lines: Iterable[str]) -> list:
+        """
+        Decode the JSON rows written by a wrapped command.
+
+        Args:
+            lines: Output lines of the wrapped command
+
+        Returns:
+            list: Decoded rows; lines that are not JSON are returned as strings
+        """
+        rows = []
+        for line in lines:
+            try:
+                rows.append(json.loads(line))
+            except ValueError:
+                rows.append(line)
+        return rows
+
+    def to_dict(self) -> dict:
+        """
+        Convert the projection to dictionary format.
+
+        Returns:
+            dict: Selected properties, filters, sort keys and limit
+        """
+        return {
+            'select': list(self.select),
+            'where': [f'{name} -{operator} {value}' for name, operator, value in self.where],
+            'sort': [('-' if descending else '') + name for name, descending in self.sort],
+            'limit': self.limit
+        }
@@ -0,0 +1,455 @@
+"""
+Result Store Module
+Keeps command output out of request memory and serves it back a page at a time.
+
+Output lines are written into the store as a command produces them. Recent
+results stay in memory up to a byte budget; anything beyond that is spilled
+to gzip-compressed files on local disk. Results are read back by ID in pages
+(offset, limit and an optional regex filter) and evicted by age and total
+size, so the memory used by command output on the app host stays predictable
+whatever operators run. Output is compressed and written to disk under a lock
+per result, never under the store-wide lock, and a command whose output would
+push the disk beyond its budget is cut off instead of growing without bound.
+
+Classes:
+    ResultTooLargeError: Raised when the disk budget has no room for more output
+    StoredResult: Metadata and in-memory or on-disk lines of one result
+    ResultWriter: Incremental writer filling a StoredResult
+    ResultStore: Budgeted store of command results
+"""
+import bisect
+import gzip
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from itertools import islice
+from threading import Lock
+from typing import Iterator, List, Optional, Tuple
+
+
+class ResultTooLargeError(Exception):
+    """Raised when a result's output no longer fits within the store's disk budget."""
+    pass
+
+
+class StoredResult:
+    """
+    A command result held by the store.
+
+    Lines live either in memory (``lines``) or in a gzip file made of one
+    member per spilled chunk, so reads can seek straight to the chunk
+    containing the requested offset.
+
+    Attributes:
+        result_id (str): Unique result identifier
+        user (str): User that ran the command
+        command (str): Command that produced the output
+        created (float): Timestamp when the result was created
+        line_count (int): Number of lines written so far
+        memory_bytes (int): Approximate bytes held in memory
+        disk_bytes (int): Compressed bytes written to disk
+        complete (bool): True once the writer was closed
+        truncated (bool): True if output was cut off because the disk budget was exhausted
+        write_lock (Lock): Serialises spilling and disk writes of this result
+    """
+    def __init__(self, user: str, command: str):
+        self.result_id = uuid.uuid4().hex
+        self.user = user
+        self.command = command
+        self.created = time.time()
+        self.line_count = 0
+        self.memory_bytes = 0
+        self.disk_bytes = 0
+        self.complete = False
+        self.truncated = False
+        self.write_lock = Lock()
+        self.lines: Optional[List[str]] = []
+        self.path: Optional[str] = None
+        self.chunk_offsets: List[int] = []  # file offset of each gzip member
+        self.chunk_first_lines: List[int] = []  # index of the first line in each member
+
+    @property
+    def on_disk(self) -> bool:
+        """True once the result has been spilled to disk."""
+        return self.lines is None
+
+    def to_dict(self) -> dict:
+        """
+        Convert the result metadata to dictionary format.
+
+        Returns:
+            dict: Result metadata without its lines
+        """
+        return {
+            'result_id': self.result_id,
+            'user': self.user,
+            'command': self.command,
+            'created': self.created,
+            'total_lines': self.line_count,
+            'complete': self.complete,
+            'truncated': self.truncated,
+            'on_disk': self.on_disk
+        }
+
+
+class ResultWriter:
+    """
+    Writes lines into a StoredResult in chunks.
+
+    Attributes:
+        result (StoredResult): Result being written
+    """
+    def __init__(self, store: 'ResultStore', result: StoredResult):
+        self.store = store
+        self.result = result
+        self._buffer: List[str] = []
+
+    @property
+    def result_id(self) -> str:
+        """ID of the result being written."""
+        return self.result.result_id
+
+    def append(self, line: str):
+        """
+        Append one line of output.
+
+        Args:
+            line: Output line
+
+        Raises:
+            ResultTooLargeError: If the disk budget has no room left for the output
+        """
+        self._buffer.append(line)
+        if len(self._buffer) >= self.store.CHUNK_LINES:
+            self.flush()
+
+    def flush(self):
+        """Commit buffered lines to the store."""
+        if self._buffer:
+            self.store._commit(self.result, self._buffer)
+            self._buffer = []
+
+    def close(self):
+        """Commit remaining lines and mark the result complete."""
+        self.flush()
+        self.store._complete(self.result)
+
+    def __enter__(self) -> 'ResultWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ResultStore:
+    """
+    Store of command results with memory and disk budgets.
+
+    Attributes:
+        CHUNK_LINES (int): Lines committed at once and per gzip member on disk
+        MEMORY_BUDGET (int): Bytes of output kept in memory across all results
+        DISK_BUDGET (int): Compressed bytes of output kept on disk across all results
+        MAX_AGE (int): Seconds a finished result is kept
+        MAX_RESULTS (int): Maximum number of results kept
+        DEFAULT_PAGE_SIZE (int): Lines returned per page when no limit is given
+        MAX_PAGE_SIZE (int): Largest page that can be requested
+    """
+    CHUNK_LINES = 1000
+    MEMORY_BUDGET = 64 * 1024 * 1024  # 64 MB
+    DISK_BUDGET = 1024 * 1024 * 1024  # 1 GB
+    MAX_AGE = 3600  # 1 hour
+    MAX_RESULTS = 200
+    DEFAULT_PAGE_SIZE = 500
+    MAX_PAGE_SIZE = 5000
+
+    def __init__(self, directory: Optional[str] = None, memory_budget: int = MEMORY_BUDGET,
+                 disk_budget: int = DISK_BUDGET, max_age: float = MAX_AGE):
+        """
+        Initialize a new ResultStore instance.
+
+        Args:
+            directory: Directory for spilled results (defaults to a folder in the system temp dir)
+            memory_budget: Bytes of output kept in memory across all results
+            disk_budget: Compressed bytes of output kept on disk across all results
+            max_age: Seconds a finished result is kept
+        """
+        self.directory = directory or os.path.join(tempfile.gettempdir(), 'devops_eap_results')
+        os.makedirs(self.directory, exist_ok=True)
+        self.memory_budget = memory_budget
+        self.disk_budget = disk_budget
+        self.max_age = max_age
+        self._results: 'OrderedDict[str, StoredResult]' = OrderedDict()
+        self._memory_bytes = 0
+        self._disk_bytes = 0
+        self._lock = Lock()
+
+    def create(self, user: str, command: str) -> ResultWriter:
+        """
+        Create a new result and return a writer for it.
+
+        Args:
+            user: User running the command
+            command: Command producing the output
+
+        Returns:
+            ResultWriter: Writer to append output lines to
+        """
+        result = StoredResult(user, command)
+        with self._lock:
+            self._results[result.result_id] = result
+            spills = self._evict()
+        self._spill_all(spills)
+        return ResultWriter(self, result)
+
+    def get(self, result_id: str) -> Optional[StoredResult]:
+        """
+        Get a result's metadata by ID.
+
+        Args:
+            result_id: Result identifier
+
+        Returns:
+            Optional[StoredResult]: The result, or None if unknown or evicted
+        """
+        with self._lock:
+            return self._results.get(result_id)
+
+    def read(self, result_id: str, offset: int = 0, limit: Optional[int] = None,
+             pattern: Optional[str] = None) -> Tuple[List[str], Optional[int], int]:
+        """
+        Read a page of lines from a result.
+
+        When a pattern is given, offset and limit apply to the matching lines.
+
+        Args:
+            result_id: Result identifier
+            offset: Index of the first line to return
+            limit: Maximum number of lines to return
+            pattern: Optional regular expression lines must match
+
+        Returns:
+            Tuple[List[str], Optional[int], int]: The lines, the offset of the
+                next page (None at the end) and the total number of lines
+
+        Raises:
+            KeyError: If the result is unknown or was evicted
+            re.error: If the pattern is not a valid regular expression
+        """
+        limit = min(limit or self.DEFAULT_PAGE_SIZE, self.MAX_PAGE_SIZE)
+        offset = max(offset, 0)
+        matcher = re.compile(pattern) if pattern else None
+
+        with self._lock:
+            result = self._results.get(result_id)
+            if result is None:
+                raise KeyError(result_id)
+            total = result.line_count
+            if not result.on_disk:
+                # Committed lines are only ever appended to, so the first
+                # `total` lines can be scanned safely after releasing the lock
+                if matcher is None:
+                    lines = result.lines[offset:min(offset + limit + 1, total)]
+                    return self._page(lines, offset, limit, total)
+                source = islice(result.lines, total)
+            else:
+                source = None
+
+        if source is None:
+            start = 0 if matcher else offset
+            source = self._read_from_disk(result, start, total)
+            if matcher is None:
+                lines = [line for _, line in zip(range(limit + 1), source)]
+                return self._page(lines, offset, limit, total)
+
+        matched = (line for line in source if matcher.search(line))
+        for _ in range(offset):
+            if next(matched, None) is None:
+                return [], None, total
+        lines = [line for _, line in zip(range(limit + 1), matched)]
+        return self._page(lines, offset, limit, total)
+
+    def _page(self, lines: List[str], offset: int, limit: int, total: int) -> Tuple[List[str], Optional[int], int]:
+        """Trim a page read with one extra line and work out the next offset."""
+        if len(lines) > limit:
+            return lines[:limit], offset + limit, total
+        return lines, None, total
+
+    def _read_from_disk(self, result: StoredResult, start: int, total: int) -> Iterator[str]:
+        """Yield lines of a spilled result starting at a line index."""
+        member = max(bisect.bisect_right(result.chunk_first_lines, start) - 1, 0)
+        if not result.chunk_offsets:
+            return
+        index = result.chunk_first_lines[member]
+        with open(result.path, 'rb') as raw:
+            raw.seek(result.chunk_offsets[member])
+            with gzip.GzipFile(fileobj=raw) as compressed:
+                try:
+                    for encoded in compressed:
+                        if index >= total:
+                            return
+                        if index >= start:
+                            yield json.loads(encoded)
+                        index += 1
+                except EOFError:
+                    return  # Reached a member that is still being written
+
+    def _move_to_disk(self, result: StoredResult, lines: List[str], first_line: int) -> bool:
+        """
+        Append lines to a result's file as gzip members of CHUNK_LINES lines.
+
+        The caller holds the result's write lock but not the store lock. The
+        lines are compressed and written without the store lock; room for them
+        is reserved against the disk budget first, evicting complete results
+        if needed. Once written, lines still held in memory are released.
+
+        Args:
+            result: Result being written
+            lines: Lines starting at line index first_line, up to the end of the result
+            first_line: Index of the first line
+
+        Returns:
+            bool: False if the disk budget has no room left for the lines
+        """
+        chunks = [(first_line + start, gzip.compress(
+                      ''.join(json.dumps(line) + '\n' for line in lines[start:start + self.CHUNK_LINES])
+                      .encode('utf-8')))
+                  for start in range(0, len(lines), self.CHUNK_LINES)]
+        size = sum(len(data) for _, data in chunks)
+        with self._lock:
+            self._evict(reserve=size)
+            if result.result_id not in self._results:
+                return True  # Evicted while still being written
+            if self._disk_bytes + size > self.disk_budget:
+                return False
+            result.disk_bytes += size
+            self._disk_bytes += size
+            if result.path is None:
+                result.path = os.path.join(self.directory, f"{result.result_id}.jsonl.gz")
+
+        offsets = []
+        with open(result.path, 'ab') as f:
+            for _, data in chunks:
+                offsets.append(f.tell())
+                f.write(data)
+
+        with self._lock:
+            if result.result_id not in self._results:
+                self._delete_file(result.path)  # Removed during the write, which recreated the file
+                return True
+            result.chunk_offsets.extend(offsets)
+            result.chunk_first_lines.extend(index for index, _ in chunks)
+            result.line_count = first_line + len(lines)
+            if not result.on_disk:
+                self._memory_bytes -= result.memory_bytes
+                result.memory_bytes = 0
+                result.lines = None
+        return True
+
+    def _spill(self, result: StoredResult):
+        """Move a result's in-memory lines to disk, if the disk budget has room for them."""
+        with result.write_lock:
+            with self._lock:
+                if result.on_disk or result.result_id not in self._results:
+                    return
+                # Lines are only appended under the write lock, so the list is stable
+                lines = result.lines
+            self._move_to_disk(result, lines, 0)
+
+    def _spill_all(self, results: List[StoredResult]):
+        """Spill results chosen by _evict. Neither the store lock nor a write lock may be held."""
+        for result in results:
+            self._spill(result)
+
+    def _commit(self, result: StoredResult, lines: List[str]):
+        """
+        Add a chunk of lines to a result, spilling it to disk when memory is over budget.
+
+        Raises:
+            ResultTooLargeError: If the disk budget has no room left for the result's output
+        """
+        size = sum(len(line) for line in lines)
+        with result.write_lock:
+            with self._lock:
+                if result.result_id not in self._results or result.truncated:
+                    return  # Evicted or cut off while still being written
+                if not result.on_disk:
+                    if self._memory_bytes + size <= self.memory_budget:
+                        result.lines.extend(lines)
+                        result.line_count += len(lines)
+                        result.memory_bytes += size
+                        self._memory_bytes += size
+                        return
+                    pending, first_line = result.lines + lines, 0
+                else:
+                    pending, first_line = lines, result.line_count
+            if not self._move_to_disk(result, pending, first_line):
+                with self._lock:
+                    result.truncated = True
+                raise ResultTooLargeError(
+                    f"Output exceeds the disk budget of {self.disk_budget} bytes, "
+                    f"truncated after {result.line_count} lines")
+
+    def _complete(self, result: StoredResult):
+        """Mark a result as fully written."""
+        with self._lock:
+            result.complete = True
+            spills = self._evict()
+        self._spill_all(spills)
+
+    @staticmethod
+    def _delete_file(path: str):
+        """Delete a result file if it exists."""
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Already gone
+
+    def _remove(self, result_id: str):
+        """Forget a result and delete its file. Lock must be held."""
+        result = self._results.pop(result_id)
+        self._memory_bytes -= result.memory_bytes
+        self._disk_bytes -= result.disk_bytes
+        if result.path:
+            self._delete_file(result.path)
+
+    def _evict(self, reserve: int = 0) -> List[StoredResult]:
+        """
+        Drop old results and the oldest complete ones beyond the budgets. Lock must be held.
+
+        Args:
+            reserve: Compressed bytes about to be written that must fit within the disk budget
+
+        Returns:
+            List[StoredResult]: In-memory results to spill with _spill_all once the lock is released
+        """
+        now = time.time()
+        for result_id, result in list(self._results.items()):
+            over_budget = (self._disk_bytes + reserve > self.disk_budget or
+                           len(self._results) > self.MAX_RESULTS)
+            if result.complete and (over_budget or now - result.created > self.max_age):
+                self._remove(result_id)
+        spills = []
+        memory_bytes = self._memory_bytes
+        for result in self._results.values():
+            if memory_bytes <= self.memory_budget:
+                break
+            if not result.on_disk and not result.truncated:
+                spills.append(result)
+                memory_bytes -= result.memory_bytes
+        return spills
+
+    def evict(self):
+        """Drop expired results and enforce the memory and disk budgets."""
+        with self._lock:
+            spills = self._evict()
+        self._spill_all(spills)
+
+    def clear(self):
+        """Drop every result and delete all spilled files."""
+        with self._lock:
+            for result_id in list(self._results.keys()):
+                self._remove(result_id)
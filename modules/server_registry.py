@@ -0,0 +1,232 @@
+"""
+Server Registry Module
+Loads server definitions from a JSON file into precompiled, read-only objects.
+
+Every request used to look servers up in a mutable dictionary, copy the entry
+and format the username. The registry instead parses the file once into
+ServerConfig objects holding ready-made ProcessConfig instances, a
+pre-rendered batch status script and per-user connection details, indexed by
+display name and by computer name. When the file's modification time changes
+the whole registry is rebuilt and swapped in with a single assignment, so
+in-flight requests keep using the snapshot they started with and a broken
+file never replaces a working configuration.
+
+Classes:
+    ServerConfig: Precompiled, read-only definition of one server
+    RegistrySnapshot: Immutable set of servers loaded from one version of the file
+    ServerRegistry: Hot-reloading access point to the current snapshot
+"""
+import json
+import os
+import time
+from threading import Lock
+from types import MappingProxyType
+from typing import Dict, Mapping, Optional, Tuple
+from modules.dependency_graph import DependencyGraph
+from modules.process_manager import ProcessConfig, build_batch_status_script
+
+
+class ServerConfig:
+    """
+    Precompiled, read-only definition of one server.
+
+    Attributes:
+        name (str): Display name of the server
+        computer_name (str): Host name used to connect
+        processes (Mapping[str, ProcessConfig]): Process configurations keyed by process name
+        process_names (Tuple[str, ...]): Process names in file order
+        batch_status_script (str): Pre-rendered script reporting the status of every process
+        max_parallel_operations (Optional[int]): Bulk start/stop actions run at once on this server
+        per_user (bool): True if the username contains {user}, so every operator has their own sessions
+    """
+    __slots__ = ('name', 'computer_name', 'processes', 'process_names', 'batch_status_script',
+                 'max_parallel_operations', 'per_user', '_connection', '_user_connections')
+
+    def __init__(self, name: str, config: dict):
+        """
+        Initialize a new ServerConfig instance.
+
+        Args:
+            name: Display name of the server
+            config: Server entry from the registry file
+
+        Raises:
+            ValueError: If the entry is missing required fields
+        """
+        if not isinstance(config, dict) or not config.get('computer_name'):
+            raise ValueError(f'Server {name} has no computer_name')
+        processes = config.get('processes') or {}
+        if not isinstance(processes, dict):
+            raise ValueError(f'Processes of server {name} must be an object')
+
+        self.name = name
+        self.computer_name = config['computer_name']
+        self.processes: Mapping[str, ProcessConfig] = MappingProxyType(
+            {process_name: ProcessConfig.from_dict(process_name, process or {})
+             for process_name, process in processes.items()})
+        self.process_names: Tuple[str, ...] = tuple(processes.keys())
+        self.batch_status_script = build_batch_status_script(self.process_names) if self.process_names else ''
+        self.max_parallel_operations = config.get('max_parallel_operations')
+        self.per_user = '{user}' in (config.get('username') or '')
+        self._connection = {key: value for key, value in config.items() if key != 'processes'}
+        self._user_connections: Dict[str, dict] = {}
+
+    def connection_for(self, user: str) -> dict:
+        """
+        Get the connection details for a user, with {user} in the username resolved.
+
+        The dictionary is built once per user and shared afterwards; callers
+        must treat it as read-only.
+
+        Args:
+            user: Name of the logged in user
+
+        Returns:
+            dict: Connection details (computer_name, username, ssl, pool settings...)
+        """
+        connection = self._user_connections.get(user)
+        if connection is None:
+            connection = dict(self._connection)
+            if connection.get('username'):
+                connection['username'] = connection['username'].format(user=user)
+            connection = self._user_connections.setdefault(user, connection)
+        return connection
+
+
+class RegistrySnapshot:
+    """
+    Immutable set of servers loaded from one version of the registry file.
+
+    Attributes:
+        servers (Mapping[str, ServerConfig]): Servers keyed by display name
+        names (Tuple[str, ...]): Display names in file order
+        dependencies (DependencyGraph): Validated dependencies between the processes of all servers
+        mtime (float): Modification time of the file the snapshot was loaded from
+        version (int): Number of the load that produced the snapshot
+    """
+    __slots__ = ('servers', 'names', 'dependencies', 'mtime', 'version')
+
+    def __init__(self, servers: Dict[str, ServerConfig], mtime: float, version: int):
+        """
+        Initialize a new RegistrySnapshot instance.
+
+        Args:
+            servers: Servers keyed by display name
+            mtime: Modification time of the file
+            version: Number of the load producing the snapshot
+
+        Raises:
+            ValueError: If process dependencies are unknown or form a cycle
+        """
+        self.servers: Mapping[str, ServerConfig] = MappingProxyType(servers)
+        self.names: Tuple[str, ...] = tuple(servers.keys())
+        self.dependencies = DependencyGraph(self.servers)
+        self.mtime = mtime
+        self.version = version
+
+
+class ServerRegistry:
+    """
+    Hot-reloading registry of server definitions.
+
+    Lookups read the current snapshot without locking. At most once per
+    check interval a lookup also stats the file; if its modification time
+    changed, one caller rebuilds the snapshot while the others keep using the
+    current one.
+
+    Attributes:
+        RELOAD_CHECK_INTERVAL (float): Default seconds between modification time checks
+        path (str): Path of the registry file
+        last_error (Optional[str]): Why the most recent reload failed, if it did
+    """
+    RELOAD_CHECK_INTERVAL = 1.0  # seconds
+
+    def __init__(self, path: str, check_interval: float = RELOAD_CHECK_INTERVAL):
+        """
+        Initialize a new ServerRegistry instance and load the file.
+
+        Args:
+            path: Path of the JSON registry file
+            check_interval: Seconds between modification time checks
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If the file is not a valid registry
+        """
+        self.path = path
+        self.check_interval = check_interval
+        self.last_error: Optional[str] = None
+        self._next_check = 0.0
+        self._reload_lock = Lock()
+        self._snapshot = self._load(0)
+
+    @property
+    def snapshot(self) -> RegistrySnapshot:
+        """The current snapshot, reloaded first if the file changed."""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.check_interval
+            self.reload()
+        return self._snapshot
+
+    def get(self, name: str) -> Optional[ServerConfig]:
+        """
+        Get a server by display name.
+
+        Args:
+            name: Display name of the server
+
+        Returns:
+            Optional[ServerConfig]: The server, or None if not configured
+        """
+        return self.snapshot.servers.get(name)
+
+    def names(self) -> Tuple[str, ...]:
+        """Get the display names of all servers in file order."""
+        return self.snapshot.names
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.snapshot.servers
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Reload the file if its modification time changed.
+
+        A file that cannot be read or parsed leaves the current snapshot in
+        place and is reported through last_error.
+
+        Args:
+            force: Reload even if the modification time is unchanged
+
+        Returns:
+            bool: True if a new snapshot was swapped in
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return False  # Another caller is already reloading
+        try:
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError as e:
+                self.last_error = str(e)
+                return False
+            if not force and mtime == self._snapshot.mtime:
+                return False
+            try:
+                self._snapshot = self._load(self._snapshot.version + 1)
+            except (OSError, ValueError) as e:
+                self.last_error = f'Keeping version {self._snapshot.version}: {e}'
+                return False
+            self.last_error = None
+            return True
+        finally:
+            self._reload_lock.release()
+
+    def _load(self, version: int) -> RegistrySnapshot:
+        """Parse the file into a new snapshot."""
+        mtime = os.stat(self.path).st_mtime
+        with open(self.path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError('Server registry must be a JSON object keyed by server name')
+        servers = {name: ServerConfig(name, config) for name, config in data.items()}
+        return RegistrySnapshot(servers, mtime, version)
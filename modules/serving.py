@@ -0,0 +1,287 @@
+"""
+Serving Module
+Production HTTP server for the application.
+
+The Flask development server starts a new thread for every connection with no
+upper bound and stops abruptly on Ctrl+C, abandoning remote PowerShell calls
+half way. This module serves the WSGI app on a fixed pool of worker threads
+with a bounded queue of accepted connections (further connections get an
+immediate 503), HTTP/1.1 keep-alive with an idle timeout, and optionally
+several pre-forked worker processes sharing one listening socket. On SIGTERM
+or SIGINT the server stops accepting connections, lets in-flight requests
+finish within a drain timeout and then runs a shutdown callback that stops
+background work and closes pooled sessions.
+
+Classes:
+    PooledWSGIServer: WSGI server handling connections on a bounded worker thread pool
+    ProductionServer: Runs one or more pooled server processes with graceful drain
+"""
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+_REJECT_RESPONSE = (b'HTTP/1.1 503 Service Unavailable\r\n'
+                    b'Retry-After: 1\r\n'
+                    b'Content-Length: 0\r\n'
+                    b'Connection: close\r\n\r\n')
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """
+    WSGI server handling connections on a fixed pool of worker threads.
+
+    Long-lived responses such as status event streams hold their thread for as
+    long as the client stays connected; the app caps them below ``threads``
+    (SERVING_CONFIG['MAX_STREAMS']) so they cannot take the whole pool.
+
+    Attributes:
+        threads (int): Number of worker threads
+        max_queue (int): Accepted connections allowed to wait for a free thread
+        active (int): Connections currently queued or being handled
+    """
+    multithread = True
+
+    def __init__(self, host: str, port: int, app, threads: int, max_queue: int,
+                 keepalive_timeout: float, fd: Optional[int] = None, multiprocess: bool = False):
+        """
+        Initialize a new PooledWSGIServer instance.
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on
+            app: WSGI application
+            threads: Number of worker threads
+            max_queue: Accepted connections allowed to wait for a free thread
+            keepalive_timeout: Seconds an idle keep-alive connection is kept open
+            fd: Already listening socket to serve on (used by pre-forked workers)
+            multiprocess: Whether other processes serve the same socket
+        """
+        handler = type('KeepAliveRequestHandler', (WSGIRequestHandler,),
+                       {'protocol_version': 'HTTP/1.1', 'timeout': keepalive_timeout})
+        self.multiprocess = multiprocess
+        self.request_queue_size = max_queue
+        super().__init__(host, port, app, handler=handler, fd=fd)
+        self.threads = threads
+        self.max_queue = max_queue
+        self.active = 0
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='http')
+        self._idle = threading.Condition()
+
+    def process_request(self, request, client_address):
+        """Queue a connection for a worker thread, or reject it if the queue is full."""
+        with self._idle:
+            if self.active >= self.threads + self.max_queue:
+                rejected = True
+            else:
+                rejected = False
+                self.active += 1
+        if rejected:
+            try:
+                request.sendall(_REJECT_RESPONSE)
+            except OSError:
+                pass  # Client already gone
+            self.shutdown_request(request)
+            return
+        self._executor.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address):
+        """Handle a connection on a worker thread."""
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            with self._idle:
+                self.active -= 1
+                if self.active == 0:
+                    self._idle.notify_all()
+
+    def drain(self, timeout: float) -> bool:
+        """
+        Wait for queued and in-flight connections to finish.
+
+        Args:
+            timeout: Seconds to wait at most
+
+        Returns:
+            bool: True if every connection finished in time
+        """
+        deadline = time.monotonic() + timeout
+        with self._idle:
+            while self.active:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._idle.wait(remaining)
+            drained = self.active == 0
+        self._executor.shutdown(wait=drained, cancel_futures=True)
+        return drained
+
+
+class ProductionServer:
+    """
+    Runs the application on pooled WSGI servers with graceful drain.
+
+    With a single worker the server runs in the current process. With more,
+    the parent binds the socket, forks the workers, forwards shutdown signals
+    to them and restarts workers that exit unexpectedly. Each worker process
+    has its own copy of the application state.
+
+    Attributes:
+        DEFAULT_WORKERS (int): Default number of worker processes
+        DEFAULT_THREADS (int): Default number of request threads per worker
+        DEFAULT_MAX_QUEUE (int): Default number of connections waiting for a thread
+        DEFAULT_KEEPALIVE_TIMEOUT (float): Default idle keep-alive timeout in seconds
+        DEFAULT_DRAIN_TIMEOUT (float): Default seconds to wait for in-flight work on shutdown
+    """
+    DEFAULT_WORKERS = 1
+    DEFAULT_THREADS = 16
+    DEFAULT_MAX_QUEUE = 64
+    DEFAULT_KEEPALIVE_TIMEOUT = 5  # seconds
+    DEFAULT_DRAIN_TIMEOUT = 30  # seconds
+
+    def __init__(self, app, host: str, port: int, workers: int = DEFAULT_WORKERS,
+                 threads: int = DEFAULT_THREADS, max_queue: int = DEFAULT_MAX_QUEUE,
+                 keepalive_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+                 drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+                 on_start: Optional[Callable[[], None]] = None,
+                 before_drain: Optional[Callable[[], None]] = None,
+                 on_shutdown: Optional[Callable[[float], None]] = None):
+        """
+        Initialize a new ProductionServer instance.
+
+        Args:
+            app: WSGI application
+            host: Interface to listen on
+            port: Port to listen on
+            workers: Number of worker processes
+            threads: Number of request threads per worker
+            max_queue: Connections allowed to wait for a thread per worker
+            keepalive_timeout: Seconds an idle keep-alive connection is kept open
+            drain_timeout: Seconds to wait for in-flight requests on shutdown
+            on_start: Called in each worker before it starts serving, to start
+                      background threads after the fork
+            before_drain: Called in each worker once it stops accepting connections,
+                          to end long-lived responses such as event streams
+            on_shutdown: Called in each worker after draining, with the remaining
+                         drain time, to stop background work and close sessions
+        """
+        self.app = app
+        self.host = host
+        self.port = port
+        self.workers = max(workers, 1)
+        self.threads = threads
+        self.max_queue = max_queue
+        self.keepalive_timeout = keepalive_timeout
+        self.drain_timeout = drain_timeout
+        self.on_start = on_start
+        self.before_drain = before_drain
+        self.on_shutdown = on_shutdown
+        self._stopping = False
+
+    @classmethod
+    def from_config(cls, app, network_config: dict, serving_config: dict,
+                    on_start: Optional[Callable[[], None]] = None,
+                    before_drain: Optional[Callable[[], None]] = None,
+                    on_shutdown: Optional[Callable[[float], None]] = None) -> 'ProductionServer':
+        """
+        Create a server from the network and serving configuration.
+
+        Args:
+            app: WSGI application
+            network_config: NETWORK_CONFIG with HOST and PORT
+            serving_config: SERVING_CONFIG with worker, queue and timeout settings
+            on_start: Start callback, see __init__
+            before_drain: Drain callback, see __init__
+            on_shutdown: Shutdown callback, see __init__
+
+        Returns:
+            ProductionServer: New server instance
+        """
+        return cls(app, network_config['HOST'], network_config['PORT'],
+                   workers=serving_config.get('WORKERS', cls.DEFAULT_WORKERS),
+                   threads=serving_config.get('THREADS', cls.DEFAULT_THREADS),
+                   max_queue=serving_config.get('MAX_QUEUE', cls.DEFAULT_MAX_QUEUE),
+                   keepalive_timeout=serving_config.get('KEEPALIVE_TIMEOUT', cls.DEFAULT_KEEPALIVE_TIMEOUT),
+                   drain_timeout=serving_config.get('DRAIN_TIMEOUT', cls.DEFAULT_DRAIN_TIMEOUT),
+                   on_start=on_start,
+                   before_drain=before_drain,
+                   on_shutdown=on_shutdown)
+
+    def serve_forever(self):
+        """Serve requests until SIGTERM or SIGINT, then drain and shut down."""
+        if self.workers == 1:
+            self._serve_worker(fd=None)
+            return
+
+        listener = socket.create_server((self.host, self.port), backlog=self.max_queue)
+        children: Dict[int, int] = {}
+
+        def spawn(index: int):
+            pid = os.fork()
+            if pid == 0:
+                try:
+                    self._serve_worker(fd=listener.fileno())
+                finally:
+                    os._exit(0)
+            children[pid] = index
+
+        def stop(signum, frame):
+            self._stopping = True
+            for pid in list(children):
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        for index in range(self.workers):
+            spawn(index)
+        print(f'Serving on http://{self.host}:{self.port} with {self.workers} workers '
+              f'x {self.threads} threads', file=sys.stderr)
+
+        while children:
+            try:
+                pid, _ = os.wait()
+            except ChildProcessError:
+                break
+            except InterruptedError:
+                continue
+            index = children.pop(pid, None)
+            if index is not None and not self._stopping:
+                spawn(index)  # Replace a worker that died unexpectedly
+        listener.close()
+
+    def _serve_worker(self, fd: Optional[int]):
+        """Run one pooled server until signalled, then drain and call the shutdown hook."""
+        server = PooledWSGIServer(self.host, self.port, self.app, self.threads, self.max_queue,
+                                  self.keepalive_timeout, fd=fd, multiprocess=self.workers > 1)
+
+        def stop(signum, frame):
+            # shutdown() blocks until serve_forever returns, so call it from another thread
+            threading.Thread(target=server.shutdown, daemon=True).start()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        if self.on_start is not None:
+            self.on_start()
+        if fd is None:
+            print(f'Serving on http://{self.host}:{server.port} with {self.threads} threads', file=sys.stderr)
+
+        server.serve_forever()
+        started = time.monotonic()
+        if self.before_drain is not None:
+            self.before_drain()
+        drained = server.drain(self.drain_timeout)
+        if not drained:
+            print(f'Shutting down with {server.active} requests still running', file=sys.stderr)
+        if self.on_shutdown is not None:
+            self.on_shutdown(max(self.drain_timeout - (time.monotonic() - started), 0))
@@ -0,0 +1,697 @@
+"""
+Session Pool Module
+Provides an application-wide pool of PowerShell RunspacePool sessions.
+
+Opening a WinRM connection and a RunspacePool costs a full handshake, so this
+module keeps opened sessions around and hands them out to callers that need to
+run PowerShell against a host. Sessions are grouped by host and credentials,
+checked for health before being handed out and closed once they sit idle for
+too long; a background sweeper closes idle sessions even on hosts nobody
+calls any more and exports the pool sizes as metrics.
+
+Each RunspacePool is opened with the server's ``max_runspaces`` runspaces and
+is leased to that many callers at once, each running its own pipeline, so
+parallel work against one host shares a single WinRM shell. Every host has its
+own lock, so opening or waiting for sessions on one host never blocks another.
+
+Classes:
+    ConcurrentRunspacePool: RunspacePool safe to run several pipelines on from different threads
+    PooledSession: An opened RunspacePool together with its lease count and timestamps
+    HostPool: The set of sessions opened for a single host/credential key
+    SessionPool: Application-wide pool of sessions across all hosts
+"""
+import hashlib
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from threading import Condition, Event, Lock, Thread
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from pypsrp.complex_objects import RunspacePoolState
+from pypsrp.powershell import Fragmenter, RunspacePool
+from pypsrp.wsman import WSMan
+from modules.metrics import POOL_EVENTS, POOL_SESSIONS, REMOTE_CALL_SECONDS
+
+# Runspaces opened per RunspacePool unless the server sets max_runspaces
+DEFAULT_MAX_RUNSPACES = 4
+
+
+def make_session_key(server_config: dict) -> str:
+    """
+    Build the pool key for a server configuration.
+
+    Sessions are keyed per host and per user, so two operators never share a
+    session opened with the other's credentials. Passwords are hashed so they
+    never end up in the key itself.
+
+    Args:
+        server_config: Dictionary containing server connection details
+                     (computer_name, username, password, ssl)
+
+    Returns:
+        str: Unique key for the host/credential combination
+    """
+    key = f"{server_config['computer_name']}_{server_config.get('username') or 'local'}"
+    password = server_config.get('password')
+    if password:
+        key += '_' + hashlib.sha256(password.encode('utf-8')).hexdigest()[:16]
+    return key
+
+
+class _LockedFragmenter(Fragmenter):
+    """Fragmenter whose message counter and reassembly buffer are shared safely between threads."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._lock = Lock()
+
+    def fragment(self, *args, **kwargs):
+        with self._lock:
+            return super().fragment(*args, **kwargs)
+
+    def fragment_multiple(self, *args, **kwargs):
+        with self._lock:
+            return super().fragment_multiple(*args, **kwargs)
+
+    def defragment(self, *args, **kwargs):
+        with self._lock:
+            return super().defragment(*args, **kwargs)
+
+
+class ConcurrentRunspacePool(RunspacePool):
+    """
+    RunspacePool that several threads can run pipelines on at once.
+
+    Each pipeline sends and receives on its own command ID, and the HTTP
+    requests themselves run in parallel. Only the state shared by all
+    pipelines (the fragment counter, the reassembly buffer and the handling
+    of received messages) is serialized.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._fragmenter = _LockedFragmenter(self.connection.max_payload_size, self._serializer)
+        self._response_lock = Lock()
+
+    def _parse_responses(self, *args, **kwargs):
+        with self._response_lock:
+            return super()._parse_responses(*args, **kwargs)
+
+
+def open_runspace_pool(server_config: dict) -> RunspacePool:
+    """
+    Open a new RunspacePool for a server configuration.
+
+    The pool gets the server's ``max_runspaces`` runspaces (DEFAULT_MAX_RUNSPACES
+    if not set) so that many pipelines can run on it at once.
+
+    Args:
+        server_config: Dictionary containing server connection details
+
+    Returns:
+        RunspacePool: Opened PowerShell runspace pool
+    """
+    host = server_config['computer_name']
+    with REMOTE_CALL_SECONDS.time(phase='wsman', host=host):
+        wsman = WSMan(host,
+                      username=server_config.get('username'),
+                      password=server_config.get('password'),
+                      ssl=server_config.get('ssl', False))
+    pool = ConcurrentRunspacePool(wsman, max_runspaces=server_config.get('max_runspaces', DEFAULT_MAX_RUNSPACES))
+    with REMOTE_CALL_SECONDS.time(phase='runspace_open', host=host):
+        pool.open()
+    return pool
+
+
+def pipeline_capacity(pool: RunspacePool) -> int:
+    """
+    Get the number of pipelines that may run on an opened runspace pool at once.
+
+    Connections using WinRM message encryption (HTTP with NTLM, Kerberos or
+    CredSSP) number every encrypted message in sequence, so pipelines on them
+    must not overlap, and a plain pypsrp RunspacePool is not safe to share
+    between threads; both get a capacity of 1. Otherwise the capacity is the
+    pool's number of runspaces.
+
+    Args:
+        pool: Opened runspace pool
+
+    Returns:
+        int: Number of callers the session can be leased to at once
+    """
+    if isinstance(pool, RunspacePool):
+        if not isinstance(pool, ConcurrentRunspacePool) or pool.connection.transport.wrap_required:
+            return 1
+    return max(getattr(pool, 'max_runspaces', 1), 1)
+
+
+class PooledSession:
+    """
+    An opened RunspacePool tracked by the session pool.
+
+    Attributes:
+        pool (RunspacePool): The opened PowerShell runspace pool
+        owner (HostPool): Host pool the session belongs to
+        capacity (int): Number of callers the session can be leased to at once
+        leases (int): Number of callers currently running pipelines on the session
+        retired (bool): Set once the session must not be handed out again; it is
+                        closed when its last lease is returned
+        created (float): Timestamp when the session was opened
+        last_used (float): Timestamp when the session's last lease was returned
+    """
+    def __init__(self, pool: RunspacePool, owner: 'HostPool'):
+        self.pool = pool
+        self.owner = owner
+        self.capacity = pipeline_capacity(pool)
+        self.leases = 0
+        self.retired = False
+        self.created = time.time()
+        self.last_used = self.created
+
+    def is_healthy(self) -> bool:
+        """
+        Check whether the underlying runspace pool is still usable.
+
+        Returns:
+            bool: True if the runspace pool is in the opened state
+        """
+        return getattr(self.pool, 'state', RunspacePoolState.OPENED) == RunspacePoolState.OPENED
+
+    def close(self):
+        """Close the underlying runspace pool, ignoring any errors."""
+        try:
+            self.pool.close()
+        except Exception:
+            pass  # Ignore cleanup errors
+
+
+class HostPool:
+    """
+    Sessions opened for a single host/credential key.
+
+    Attributes:
+        host (str): Computer name the sessions connect to
+        server_config (dict): Connection details used to open new sessions
+        min_size (int): Number of idle sessions kept open even when unused
+        warm_size (int): Number of sessions the keepalive keeps open and pinged
+        max_size (int): Maximum number of sessions open at once for the host
+        sessions (List[PooledSession]): Open sessions, least recently returned first
+        opening (int): Number of sessions currently being opened
+        closed (bool): Set once the host pool has been evicted or closed
+        lock (Lock): Guards the host pool's sessions and counters
+        condition (Condition): Signalled whenever a lease is returned or a session is opened or discarded
+    """
+    def __init__(self, server_config: dict, min_size: int, max_size: int):
+        self.host = server_config['computer_name']
+        self.server_config = server_config
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.warm_size = min_size
+        self.sessions: List[PooledSession] = []
+        self.opening = 0
+        self.closed = False
+        self.lock = Lock()
+        self.condition = Condition(self.lock)
+
+    @property
+    def idle(self) -> List[PooledSession]:
+        """Sessions without leases, most recently returned last."""
+        return [pooled for pooled in self.sessions if not pooled.leases]
+
+    @property
+    def in_use(self) -> int:
+        """Number of leases currently handed out."""
+        return sum(pooled.leases for pooled in self.sessions)
+
+    @property
+    def size(self) -> int:
+        """Total number of sessions owned by this host pool."""
+        return len(self.sessions) + self.opening
+
+
+class SessionPool:
+    """
+    Application-wide pool of PowerShell sessions.
+
+    Callers borrow a session with ``session()`` (or ``acquire()``/``release()``)
+    and hand it back once done. A session is leased to as many callers at once
+    as it has runspaces; a new session is only opened once every session of
+    the host is fully leased. Each host gets its own bounded set of sessions
+    guarded by its own lock; hosts that have not been used recently are
+    evicted in LRU order once more than ``max_hosts`` are tracked.
+
+    Attributes:
+        DEFAULT_MIN_SIZE (int): Default number of idle sessions kept per host
+        DEFAULT_MAX_SIZE (int): Default maximum number of sessions per host
+        DEFAULT_IDLE_TIMEOUT (int): Seconds a session may sit idle before being closed
+        DEFAULT_MAX_HOSTS (int): Maximum number of host pools kept at once
+        DEFAULT_ACQUIRE_TIMEOUT (int): Seconds to wait for a free session
+        DEFAULT_SWEEP_INTERVAL (int): Seconds between sweeps for idle sessions
+    """
+    DEFAULT_MIN_SIZE = 0
+    DEFAULT_MAX_SIZE = 4
+    DEFAULT_IDLE_TIMEOUT = 300  # 5 minutes
+    DEFAULT_MAX_HOSTS = 32
+    DEFAULT_ACQUIRE_TIMEOUT = 30  # seconds
+    DEFAULT_SWEEP_INTERVAL = 60  # seconds
+
+    def __init__(self,
+                 min_size: int = DEFAULT_MIN_SIZE,
+                 max_size: int = DEFAULT_MAX_SIZE,
+                 idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 max_hosts: int = DEFAULT_MAX_HOSTS,
+                 acquire_timeout: float = DEFAULT_ACQUIRE_TIMEOUT,
+                 sweep_interval: float = DEFAULT_SWEEP_INTERVAL,
+                 session_factory: Callable[[dict], RunspacePool] = open_runspace_pool):
+        """
+        Initialize a new SessionPool instance.
+
+        Args:
+            min_size: Default number of idle sessions kept per host
+            max_size: Default maximum number of sessions per host
+            idle_timeout: Seconds a session may sit idle before being closed
+            max_hosts: Maximum number of host pools kept at once
+            acquire_timeout: Seconds to wait for a free session before giving up
+            sweep_interval: Seconds between sweeps for idle sessions
+            session_factory: Callable that opens a RunspacePool for a server config
+        """
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.max_hosts = max_hosts
+        self.acquire_timeout = acquire_timeout
+        self.sweep_interval = sweep_interval
+        self.session_factory = session_factory
+        self._hosts: 'OrderedDict[str, HostPool]' = OrderedDict()
+        # Every open session by id(RunspacePool); entries are only added and removed
+        # under their host pool's lock and single dict operations are atomic
+        self._sessions: Dict[int, PooledSession] = {}
+        self._lock = Lock()  # Guards _hosts and _sweeper
+        self._sweeper: Optional[Tuple[Thread, Event]] = None
+        self._exported: set = set()  # Hosts with exported pool sizes
+
+    def _get_host_pool(self, key: str, server_config: dict) -> HostPool:
+        """
+        Get or create the host pool for a key.
+
+        Per-host sizes can be overridden with ``pool_min_size`` and
+        ``pool_max_size`` in the server configuration.
+        """
+        with self._lock:
+            host_pool = self._hosts.get(key)
+            if host_pool is None:
+                host_pool = HostPool(server_config,
+                                     server_config.get('pool_min_size', self.min_size),
+                                     server_config.get('pool_max_size', self.max_size))
+                self._hosts[key] = host_pool
+                if self._sweeper is None:
+                    stop_event = Event()
+                    thread = Thread(target=self._sweep, args=(stop_event,), name='session-sweeper', daemon=True)
+                    self._sweeper = (thread, stop_event)
+                    thread.start()
+            self._hosts.move_to_end(key)
+            evicted = self._evict_lru_hosts()
+        self._close(evicted)
+        return host_pool
+
+    def _sweep(self, stop_event: Event):
+        """Evict idle sessions and export pool sizes every sweep_interval seconds until stopped."""
+        while not stop_event.wait(self.sweep_interval):
+            try:
+                self.evict_idle()
+                self._export_stats()
+            except Exception:
+                pass  # Keep sweeping; a failed close only leaks until the host closes the shell
+
+    def _evict_lru_hosts(self) -> List[PooledSession]:
+        """Forget idle host pools in LRU order while over max_hosts. Pool lock must be held."""
+        evicted = []
+        for key in list(self._hosts.keys())[:-1]:
+            if len(self._hosts) <= self.max_hosts:
+                break
+            host_pool = self._hosts[key]
+            with host_pool.lock:
+                if host_pool.in_use or host_pool.opening:
+                    continue
+                for pooled in host_pool.sessions:
+                    self._sessions.pop(id(pooled.pool), None)
+                    POOL_EVENTS.inc(event='eviction', host=host_pool.host)
+                evicted.extend(host_pool.sessions)
+                host_pool.sessions = []
+                host_pool.closed = True
+            del self._hosts[key]
+        return evicted
+
+    def _remove(self, host_pool: HostPool, pooled: PooledSession):
+        """Forget a session without closing it. Host lock must be held."""
+        host_pool.sessions.remove(pooled)
+        self._sessions.pop(id(pooled.pool), None)
+
+    def _evict_idle(self, host_pool: HostPool, now: float) -> List[PooledSession]:
+        """
+        Forget sessions idle longer than idle_timeout, keeping warm_size. Host lock must be held.
+
+        Returns:
+            List[PooledSession]: Sessions to close once the lock is released
+        """
+        idle = host_pool.idle
+        keep = set(map(id, idle[len(idle) - host_pool.warm_size:])) if host_pool.warm_size else set()
+        evicted = [pooled for pooled in idle
+                   if id(pooled) not in keep and now - pooled.last_used >= self.idle_timeout]
+        for pooled in evicted:
+            self._remove(host_pool, pooled)
+            POOL_EVENTS.inc(event='eviction', host=host_pool.host)
+        return evicted
+
+    @staticmethod
+    def _close(sessions: List[PooledSession]):
+        """Close sessions outside of any lock."""
+        for pooled in sessions:
+            pooled.close()
+
+    def _lease(self, host_pool: HostPool, unhealthy: List[PooledSession]) -> Optional[PooledSession]:
+        """
+        Lease the busiest healthy session that still has a free runspace. Host lock must be held.
+
+        Sessions are packed before new ones are opened, so spare sessions go
+        idle and expire. Unhealthy idle sessions are removed and added to
+        ``unhealthy`` to be closed once the lock is released.
+        """
+        best = None
+        for pooled in reversed(host_pool.sessions):
+            if pooled.retired or pooled.leases >= pooled.capacity:
+                continue
+            if not pooled.is_healthy():
+                if pooled.leases:
+                    pooled.retired = True
+                else:
+                    self._remove(host_pool, pooled)
+                    unhealthy.append(pooled)
+                POOL_EVENTS.inc(event='unhealthy', host=host_pool.host)
+                continue
+            if best is None or pooled.leases > best.leases:
+                best = pooled
+        if best is not None:
+            best.leases += 1
+        return best
+
+    def _open(self, host_pool: HostPool, server_config: dict, leases: int) -> PooledSession:
+        """
+        Open a session reserved with ``host_pool.opening`` and add it to the host pool.
+
+        The factory runs without any lock held, so opening a slow session
+        never blocks other callers.
+        """
+        try:
+            pool = self.session_factory(server_config)
+        except Exception:
+            with host_pool.lock:
+                host_pool.opening -= 1
+                host_pool.condition.notify()
+            raise
+        with host_pool.lock:
+            host_pool.opening -= 1
+            pooled = PooledSession(pool, host_pool)
+            pooled.leases = leases
+            host_pool.sessions.append(pooled)
+            self._sessions[id(pool)] = pooled
+            # Waiters may fit on the new session's other runspaces
+            host_pool.condition.notify_all()
+        return pooled
+
+    def acquire(self, server_config: dict, timeout: Optional[float] = None) -> RunspacePool:
+        """
+        Lease a session for a server.
+
+        Shares an already open healthy session with a free runspace, opens a
+        new one if the host is below its maximum size, and otherwise waits for
+        another caller to return a lease.
+
+        Args:
+            server_config: Dictionary containing server connection details
+            timeout: Seconds to wait for a free session (defaults to acquire_timeout)
+
+        Returns:
+            RunspacePool: Opened runspace pool to run one pipeline on at a time
+
+        Raises:
+            TimeoutError: If no session became available in time
+            Exception: If opening a new session fails
+        """
+        key = make_session_key(server_config)
+        deadline = time.time() + (self.acquire_timeout if timeout is None else timeout)
+
+        while True:
+            host_pool = self._get_host_pool(key, server_config)
+            stale: List[PooledSession] = []
+            try:
+                with host_pool.lock:
+                    while not host_pool.closed:
+                        stale.extend(self._evict_idle(host_pool, time.time()))
+                        pooled = self._lease(host_pool, stale)
+                        if pooled is not None:
+                            POOL_EVENTS.inc(event='hit', host=host_pool.host)
+                            return pooled.pool
+                        if host_pool.size < host_pool.max_size:
+                            host_pool.opening += 1
+                            POOL_EVENTS.inc(event='miss', host=host_pool.host)
+                            break
+                        POOL_EVENTS.inc(event='wait', host=host_pool.host)
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            raise TimeoutError(f"Timed out waiting for a session to {server_config['computer_name']}")
+                        host_pool.condition.wait(remaining)
+                    else:
+                        continue  # Host pool was closed while waiting; start over with a new one
+            finally:
+                self._close(stale)
+            return self._open(host_pool, server_config, leases=1).pool
+
+    def release(self, pool: RunspacePool, discard: bool = False):
+        """
+        Return a lease on a session to the pool.
+
+        Args:
+            pool: Runspace pool previously returned by acquire()
+            discard: Stop handing out the session, e.g. after an error; it is
+                     closed once every other lease on it has been returned
+        """
+        pooled = self._sessions.get(id(pool))
+        if pooled is None:
+            return
+        host_pool = pooled.owner
+        with host_pool.lock:
+            if not pooled.leases:
+                return
+            pooled.leases -= 1
+            if discard or host_pool.closed or not pooled.is_healthy():
+                pooled.retired = True
+            closing = pooled.retired and not pooled.leases
+            if closing:
+                self._remove(host_pool, pooled)
+                POOL_EVENTS.inc(event='discard', host=host_pool.host)
+            elif not pooled.leases:
+                pooled.last_used = time.time()
+                host_pool.sessions.remove(pooled)
+                host_pool.sessions.append(pooled)
+            host_pool.condition.notify()
+        if closing:
+            pooled.close()
+
+    @contextmanager
+    def session(self, server_config: dict, timeout: Optional[float] = None) -> Iterator[RunspacePool]:
+        """
+        Borrow a session for the duration of a ``with`` block.
+
+        The lease is returned to the pool when the block exits, and the
+        session discarded if the block raised.
+
+        Args:
+            server_config: Dictionary containing server connection details
+            timeout: Seconds to wait for a free session
+
+        Yields:
+            RunspacePool: Opened runspace pool to run one pipeline on at a time
+        """
+        pool = self.acquire(server_config, timeout)
+        try:
+            yield pool
+        except BaseException:
+            self.release(pool, discard=True)
+            raise
+        self.release(pool)
+
+    def host_of(self, pool: RunspacePool) -> str:
+        """
+        Get the computer name a session is connected to.
+
+        Args:
+            pool: Runspace pool previously returned by acquire()
+
+        Returns:
+            str: Computer name, or 'unknown' if the session is not in the pool
+        """
+        pooled = self._sessions.get(id(pool))
+        return pooled.owner.host if pooled is not None else 'unknown'
+
+    def warm(self, server_config: dict, count: int = 1):
+        """
+        Open sessions to a server ahead of use and keep them open.
+
+        Ensures at least ``count`` sessions exist for the server (capped at its
+        maximum size) and marks that many to be kept open by ``keepalive()``.
+
+        Args:
+            server_config: Dictionary containing server connection details
+            count: Number of sessions to have ready
+
+        Raises:
+            Exception: If opening a session fails
+        """
+        host_pool = self._get_host_pool(make_session_key(server_config), server_config)
+        with host_pool.lock:
+            count = min(count, host_pool.max_size)
+            host_pool.warm_size = max(host_pool.warm_size, count)
+        while True:
+            with host_pool.lock:
+                if host_pool.closed or host_pool.size >= count:
+                    return
+                host_pool.opening += 1
+            self._open(host_pool, server_config, leases=0)
+
+    def keepalive(self, ping: Callable[[RunspacePool], None], idle_after: float) -> Dict[str, int]:
+        """
+        Ping idle sessions that are kept warm and replace the ones that died.
+
+        Sessions within each host's warm size that have been idle for
+        ``idle_after`` seconds are leased, pinged and returned, which resets
+        their idle time. Sessions failing the ping are discarded and the host
+        is topped back up to its warm size. Sessions beyond the warm size are
+        left to expire as usual.
+
+        Args:
+            ping: Callable running a trivial command on a leased session
+            idle_after: Seconds a session must have been idle to be pinged
+
+        Returns:
+            Dict[str, int]: Numbers of sessions pinged, failed and reopened
+        """
+        now = time.time()
+        with self._lock:
+            host_pools = [host_pool for host_pool in self._hosts.values() if host_pool.warm_size]
+        stale = []
+        for host_pool in host_pools:
+            with host_pool.lock:
+                # The most recently returned sessions sit at the end of the idle list
+                idle = host_pool.idle
+                stale.extend(pooled for pooled in idle[len(idle) - host_pool.warm_size:]
+                             if now - pooled.last_used >= idle_after)
+
+        counts = {'pinged': 0, 'failed': 0, 'opened': 0}
+        for pooled in stale:
+            # Lease one session at a time so callers still find the others idle
+            host_pool = pooled.owner
+            with host_pool.lock:
+                if pooled.leases or pooled.retired or pooled not in host_pool.sessions:
+                    continue  # Leased or closed in the meantime
+                pooled.leases = 1
+            try:
+                if not pooled.is_healthy():
+                    raise ConnectionError('Session is no longer open')
+                ping(pooled.pool)
+            except Exception:
+                counts['failed'] += 1
+                POOL_EVENTS.inc(event='keepalive_failure', host=host_pool.host)
+                self.release(pooled.pool, discard=True)
+                continue
+            counts['pinged'] += 1
+            self.release(pooled.pool)
+
+        for host_pool in host_pools:
+            with host_pool.lock:
+                missing = 0 if host_pool.closed else host_pool.warm_size - host_pool.size
+            if missing > 0:
+                try:
+                    self.warm(host_pool.server_config, host_pool.warm_size)
+                    counts['opened'] += missing
+                except Exception:
+                    POOL_EVENTS.inc(event='keepalive_failure', host=host_pool.host)
+        return counts
+
+    def evict_idle(self):
+        """
+        Close idle sessions that have exceeded the idle timeout on every host.
+
+        Host pools left without sessions and not kept warm are forgotten as well.
+        """
+        now = time.time()
+        with self._lock:
+            host_pools = list(self._hosts.items())
+        for key, host_pool in host_pools:
+            with host_pool.lock:
+                evicted = self._evict_idle(host_pool, now)
+                unused = not (host_pool.sessions or host_pool.opening or host_pool.warm_size)
+            self._close(evicted)
+            if unused:
+                with self._lock, host_pool.lock:
+                    # Re-check under both locks; a caller may have picked the host pool up meanwhile
+                    if self._hosts.get(key) is host_pool and not (host_pool.sessions or host_pool.opening):
+                        host_pool.closed = True
+                        host_pool.condition.notify_all()
+                        del self._hosts[key]
+
+    def _export_stats(self):
+        """Publish the session and lease counts of every host as gauges."""
+        totals: Dict[str, Dict[str, int]] = {}
+        for stats in self.stats().values():
+            host = totals.setdefault(stats['host'], {'sessions': 0, 'idle': 0, 'in_use': 0})
+            for state in host:
+                host[state] += stats[state]
+        for host in self._exported - totals.keys():
+            totals[host] = {'sessions': 0, 'idle': 0, 'in_use': 0}
+        for host, counts in totals.items():
+            for state, value in counts.items():
+                POOL_SESSIONS.set(value, state=state, host=host)
+        self._exported = {host for host, counts in totals.items() if counts['sessions']}
+
+    def stats(self) -> Dict[str, dict]:
+        """
+        Get the current size of every host pool.
+
+        Returns:
+            Dict[str, dict]: Host, session, idle session and lease counts keyed by session key
+        """
+        with self._lock:
+            host_pools = list(self._hosts.items())
+        stats = {}
+        for key, host_pool in host_pools:
+            with host_pool.lock:
+                stats[key] = {'host': host_pool.host,
+                              'sessions': len(host_pool.sessions),
+                              'idle': len(host_pool.idle),
+                              'in_use': host_pool.in_use,
+                              'capacity': sum(pooled.capacity for pooled in host_pool.sessions)}
+        return stats
+
+    def close_all(self):
+        """
+        Stop the sweeper, close every idle session and forget all host pools.
+
+        Sessions that are leased at the time are closed when their last lease is
+        returned. The sweeper starts again once the pool is used again.
+        """
+        with self._lock:
+            sweeper, self._sweeper = self._sweeper, None
+            host_pools = list(self._hosts.values())
+            self._hosts.clear()
+        if sweeper is not None:
+            thread, stop_event = sweeper
+            stop_event.set()
+            thread.join()
+        for host_pool in host_pools:
+            with host_pool.lock:
+                idle = host_pool.idle
+                for pooled in idle:
+                    self._remove(host_pool, pooled)
+                for pooled in host_pool.sessions:
+                    pooled.retired = True
+                host_pool.closed = True
+                host_pool.condition.notify_all()
+            self._close(idle)
@@ -0,0 +1,327 @@
+"""
+Session Store Module
+Server-side Flask sessions keyed by a compact session ID cookie.
+
+Flask's default session serializes every value into a signed cookie that is
+re-signed on each response and uploaded with each request, so its cost grows
+with whatever routes put into it. The ServerSessionInterface keeps session
+data on the server instead: the cookie only carries a random session ID of
+fixed length, and the data lives in a SessionStore, an in-memory LRU with
+optional persistence to a local SQLite file so logins survive restarts.
+Several processes, such as pre-forked server workers, can share one SQLite
+file; sessions are then always read from the file, so a change or logout in
+one process is seen by the others at once.
+Sessions expire after a period of inactivity and are swept out periodically.
+The store also caches the user objects Flask-Login loads on every request.
+
+Classes:
+    ServerSession: Session dictionary tracking its ID and modifications
+    SessionStore: LRU of session data with optional SQLite persistence and expiry
+    ServerSessionInterface: Flask session interface backed by a SessionStore
+"""
+import json
+import os
+import secrets
+import sqlite3
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Optional, Tuple
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+def new_session_id() -> str:
+    """Generate a random session ID."""
+    return secrets.token_urlsafe(32)
+
+
+class ServerSession(CallbackDict, SessionMixin):
+    """
+    Session data of one client.
+
+    Attributes:
+        sid (str): Session ID sent in the cookie
+        new (bool): True if the session ID was issued by this request
+        modified (bool): True once the data changed during this request
+        replaced_sid (Optional[str]): Previous session ID to delete once the session is saved
+    """
+    def __init__(self, sid: str, data: Optional[dict] = None, new: bool = False):
+        def on_update(session):
+            session.modified = True
+
+        super().__init__(data or {}, on_update)
+        self.sid = sid
+        self.new = new
+        self.modified = False
+        self.replaced_sid: Optional[str] = None
+
+    def regenerate(self):
+        """
+        Clear the session and issue a new session ID, e.g. on login.
+
+        The data stored under the old ID is deleted when the session is saved,
+        so an ID known before login never refers to a logged in session.
+        """
+        if not self.new:
+            self.replaced_sid = self.sid
+        self.clear()
+        self.sid = new_session_id()
+        self.new = True
+
+
+class SessionStore:
+    """
+    Session data keyed by session ID, held in memory with optional SQLite persistence.
+
+    Memory holds at most max_sessions sessions; the least recently used ones
+    are dropped from memory first (they are reloaded from SQLite if persisted).
+    Each request extends its session's expiry; persisted expiries are only
+    rewritten once less than half of the lifetime is left, so requests that do
+    not change the session rarely touch the disk.
+
+    Attributes:
+        MAX_SESSIONS (int): Default number of sessions held in memory
+        LIFETIME (float): Default seconds a session lives without requests
+        SWEEP_INTERVAL (float): Default seconds between sweeps of expired sessions
+        MAX_USERS (int): Default number of cached user objects
+        path (Optional[str]): SQLite file sessions are persisted to, if any
+        shared (bool): True if other processes use the same file, so sessions are always read from it
+    """
+    MAX_SESSIONS = 10000
+    LIFETIME = 12 * 3600  # 12 hours
+    SWEEP_INTERVAL = 300  # 5 minutes
+    MAX_USERS = 1024
+
+    def __init__(self, path: Optional[str] = None, max_sessions: int = MAX_SESSIONS, lifetime: float = LIFETIME,
+                 sweep_interval: float = SWEEP_INTERVAL, max_users: int = MAX_USERS, shared: bool = False):
+        """
+        Initialize a new SessionStore instance.
+
+        Args:
+            path: Optional SQLite file to persist sessions to; memory only if not given
+            max_sessions: Number of sessions held in memory
+            lifetime: Seconds a session lives without requests
+            sweep_interval: Seconds between sweeps of expired sessions
+            max_users: Number of cached user objects
+            shared: Whether other processes use the same file
+
+        Raises:
+            ValueError: If shared is set without a path
+        """
+        if shared and not path:
+            raise ValueError('A session store shared between processes needs a SQLite path')
+        self.path = path
+        self.shared = shared
+        self.max_sessions = max_sessions
+        self.lifetime = lifetime
+        self.sweep_interval = sweep_interval
+        self.max_users = max_users
+        # sid -> (data, expiry, expiry written to SQLite)
+        self._sessions: 'OrderedDict[str, Tuple[dict, float, float]]' = OrderedDict()
+        self._users: 'OrderedDict[str, Any]' = OrderedDict()
+        self._swept = time.time()
+        self._lock = Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._db_pid: Optional[int] = None  # Process the connection was opened in
+        self._db_lock = Lock()
+        if path:
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._connect()
+
+    def _connect(self):
+        """Open this process's connection to the SQLite file."""
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('CREATE TABLE IF NOT EXISTS sessions '
+                         '(sid TEXT PRIMARY KEY, data TEXT NOT NULL, expires REAL NOT NULL)')
+        self._db.commit()
+        self._db_pid = os.getpid()
+
+    def _database(self) -> Optional[sqlite3.Connection]:
+        """Get the SQLite connection, reopening it in a forked process; None without persistence."""
+        if self._db is not None and self._db_pid != os.getpid():
+            # A connection must not be used across fork; leave the parent's alone
+            self._db_lock = Lock()
+            self._connect()
+        return self._db
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def load(self, sid: str) -> Optional[dict]:
+        """
+        Get the data of a session that has not expired.
+
+        Args:
+            sid: Session ID
+
+        Returns:
+            Optional[dict]: Copy of the session data, or None if unknown or expired
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._sessions.get(sid)
+            if entry is not None and not self.shared:
+                if entry[1] > now:
+                    self._sessions.move_to_end(sid)
+                    return dict(entry[0])
+                del self._sessions[sid]
+        db = self._database()
+        if db is None:
+            return None
+        with self._db_lock:
+            row = db.execute('SELECT data, expires FROM sessions WHERE sid = ?', (sid,)).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        data = json.loads(row[0])
+        self._remember(sid, data, row[1], row[1])
+        return dict(data)
+
+    def save(self, sid: str, data: dict, modified: bool):
+        """
+        Store a session's data and extend its expiry.
+
+        Args:
+            sid: Session ID
+            data: Session data; must be JSON serializable when persisting
+            modified: Whether the data changed, forcing a write to SQLite
+        """
+        now = time.time()
+        expires = now + self.lifetime
+        with self._lock:
+            entry = self._sessions.get(sid)
+            persisted = entry[2] if entry is not None else 0.0
+        db = self._database()
+        if db is not None and (modified or persisted - now < self.lifetime / 2):
+            with self._db_lock, db:
+                db.execute('INSERT OR REPLACE INTO sessions (sid, data, expires) VALUES (?, ?, ?)',
+                           (sid, json.dumps(data, separators=(',', ':')), expires))
+            persisted = expires
+        self._remember(sid, dict(data), expires, persisted)
+        if now - self._swept >= self.sweep_interval:
+            self.sweep()
+
+    def _remember(self, sid: str, data: dict, expires: float, persisted: float):
+        """Hold a session in memory, dropping the least recently used ones beyond max_sessions."""
+        with self._lock:
+            self._sessions[sid] = (data, expires, persisted)
+            self._sessions.move_to_end(sid)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, sid: str):
+        """
+        Remove a session.
+
+        Args:
+            sid: Session ID
+        """
+        with self._lock:
+            self._sessions.pop(sid, None)
+        db = self._database()
+        if db is not None:
+            with self._db_lock, db:
+                db.execute('DELETE FROM sessions WHERE sid = ?', (sid,))
+
+    def sweep(self) -> int:
+        """
+        Remove expired sessions from memory and SQLite.
+
+        Returns:
+            int: Number of sessions removed from memory
+        """
+        now = time.time()
+        with self._lock:
+            self._swept = now
+            expired = [sid for sid, (_, expires, _) in self._sessions.items() if expires <= now]
+            for sid in expired:
+                del self._sessions[sid]
+        db = self._database()
+        if db is not None:
+            with self._db_lock, db:
+                db.execute('DELETE FROM sessions WHERE expires <= ?', (now,))
+        return len(expired)
+
+    def get_user(self, user_id: str, factory: Callable[[str], Any]) -> Any:
+        """
+        Get the cached user object for an ID, creating it on first use.
+
+        Args:
+            user_id: User ID stored in the session
+            factory: Callable creating the user object from its ID
+
+        Returns:
+            Any: The user object
+        """
+        with self._lock:
+            user = self._users.get(user_id)
+            if user is not None:
+                self._users.move_to_end(user_id)
+                return user
+        user = factory(user_id)
+        with self._lock:
+            user = self._users.setdefault(user_id, user)
+            while len(self._users) > self.max_users:
+                self._users.popitem(last=False)
+        return user
+
+    def close(self):
+        """Close the SQLite connection, if any."""
+        if self._db is not None and self._db_pid == os.getpid():
+            with self._db_lock:
+                self._db.close()
+                self._db = None
+
+
+class ServerSessionInterface(SessionInterface):
+    """
+    Flask session interface storing session data in a SessionStore.
+
+    The cookie holds only the session ID and is sent again only when a new
+    session starts, so its size never depends on the session contents.
+
+    Attributes:
+        store (SessionStore): Store holding the session data
+    """
+    def __init__(self, store: SessionStore):
+        """
+        Initialize a new ServerSessionInterface instance.
+
+        Args:
+            store: Store holding the session data
+        """
+        self.store = store
+
+    def open_session(self, app, request) -> ServerSession:
+        """Load the session named by the request's cookie, or start a new one."""
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            data = self.store.load(sid)
+            if data is not None:
+                return ServerSession(sid, data)
+        return ServerSession(new_session_id(), new=True)
+
+    def save_session(self, app, session: ServerSession, response):
+        """Store the session and set or clear the session ID cookie."""
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+        if session.replaced_sid:
+            self.store.delete(session.replaced_sid)
+        if not session:
+            if not session.new or session.replaced_sid:
+                # Emptied, e.g. on logout
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        self.store.save(session.sid, dict(session), session.modified)
+        if session.new or (session.permanent and self.should_set_cookie(app, session)):
+            response.set_cookie(name, session.sid,
+                                expires=self.get_expiration_time(app, session),
+                                httponly=self.get_cookie_httponly(app),
+                                domain=domain,
+                                path=path,
+                                secure=self.get_cookie_secure(app),
+                                samesite=self.get_cookie_samesite(app))
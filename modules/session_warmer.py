@@ -0,0 +1,97 @@
+"""
+Session Warmer Module
+Opens remote sessions before operators need them and keeps them alive.
+
+Opening a WinRM connection and a RunspacePool can take seconds, and a pooled
+session that sat idle past the pool's idle timeout is closed, so the next
+click pays that cost again. The SessionWarmer opens sessions to every known
+host in the background at startup (and for each operator when they log in),
+and a keepalive thread periodically pings idle warm sessions so they never
+expire, replacing any that died in the background.
+
+Classes:
+    SessionWarmer: Background warm-up and keepalive of pooled sessions
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+
+class SessionWarmer:
+    """
+    Warms up pooled sessions in parallel and keeps them alive.
+
+    Attributes:
+        KEEPALIVE_INTERVAL (float): Default seconds between keepalive passes
+        IDLE_AFTER (float): Default seconds a warm session may sit idle before being pinged
+        SESSIONS_PER_HOST (int): Default number of sessions opened per host
+        MAX_WORKERS (int): Number of hosts warmed up at once
+        last_errors (Dict[str, str]): Most recent warm-up error per host
+        last_keepalive (Optional[dict]): Counts reported by the last keepalive pass
+    """
+    KEEPALIVE_INTERVAL = 60  # seconds
+    IDLE_AFTER = 120  # seconds
+    SESSIONS_PER_HOST = 1
+    MAX_WORKERS = 4
+
+    def __init__(self, process_manager, interval: float = KEEPALIVE_INTERVAL,
+                 idle_after: float = IDLE_AFTER, sessions_per_host: int = SESSIONS_PER_HOST,
+                 max_workers: int = MAX_WORKERS):
+        """
+        Initialize a new SessionWarmer instance.
+
+        Args:
+            process_manager: ProcessManager whose session pool is warmed
+            interval: Seconds between keepalive passes
+            idle_after: Seconds a warm session may sit idle before being pinged;
+                        keep this below the pool's idle timeout
+            sessions_per_host: Number of sessions opened per host
+            max_workers: Number of hosts warmed up at once
+        """
+        self.process_manager = process_manager
+        self.interval = interval
+        self.idle_after = idle_after
+        self.sessions_per_host = sessions_per_host
+        self.last_errors: Dict[str, str] = {}
+        self.last_keepalive: Optional[dict] = None
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='warmup')
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def warm(self, server_configs: Iterable[dict]):
+        """
+        Open sessions to several servers in the background without waiting.
+
+        Args:
+            server_configs: Connection details of the servers to warm up
+        """
+        for server_config in server_configs:
+            self._executor.submit(self._warm_one, server_config)
+
+    def _warm_one(self, server_config: dict):
+        """Open the sessions for one server, recording any failure."""
+        host = server_config['computer_name']
+        try:
+            self.process_manager.warm_sessions(server_config, self.sessions_per_host)
+            self.last_errors.pop(host, None)
+        except Exception as e:
+            self.last_errors[host] = str(e)
+
+    def start(self):
+        """Start the keepalive thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='session-keepalive', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        """Run keepalive passes until stopped."""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.last_keepalive = self.process_manager.keepalive(self.idle_after)
+            except Exception as e:
+                self.last_keepalive = {'error': str(e)}
+
+    def stop(self):
+        """Stop the keepalive thread and abandon pending warm-ups."""
+        self._stop_event.set()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,169 @@
+"""
+Status Cache Module
+Short-lived cache for process status lookups with single-flight coalescing.
+
+When several users ask for the same server/process status at once, only the
+first request goes to the remote host; the others wait for and share its
+result. Results are kept for a short TTL in a bounded LRU map so repeated
+lookups within that window never leave the app host.
+
+Classes:
+    StatusCache: TTL/LRU cache that coalesces concurrent loads of the same key
+"""
+import time
+from collections import OrderedDict
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Flight:
+    """A load in progress that other callers for the same key can wait on."""
+    def __init__(self):
+        self.event = Event()
+        self.result: Optional[Tuple[bool, Any]] = None
+        self.error: Optional[BaseException] = None
+        self.stale = False
+
+
+class StatusCache:
+    """
+    TTL cache for status lookups that coalesces concurrent loads.
+
+    Loaders return the ``(success, result)`` tuples used throughout
+    ProcessManager; only successful results are cached.
+
+    Attributes:
+        DEFAULT_TTL (float): Seconds a cached status stays fresh
+        DEFAULT_MAX_ENTRIES (int): Maximum number of cached statuses
+    """
+    DEFAULT_TTL = 2.0  # seconds
+    DEFAULT_MAX_ENTRIES = 1024
+
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = DEFAULT_MAX_ENTRIES):
+        """
+        Initialize a new StatusCache instance.
+
+        Args:
+            ttl: Seconds a cached status stays fresh
+            max_entries: Maximum number of cached statuses before LRU eviction
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: 'OrderedDict[Hashable, Tuple[float, Any]]' = OrderedDict()
+        self._inflight: Dict[Hashable, _Flight] = {}
+        self._lock = Lock()
+
+    def _get_fresh(self, key: Hashable, now: float) -> Optional[Any]:
+        """Get a cached value if it has not expired. Lock must be held."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _store(self, key: Hashable, value: Any, now: float):
+        """Store a value and evict the least recently used entries. Lock must be held."""
+        self._entries[key] = (now + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached value.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[Any]: Cached value, or None if missing or expired
+        """
+        with self._lock:
+            return self._get_fresh(key, time.time())
+
+    def set(self, key: Hashable, value: Any):
+        """
+        Cache a value for the configured TTL.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+        """
+        with self._lock:
+            self._store(key, value, time.time())
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Tuple[bool, Any]]) -> Tuple[bool, Any]:
+        """
+        Get a cached value or load it, sharing one load between concurrent callers.
+
+        Args:
+            key: Cache key
+            loader: Callable returning a (success, result) tuple
+
+        Returns:
+            Tuple[bool, Any]: Success status and cached or freshly loaded result
+        """
+        with self._lock:
+            value = self._get_fresh(key, time.time())
+            if value is not None:
+                return True, value
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._inflight[key] = flight
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = loader()
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                if self._inflight.get(key) is flight:
+                    del self._inflight[key]
+                if flight.result is not None and flight.result[0] and not flight.stale:
+                    self._store(key, flight.result[1], time.time())
+            flight.event.set()
+        return flight.result
+
+    def invalidate(self, key: Hashable):
+        """
+        Drop a cached value and keep any load already in flight from caching its result.
+
+        Args:
+            key: Cache key
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+            flight = self._inflight.pop(key, None)
+            if flight is not None:
+                flight.stale = True
+
+    def invalidate_matching(self, predicate: Callable[[Hashable], bool]):
+        """
+        Drop every cached value and in-flight load whose key matches a predicate.
+
+        Args:
+            predicate: Callable returning True for keys to invalidate
+        """
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+            for key in [key for key in self._inflight if predicate(key)]:
+                self._inflight.pop(key).stale = True
+
+    def clear(self):
+        """Drop every cached value."""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,296 @@
+"""
+Status Stream Module
+Fans process status changes out to dashboard clients over Server-Sent Events.
+
+Instead of every browser tab polling every process, a single background poller
+per server and credential set fetches the batched status of all configured
+processes and pushes only the rows that changed to every subscribed client.
+Clients connecting with the same credentials share a poller, while operators
+with their own per-user credentials each get their own, so nobody sees status
+fetched with someone else's account. Remote polling load therefore grows with
+the number of servers and credential sets being watched, not with the number
+of open tabs. Every open stream holds a request thread of the server, so the
+number of streams can be capped below the thread count; clients beyond the
+cap are turned away and fall back to polling.
+
+Classes:
+    StreamLimitError: Raised when the maximum number of open streams is reached
+    Subscription: A single client's queue of pending status events
+    ServerPoller: Background poller for one server and its subscribers
+    StatusBroadcaster: Registry of pollers shared by all clients
+"""
+import json
+import queue
+import threading
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from modules.session_pool import make_session_key
+
+
+def format_sse(event: str, data) -> str:
+    """
+    Format a Server-Sent Events message.
+
+    Args:
+        event: Event name
+        data: JSON-serializable payload
+
+    Returns:
+        str: Message ready to be written to the event stream
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class StreamLimitError(Exception):
+    """Raised when a client subscribes while the maximum number of streams is open."""
+    pass
+
+
+class Subscription:
+    """
+    A single client's subscription to a server's status.
+
+    Attributes:
+        server_name (str): Server the client is watching
+        key (Tuple[str, str]): Server name and session key of the poller serving the client
+        queue (queue.Queue): Pending (event, data) tuples for the client
+        active (bool): False once the subscription was dropped or closed
+    """
+    def __init__(self, server_name: str, key: Tuple[str, str], max_size: int):
+        self.server_name = server_name
+        self.key = key
+        self.queue: 'queue.Queue[Tuple[str, dict]]' = queue.Queue(max_size)
+        self.active = True
+
+    def push(self, event: str, data: dict) -> bool:
+        """
+        Queue an event for the client without blocking.
+
+        Returns:
+            bool: False if the client's queue is full
+        """
+        try:
+            self.queue.put_nowait((event, data))
+            return True
+        except queue.Full:
+            return False
+
+    def close(self):
+        """End the client's stream after the events already queued."""
+        self.active = False
+        try:
+            self.queue.put_nowait((None, None))
+        except queue.Full:
+            pass  # The stream checks active after draining the queue
+
+
+class ServerPoller:
+    """
+    Polls the batched status of one server with one set of credentials and broadcasts changes.
+
+    Attributes:
+        STATUS_FIELDS (tuple): Fields compared to decide whether a row changed
+        server_name (str): Name of the polled server
+        key (Tuple[str, str]): Server name and session key the poller is registered under
+        server_config (dict): Connection details used for polling
+        process_names (List[str]): Processes included in every poll
+        status_script (Optional[str]): Pre-rendered batch status script for the processes
+        subscribers (List[Subscription]): Clients receiving updates
+        snapshot (Optional[dict]): Last successfully fetched status payload
+    """
+    STATUS_FIELDS = ('running', 'pid', 'start_time')
+
+    def __init__(self, broadcaster: 'StatusBroadcaster', server_name: str, key: Tuple[str, str],
+                 server_config: dict, process_names: List[str], status_script: Optional[str] = None):
+        self.broadcaster = broadcaster
+        self.server_name = server_name
+        self.key = key
+        self.server_config = server_config
+        self.process_names = process_names
+        self.status_script = status_script
+        self.subscribers: List[Subscription] = []
+        self.snapshot: Optional[dict] = None
+        self.last_error: Optional[str] = None
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"status-poller-{server_name}", daemon=True)
+
+    def _changed_rows(self, statuses: dict) -> dict:
+        """Get the rows whose status differs from the previous snapshot."""
+        if self.snapshot is None:
+            return statuses
+        changed = {}
+        for name, status in statuses.items():
+            previous = self.snapshot.get(name, {})
+            if any(status.get(field) != previous.get(field) for field in self.STATUS_FIELDS):
+                changed[name] = status
+        return changed
+
+    def broadcast(self, event: str, data: dict):
+        """
+        Push an event to every subscriber. Must be called with the broadcaster lock held.
+
+        Subscribers whose queue is full are dropped; the browser's EventSource
+        reconnects and receives a fresh snapshot.
+        """
+        for subscription in list(self.subscribers):
+            if not subscription.push(event, data):
+                subscription.active = False
+                self.subscribers.remove(subscription)
+
+    def _run(self):
+        """Poll the server until no subscribers are left."""
+        while True:
+            with self.broadcaster.lock:
+                if not self.subscribers:
+                    if self.broadcaster.pollers.get(self.key) is self:
+                        del self.broadcaster.pollers[self.key]
+                    return
+
+            success, result = self.broadcaster.process_manager.get_server_status(
+                self.server_config, self.process_names, self.status_script)
+
+            with self.broadcaster.lock:
+                if success:
+                    event = 'snapshot' if self.snapshot is None else 'update'
+                    changed = self._changed_rows(result)
+                    self.snapshot = result
+                    self.last_error = None
+                    if changed:
+                        self.broadcast(event, {'server': self.server_name, 'processes': changed})
+                elif result.get('error') != self.last_error:
+                    self.last_error = result.get('error')
+                    self.broadcast('error', {
+                        'server': self.server_name,
+                        'message': self.last_error,
+                        'circuit': self.broadcaster.process_manager.circuit_state(self.server_config)
+                    })
+
+            self.stop_event.wait(self.broadcaster.interval)
+
+
+class StatusBroadcaster:
+    """
+    Shares one status poller per server and credential set between all subscribed clients.
+
+    Attributes:
+        POLL_INTERVAL (int): Seconds between polls of a server
+        HEARTBEAT_INTERVAL (int): Seconds between keepalive comments on idle streams
+        SUBSCRIBER_QUEUE_SIZE (int): Maximum pending events per client
+        pollers (Dict[Tuple[str, str], ServerPoller]): Active pollers keyed by server name and session key
+        max_subscribers (Optional[int]): Streams allowed open at once; unlimited if None
+        lock (Lock): Guards pollers, their subscriber lists and the open subscriptions
+    """
+    POLL_INTERVAL = 2  # seconds
+    HEARTBEAT_INTERVAL = 15  # seconds
+    SUBSCRIBER_QUEUE_SIZE = 100
+
+    def __init__(self, process_manager, interval: float = POLL_INTERVAL, max_subscribers: Optional[int] = None):
+        """
+        Initialize a new StatusBroadcaster instance.
+
+        Args:
+            process_manager: ProcessManager used to fetch batched server status
+            interval: Seconds between polls of a server
+            max_subscribers: Streams allowed open at once; unlimited if None
+        """
+        self.process_manager = process_manager
+        self.interval = interval
+        self.max_subscribers = max_subscribers
+        self.pollers: Dict[Tuple[str, str], ServerPoller] = {}
+        self._subscriptions: Set[Subscription] = set()
+        self.lock = threading.Lock()
+
+    def subscribe(self, server_name: str, server_config: dict, process_names: List[str],
+                  status_script: Optional[str] = None) -> Subscription:
+        """
+        Subscribe to status changes for a server.
+
+        Starts a poller for the server and the subscriber's credentials if
+        none is running; subscribers only share a poller with those connecting
+        with the same credentials.
+
+        Args:
+            server_name: Name of the server to watch
+            server_config: Connection details for the server, resolved for the subscribing user
+            process_names: Processes to include in the status
+            status_script: Pre-rendered batch status script for the processes, e.g.
+                           ServerConfig.batch_status_script; rendered if not given
+
+        Returns:
+            Subscription: Subscription receiving status events
+
+        Raises:
+            StreamLimitError: If max_subscribers streams are already open
+        """
+        key = (server_name, make_session_key(server_config))
+        subscription = Subscription(server_name, key, self.SUBSCRIBER_QUEUE_SIZE)
+        with self.lock:
+            if self.max_subscribers is not None and len(self._subscriptions) >= self.max_subscribers:
+                raise StreamLimitError(f'Too many open status streams ({self.max_subscribers}), '
+                                       f'poll /server_status instead')
+            self._subscriptions.add(subscription)
+            poller = self.pollers.get(key)
+            if poller is None:
+                poller = ServerPoller(self, server_name, key, server_config, process_names, status_script)
+                self.pollers[key] = poller
+                poller.subscribers.append(subscription)
+                poller.thread.start()
+            else:
+                poller.subscribers.append(subscription)
+                poller.stop_event.clear()
+                if poller.snapshot is not None:
+                    subscription.push('snapshot', {'server': server_name, 'processes': poller.snapshot})
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        """
+        Remove a subscription. The server's poller stops once it has no subscribers.
+
+        Args:
+            subscription: Subscription returned by subscribe()
+        """
+        with self.lock:
+            subscription.active = False
+            self._subscriptions.discard(subscription)
+            poller = self.pollers.get(subscription.key)
+            if poller is not None and subscription in poller.subscribers:
+                poller.subscribers.remove(subscription)
+                if not poller.subscribers:
+                    poller.stop_event.set()
+
+    def stream(self, subscription: Subscription) -> Iterator[str]:
+        """
+        Generate the Server-Sent Events stream for a subscription.
+
+        Sends keepalive comments while no events arrive and unsubscribes when
+        the client disconnects.
+
+        Args:
+            subscription: Subscription returned by subscribe()
+
+        Yields:
+            str: Formatted Server-Sent Events messages
+        """
+        try:
+            while subscription.active:
+                try:
+                    event, data = subscription.queue.get(timeout=self.HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    break
+                yield format_sse(event, data)
+        finally:
+            self.unsubscribe(subscription)
+
+    def shutdown(self):
+        """Stop every poller and end all subscribers' streams."""
+        with self.lock:
+            pollers = list(self.pollers.values())
+            self.pollers.clear()
+            self._subscriptions.clear()
+            for poller in pollers:
+                poller.stop_event.set()
+                for subscription in poller.subscribers:
+                    subscription.close()
+                poller.subscribers.clear()